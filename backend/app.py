@@ -1,12 +1,13 @@
 """Servidor HTTP para o backend do Save Your Money."""
 from __future__ import annotations
 
+import atexit
 import os
 
 from flask import Flask, jsonify
 
 from . import state
-from .domain.entities import Category, Expense, Income, Card, Installment, Recurrence, Goal
+from .domain.entities import Category, Expense, Income, Card, Installment, Recurrence, Goal, PriceIndex
 from .repositories.sqlite.categoria_repo import SQLiteCategoryRepository
 from .repositories.sqlite.entrada_repo import SQLiteIncomeRepository
 from .repositories.sqlite.gasto_repo import SQLiteExpenseRepository
@@ -14,6 +15,7 @@ from .repositories.sqlite.cartao_repo import SQLiteCardRepository
 from .repositories.sqlite.parcela_repo import SQLiteInstallmentRepository
 from .repositories.sqlite.recorrencia_repo import SQLiteRecurrenceRepository
 from .repositories.sqlite.meta_repo import SQLiteGoalRepository
+from .repositories.sqlite.indice_repo import SQLitePriceIndexRepository
 from .routes.backup import bp as backup_bp
 from .routes.calculator import bp as calculator_bp
 from .routes.cards import bp as cards_bp
@@ -24,15 +26,26 @@ from .routes.goals import bp as goals_bp
 from .routes.health import bp as health_bp
 from .routes.incomes import bp as incomes_bp
 from .routes.installments import bp as installments_bp
+from .routes.price_indices import bp as price_indices_bp
+from .routes.projection import bp as projection_bp
 from .routes.recurrences import bp as recurrences_bp
 from .routes.reports import bp as reports_bp
+from .services.backup_scheduler import BackupScheduler
+from .services.recurrence_materializer import RecurrenceMaterializer
+from .use_cases.materialize_recurrences import materialize_recurrences
 from .errors import HttpError
+from .json_provider import EntityJSONProvider
+from .server import serve
 
 
 BASE_DATA_DIR = os.environ.get("SAVEYOURMONEY_DATA_DIR", ".")
 os.makedirs(BASE_DATA_DIR, exist_ok=True)
 DB_PATH = os.path.join(BASE_DATA_DIR, "saveyourmoney.db")
 BACKUP_DIR = os.path.join(BASE_DATA_DIR, "backups")
+BACKUP_INTERVAL_MINUTES = float(os.environ.get("SAVEYOURMONEY_BACKUP_INTERVAL_MINUTES", "60"))
+# Vazio: recorrências aplicadas por inteiro. Número: gera só até o mês atual + N.
+_horizon_env = os.environ.get("SAVEYOURMONEY_RECURRENCE_HORIZON_MONTHS", "").strip()
+RECURRENCE_HORIZON_MONTHS = int(_horizon_env) if _horizon_env else None
 
 category_repo = SQLiteCategoryRepository(DB_PATH)
 expense_repo = SQLiteExpenseRepository(DB_PATH)
@@ -41,6 +54,12 @@ card_repo = SQLiteCardRepository(DB_PATH)
 installment_repo = SQLiteInstallmentRepository(DB_PATH)
 recurrence_repo = SQLiteRecurrenceRepository(DB_PATH)
 goal_repo = SQLiteGoalRepository(DB_PATH)
+price_index_repo = SQLitePriceIndexRepository(DB_PATH)
+backup_scheduler = BackupScheduler(DB_PATH, BACKUP_DIR, BACKUP_INTERVAL_MINUTES * 60)
+recurrence_materializer = RecurrenceMaterializer(
+    lambda until: materialize_recurrences(state.recurrence_repo, state.expense_repo, state.income_repo, until),
+    RECURRENCE_HORIZON_MONTHS,
+)
 
 
 def _sync_state() -> None:
@@ -54,11 +73,15 @@ def _sync_state() -> None:
     state.installment_repo = installment_repo
     state.recurrence_repo = recurrence_repo
     state.goal_repo = goal_repo
+    state.price_index_repo = price_index_repo
+    state.backup_scheduler = backup_scheduler
+    state.recurrence_materializer = recurrence_materializer
 
 
 def create_app() -> Flask:
     _sync_state()
     app = Flask(__name__)
+    app.json = EntityJSONProvider(app)
     app.register_blueprint(health_bp)
     app.register_blueprint(calculator_bp)
     app.register_blueprint(backup_bp)
@@ -70,6 +93,8 @@ def create_app() -> Flask:
     app.register_blueprint(recurrences_bp)
     app.register_blueprint(goals_bp)
     app.register_blueprint(reports_bp)
+    app.register_blueprint(price_indices_bp)
+    app.register_blueprint(projection_bp)
     app.register_blueprint(docs_bp)
 
     @app.errorhandler(HttpError)
@@ -86,6 +111,14 @@ def sync_state() -> None:
     _sync_state()
 
 
+def start_background_services() -> None:
+    """Inicia os serviços em segundo plano usados pelo servidor em execução."""
+    backup_scheduler.start()
+    recurrence_materializer.start()
+    atexit.register(backup_scheduler.stop)
+    atexit.register(recurrence_materializer.stop)
+
+
 app = create_app()
 
 
@@ -99,6 +132,7 @@ __all__ = [
     "Installment",
     "Recurrence",
     "Goal",
+    "PriceIndex",
     "BASE_DATA_DIR",
     "DB_PATH",
     "BACKUP_DIR",
@@ -109,10 +143,16 @@ __all__ = [
     "installment_repo",
     "recurrence_repo",
     "goal_repo",
+    "price_index_repo",
+    "backup_scheduler",
+    "recurrence_materializer",
     "sync_state",
+    "start_background_services",
 ]
 
 
 if __name__ == "__main__":
     debug_mode = os.environ.get("SAVEYOURMONEY_DEBUG") == "1"
-    app.run(port=5000, debug=debug_mode, use_reloader=debug_mode)
+    if not debug_mode or os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        start_background_services()
+    serve(app, debug=debug_mode)
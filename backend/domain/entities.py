@@ -1,6 +1,7 @@
 """Definições de classes de domínio para o aplicativo Save Your Money."""
 from dataclasses import dataclass
 from datetime import date
+import math
 from typing import Optional
 
 @dataclass
@@ -45,6 +46,7 @@ class Income:
     month: int
     year: int
     confirmed: bool = True
+    recurrence_id: Optional[int] = None
     notes: Optional[str] = None
     id: Optional[int] = None
 
@@ -80,6 +82,13 @@ class Card:
             raise ValueError("Dia de vencimento deve estar entre 1 e 31.")
 
 
+RECURRENCE_FREQUENCIES = ("semanal", "quinzenal", "mensal", "anual", "personalizado")
+
+INSTALLMENT_PENDING = "pendente"
+INSTALLMENT_PAID = "pago"
+INSTALLMENT_STATUSES = (INSTALLMENT_PENDING, INSTALLMENT_PAID)
+
+
 @dataclass
 class Installment:
     """Parcela de um gasto no cartão."""
@@ -91,6 +100,7 @@ class Installment:
     month: int
     year: int
     status: str = "pendente"
+    plan_id: Optional[int] = None  # linha que substitui a parcela calculada de um parcelamento
     id: Optional[int] = None
 
     def __post_init__(self) -> None:
@@ -110,6 +120,54 @@ class Installment:
             raise ValueError("Ano da parcela deve ser positivo.")
 
 
+INSTALLMENT_ROUNDINGS = ("last",)
+
+
+@dataclass
+class InstallmentPlan:
+    """Compra parcelada no cartão, guardada em uma única linha.
+
+    As parcelas são calculadas a partir do total e da primeira competência; só
+    parcelas editadas ou pagas ficam gravadas em ``installments``. Com o
+    arredondamento ``last`` a diferença de centavos vai para a última parcela.
+    """
+    card_id: int
+    expense_name: str
+    total_value: float
+    installments: int
+    first_month: int
+    first_year: int
+    expense_id: Optional[int] = None
+    rounding: str = "last"
+    id: Optional[int] = None
+
+    def __post_init__(self) -> None:
+        if self.card_id <= 0:
+            raise ValueError("Cartão inválido.")
+        if not self.expense_name or not self.expense_name.strip():
+            raise ValueError("Nome do gasto é obrigatório.")
+        if self.total_value < 0:
+            raise ValueError("Valor do parcelamento não pode ser negativo.")
+        if self.installments <= 0:
+            raise ValueError("Número de parcelas deve ser maior que zero.")
+        if not 1 <= self.first_month <= 12:
+            raise ValueError("Mês da primeira parcela deve estar entre 1 e 12.")
+        if self.first_year <= 0:
+            raise ValueError("Ano da primeira parcela deve ser positivo.")
+        if self.rounding not in INSTALLMENT_ROUNDINGS:
+            raise ValueError("Arredondamento de parcelas inválido.")
+
+
+@dataclass
+class CardInvoice:
+    """Total de uma fatura de cartão, identificada pelo mês em que fecha."""
+    card_id: int
+    month: int
+    year: int
+    total: float = 0.0
+    installments: int = 0
+
+
 @dataclass
 class Recurrence:
     """Regra de recorrência para gerar gastos/entradas."""
@@ -124,6 +182,9 @@ class Recurrence:
     payment_method: Optional[str] = None
     confirmed: Optional[bool] = None
     notes: Optional[str] = None
+    virtual: bool = False  # ocorrências calculadas na leitura, sem gravar linhas
+    frequency: str = "mensal"  # semanal, quinzenal, mensal, anual ou personalizado
+    start_day: int = 1
     id: Optional[int] = None
 
     def __post_init__(self) -> None:
@@ -141,6 +202,27 @@ class Recurrence:
             raise ValueError("Intervalo deve ser maior que zero.")
         if self.occurrences <= 0:
             raise ValueError("Ocorrências deve ser maior que zero.")
+        if self.frequency not in RECURRENCE_FREQUENCIES:
+            raise ValueError("Frequência de recorrência inválida.")
+        if not 1 <= self.start_day <= 31:
+            raise ValueError("Dia inicial deve estar entre 1 e 31.")
+
+
+@dataclass
+class SkippedOccurrence:
+    """Ocorrência de uma recorrência removida pelo usuário, que não deve ser gerada de novo."""
+    recurrence_id: int
+    month: int
+    year: int
+    id: Optional[int] = None
+
+    def __post_init__(self) -> None:
+        if self.recurrence_id <= 0:
+            raise ValueError("Recorrência inválida.")
+        if not 1 <= self.month <= 12:
+            raise ValueError("Mês da ocorrência deve estar entre 1 e 12.")
+        if self.year <= 0:
+            raise ValueError("Ano da ocorrência deve ser positivo.")
 
 
 @dataclass
@@ -162,3 +244,23 @@ class Goal:
             raise ValueError("Mês da meta deve estar entre 1 e 12.")
         if self.year <= 0:
             raise ValueError("Ano da meta deve ser positivo.")
+
+
+@dataclass
+class PriceIndex:
+    """Número-índice de preços de uma série (ex.: IPCA) em uma competência."""
+    series: str
+    month: int
+    year: int
+    value: float
+    id: Optional[int] = None
+
+    def __post_init__(self) -> None:
+        if not self.series or not self.series.strip():
+            raise ValueError("Série do índice é obrigatória.")
+        if not 1 <= self.month <= 12:
+            raise ValueError("Mês do índice deve estar entre 1 e 12.")
+        if self.year <= 0:
+            raise ValueError("Ano do índice deve ser positivo.")
+        if not math.isfinite(self.value) or self.value <= 0:
+            raise ValueError("Valor do índice deve ser positivo.")
@@ -0,0 +1,54 @@
+"""Aritmética de competências mensais com índices inteiros.
+
+Uma competência ``(mês, ano)`` é representada pelo índice ``ano * 12 + mês - 1``.
+Somar meses, medir a distância entre competências e gerar séries viram operações
+inteiras em O(1) (ou ``range``), sem avançar mês a mês.
+"""
+from __future__ import annotations
+
+from typing import List, Optional, Tuple
+
+
+def month_index(month: int, year: int) -> int:
+    return year * 12 + month - 1
+
+
+def from_month_index(index: int) -> Tuple[int, int]:
+    year, month = divmod(index, 12)
+    return month + 1, year
+
+
+def add_months(month: int, year: int, months: int) -> Tuple[int, int]:
+    return from_month_index(month_index(month, year) + months)
+
+
+def months_between(start_month: int, start_year: int, end_month: int, end_year: int) -> int:
+    """Distância em meses de ``start`` até ``end`` (negativa se ``end`` vier antes)."""
+    return month_index(end_month, end_year) - month_index(start_month, start_year)
+
+
+def month_range(start: int, count: int, step: int = 1) -> range:
+    """Índices de ``count`` competências a partir de ``start``, de ``step`` em ``step`` meses."""
+    return range(start, start + max(count, 0) * step, step)
+
+
+def periods(indices: range) -> List[Tuple[int, int]]:
+    """Converte uma série de índices em ``(mês, ano)``."""
+    return [(index % 12 + 1, index // 12) for index in indices]
+
+
+def count_until(start: int, end: int, step: int = 1) -> int:
+    """Quantidade de competências de ``start`` até ``end`` (inclusive) de ``step`` em ``step`` meses."""
+    if end < start:
+        return 0
+    return (end - start) // step + 1
+
+
+def filter_bounds(month: Optional[int] = None, year: Optional[int] = None) -> Optional[Tuple[int, int]]:
+    """Intervalo ``[primeiro, último]`` de índices coberto pelos filtros ``mes``/``ano``.
+
+    Retorna ``None`` quando não há ano, pois o filtro não forma um intervalo.
+    """
+    if year is None:
+        return None
+    return month_index(month or 1, year), month_index(month or 12, year)
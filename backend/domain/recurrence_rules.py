@@ -0,0 +1,160 @@
+"""Regras de recorrência: frequência, término e ocorrências em uma janela.
+
+Frequências mensais (``mensal``, ``anual``, ``personalizado``) avançam
+``interval_months`` índices de mês por ocorrência; ``semanal`` e
+``quinzenal`` avançam 7 e 14 dias a partir de ``start_day``. Em ambos os casos a
+``k``-ésima ocorrência é ``início + k * passo``, então as ocorrências de uma
+janela são calculadas a partir dos seus limites, em O(janela), sem percorrer a
+série desde o início.
+
+Os lançamentos são mensais: cada mês com ocorrências recebe uma linha, com o
+valor da regra multiplicado pela quantidade de ocorrências no mês.
+"""
+from __future__ import annotations
+
+import calendar
+from dataclasses import dataclass, replace
+from datetime import date, timedelta
+from typing import List, Optional, Tuple
+
+from .entities import RECURRENCE_FREQUENCIES, Recurrence
+from .period import from_month_index, month_index
+
+# Passo em dias das frequências semanais; as demais usam ``interval_months``.
+FREQUENCY_DAYS = {"semanal": 7, "quinzenal": 14}
+DEFAULT_INTERVAL_MONTHS = {"mensal": 1, "anual": 12, "personalizado": 1}
+FREQUENCIES = RECURRENCE_FREQUENCIES
+
+
+def _ceil_div(a: int, b: int) -> int:
+    return -(-a // b)
+
+
+def _first_day(index: int) -> date:
+    month, year = from_month_index(index)
+    return date(year, month, 1)
+
+
+def _last_day(index: int) -> date:
+    month, year = from_month_index(index)
+    return date(year, month, calendar.monthrange(year, month)[1])
+
+
+def parse_frequency(raw_value: Optional[str]) -> str:
+    frequency = str(raw_value or "mensal").strip().lower()
+    if frequency not in FREQUENCIES:
+        raise ValueError(f"Frequência inválida. Use {', '.join(FREQUENCIES)}.")
+    return frequency
+
+
+def interval_for(frequency: str, interval_months: Optional[int] = None) -> int:
+    """Intervalo em meses da frequência; frequências semanais usam 1.
+
+    Sem ``interval_months`` vale o padrão da frequência; um intervalo informado
+    menor que 1 é rejeitado.
+    """
+    if interval_months is not None and interval_months < 1:
+        raise ValueError("Intervalo de meses deve ser maior que zero.")
+    if frequency in FREQUENCY_DAYS:
+        return 1
+    return DEFAULT_INTERVAL_MONTHS[frequency] if interval_months is None else interval_months
+
+
+def check_start_day(start_day: int) -> int:
+    """Valida o dia da primeira ocorrência (1 a 31; meses curtos usam o último dia)."""
+    if not 1 <= start_day <= 31:
+        raise ValueError("Dia inicial deve estar entre 1 e 31.")
+    return start_day
+
+
+@dataclass(frozen=True)
+class RecurrenceRule:
+    frequency: str
+    start_month: int
+    start_year: int
+    start_day: int = 1
+    interval_months: int = 1
+    occurrences: int = 12
+
+    def __post_init__(self) -> None:
+        check_start_day(self.start_day)
+        if self.interval_months < 1:
+            raise ValueError("Intervalo de meses deve ser maior que zero.")
+
+    @classmethod
+    def of(cls, recurrence: Recurrence) -> "RecurrenceRule":
+        return cls(
+            frequency=recurrence.frequency,
+            start_month=recurrence.start_month,
+            start_year=recurrence.start_year,
+            start_day=recurrence.start_day,
+            interval_months=recurrence.interval_months,
+            occurrences=recurrence.occurrences,
+        )
+
+    @property
+    def step_days(self) -> Optional[int]:
+        return FREQUENCY_DAYS.get(self.frequency)
+
+    @property
+    def start_index(self) -> int:
+        return month_index(self.start_month, self.start_year)
+
+    @property
+    def start_date(self) -> date:
+        last = calendar.monthrange(self.start_year, self.start_month)[1]
+        return date(self.start_year, self.start_month, min(self.start_day, last))
+
+    def nth_date(self, k: int) -> date:
+        """Data da ``k``-ésima ocorrência (a partir de 0)."""
+        if self.step_days:
+            return self.start_date + timedelta(days=k * self.step_days)
+        month, year = from_month_index(self.start_index + k * self.interval_months)
+        return date(year, month, min(self.start_day, calendar.monthrange(year, month)[1]))
+
+    def _window(self, first: Optional[date], last: Optional[date]) -> range:
+        """Ordinais ``k`` das ocorrências entre as datas ``first`` e ``last``."""
+        lo, hi = 0, self.occurrences
+        if self.step_days:
+            start = self.start_date.toordinal()
+            if first is not None:
+                lo = max(lo, _ceil_div(first.toordinal() - start, self.step_days))
+            if last is not None:
+                hi = min(hi, (last.toordinal() - start) // self.step_days + 1)
+        else:
+            if first is not None:
+                lo = max(lo, _ceil_div(month_index(first.month, first.year) - self.start_index, self.interval_months))
+            if last is not None:
+                hi = min(hi, (month_index(last.month, last.year) - self.start_index) // self.interval_months + 1)
+        return range(lo, max(lo, hi))
+
+    def dates(self, first: Optional[date] = None, last: Optional[date] = None) -> List[date]:
+        return [self.nth_date(k) for k in self._window(first, last)]
+
+    def month_counts(self, first: Optional[int] = None, last: Optional[int] = None) -> List[Tuple[int, int]]:
+        """``(índice de mês, ocorrências no mês)`` dos meses com ocorrências em ``[first, last]``."""
+        window = self._window(
+            None if first is None else _first_day(first),
+            None if last is None else _last_day(last),
+        )
+        if not self.step_days:
+            return [(self.start_index + k * self.interval_months, 1) for k in window]
+        counts: List[Tuple[int, int]] = []
+        for k in window:
+            day = self.nth_date(k)
+            index = month_index(day.month, day.year)
+            if counts and counts[-1][0] == index:
+                counts[-1] = (index, counts[-1][1] + 1)
+            else:
+                counts.append((index, 1))
+        return counts
+
+    def count_before(self, index: int) -> int:
+        """Quantidade de ocorrências antes do mês ``index``."""
+        return len(self._window(None, _first_day(index) - timedelta(days=1)))
+
+
+def occurrences_until(rule: RecurrenceRule, end_month: int, end_year: int) -> int:
+    """Quantidade de ocorrências do início até o fim do mês ``end_month/end_year`` (mínimo 1)."""
+    unbounded = replace(rule, occurrences=2**62)
+    return max(unbounded.count_before(month_index(end_month, end_year) + 1), 1)
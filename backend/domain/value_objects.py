@@ -1,5 +1,28 @@
 """Objetos de valor utilizados no domínio."""
-from dataclasses import dataclass
+from __future__ import annotations
+
+from dataclasses import dataclass, replace
+from decimal import ROUND_HALF_UP, Decimal
+from typing import List, Union
+
+from .period import from_month_index, month_index
+
+Amount = Union[int, float, str, Decimal]
+
+
+def to_cents(amount: Amount) -> int:
+    """Converte um valor em reais para centavos, arredondando metade para cima.
+
+    ``float`` passa por ``str`` para usar o valor digitado (``0.285`` vira 29
+    centavos, não os 28 de ``0.285 * 100``).
+    """
+    decimal = amount if isinstance(amount, Decimal) else Decimal(str(amount))
+    return int((decimal * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def from_cents(cents: int | None) -> float:
+    """Valor em reais de uma quantia em centavos (``None`` vira ``0.0``)."""
+    return (cents or 0) / 100
 
 
 @dataclass(frozen=True)
@@ -8,6 +31,56 @@ class Currency:
     symbol: str = "R$"
 
 
+@dataclass(frozen=True)
+class Money(Currency):
+    """Quantia em centavos inteiros; somas, subtrações e divisões não acumulam erro."""
+
+    cents: int = 0
+
+    @classmethod
+    def of(cls, amount: Amount) -> "Money":
+        return cls(cents=to_cents(amount))
+
+    @property
+    def amount(self) -> float:
+        return from_cents(self.cents)
+
+    def _same_currency(self, other: "Money") -> None:
+        if other.code != self.code:
+            raise ValueError(f"Moedas diferentes: {self.code} e {other.code}.")
+
+    def __add__(self, other: "Money") -> "Money":
+        self._same_currency(other)
+        return replace(self, cents=self.cents + other.cents)
+
+    def __sub__(self, other: "Money") -> "Money":
+        self._same_currency(other)
+        return replace(self, cents=self.cents - other.cents)
+
+    def __neg__(self) -> "Money":
+        return replace(self, cents=-self.cents)
+
+    def __mul__(self, factor: Amount) -> "Money":
+        decimal = factor if isinstance(factor, Decimal) else Decimal(str(factor))
+        cents = (self.cents * decimal).quantize(Decimal(1), rounding=ROUND_HALF_UP)
+        return replace(self, cents=int(cents))
+
+    __rmul__ = __mul__
+
+    def split(self, parts: int) -> List["Money"]:
+        """Divide em ``parts`` parcelas iguais; a última recebe a diferença de centavos."""
+        if parts <= 0:
+            raise ValueError("Número de parcelas deve ser maior que zero.")
+        base = int((Decimal(self.cents) / parts).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+        last = self.cents - base * (parts - 1)
+        return [replace(self, cents=base)] * (parts - 1) + [replace(self, cents=last)]
+
+    def __str__(self) -> str:
+        sign = "-" if self.cents < 0 else ""
+        reais, cents = divmod(abs(self.cents), 100)
+        return f"{sign}{self.symbol} {reais:,}".replace(",", ".") + f",{cents:02d}"
+
+
 @dataclass(frozen=True)
 class MonthlyCompetence:
     month: int
@@ -19,7 +92,17 @@ class MonthlyCompetence:
         if self.year <= 0:
             raise ValueError("Ano deve ser positivo.")
 
+    @property
+    def index(self) -> int:
+        return month_index(self.month, self.year)
+
+    @classmethod
+    def from_index(cls, index: int) -> "MonthlyCompetence":
+        month, year = from_month_index(index)
+        return cls(month=month, year=year)
+
+    def add(self, months: int) -> "MonthlyCompetence":
+        return MonthlyCompetence.from_index(self.index + months)
+
     def next(self) -> "MonthlyCompetence":
-        if self.month == 12:
-            return MonthlyCompetence(month=1, year=self.year + 1)
-        return MonthlyCompetence(month=self.month + 1, year=self.year)
+        return self.add(1)
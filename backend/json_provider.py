@@ -0,0 +1,69 @@
+"""Serialização JSON das respostas da API.
+
+As listagens devolvem milhares de entidades; o provedor padrão do Flask passa
+cada uma por ``dataclasses.asdict``, que copia tudo recursivamente. Aqui as
+entidades são serializadas direto dos campos: pelo orjson, quando instalado,
+ou pelo ``json`` da biblioteca padrão com um ``default`` raso.
+"""
+from __future__ import annotations
+
+import dataclasses
+from functools import cache
+from typing import Any, Dict, Tuple
+
+from flask import Response
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depende do ambiente
+    orjson = None
+
+
+@cache
+def _field_names(cls: type) -> Tuple[str, ...]:
+    return tuple(field.name for field in dataclasses.fields(cls))
+
+
+def entity_fields(entity: Any) -> Dict[str, Any]:
+    """Campos de uma entidade dataclass, sem a cópia recursiva de ``asdict``."""
+    return {name: getattr(entity, name) for name in _field_names(type(entity))}
+
+
+def _default(value: Any) -> Any:
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return entity_fields(value)
+    return DefaultJSONProvider.default(value)
+
+
+class EntityJSONProvider(DefaultJSONProvider):
+    """Provedor JSON do app: entidades sem ``asdict`` e orjson quando disponível.
+
+    Datas continuam no formato HTTP do Flask e as chaves saem ordenadas, como
+    no provedor padrão. Com ``use_orjson = False`` (ou sem o pacote) usa só a
+    biblioteca padrão; valores que o orjson não aceita (inteiros acima de 64
+    bits, por exemplo) também caem nela.
+    """
+
+    default = staticmethod(_default)
+    ensure_ascii = False
+    use_orjson = orjson is not None
+
+    def encode(self, obj: Any, *, pretty: bool = False) -> bytes:
+        if self.use_orjson and orjson is not None:
+            option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+            if self.sort_keys:
+                option |= orjson.OPT_SORT_KEYS
+            if pretty:
+                option |= orjson.OPT_INDENT_2
+            try:
+                return orjson.dumps(obj, default=self.default, option=option)
+            except orjson.JSONEncodeError:
+                pass
+        dump_args: Dict[str, Any] = {"indent": 2} if pretty else {"separators": (",", ":")}
+        return self.dumps(obj, **dump_args).encode("utf-8")
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        obj = self._prepare_response_obj(args, kwargs)
+        pretty = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(self.encode(obj, pretty=pretty) + b"\n", mimetype=self.mimetype)
@@ -1,9 +1,14 @@
 """Definições de interfaces de repositório para abstrair persistência de dados."""
 from abc import ABC, abstractmethod
-from typing import Generic, TypeVar, List, Optional
+from typing import Dict, Generic, Iterable, TypeVar, List, Optional, Set, Tuple
+
+from ..domain.entities import CardInvoice, Expense, Income, Installment, InstallmentPlan, Recurrence
 
 T = TypeVar('T')
 
+# (recurrence_id, year, month) de uma ocorrência de recorrência.
+OccurrenceKey = Tuple[int, int, int]
+
 class Repository(ABC, Generic[T]):
     @abstractmethod
     def add(self, entity: T) -> T:
@@ -24,3 +29,83 @@ class Repository(ABC, Generic[T]):
     @abstractmethod
     def delete(self, entity_id: int) -> None:
         ...
+
+
+class OccurrenceRepository(Repository[T]):
+    """Lançamentos (gastos ou entradas) que podem ser ocorrências de recorrências."""
+
+    @abstractmethod
+    def add_many(self, entities: List[T]) -> List[T]:
+        """Insere em lote, ignorando ocorrências já gravadas; retorna as criadas."""
+
+    @abstractmethod
+    def recurrence_keys(self, recurrence_id: Optional[int] = None) -> Set[OccurrenceKey]:
+        """Chaves das ocorrências gravadas (da recorrência, se informada)."""
+
+
+class ExpenseRepository(OccurrenceRepository[Expense]):
+    @abstractmethod
+    def period_totals(self, first: int, last: int, excluded_ids: Iterable[int] = ()) -> List[tuple]:
+        """``(month, year, category_id, recorrente, total)`` entre os índices de mês ``first`` e ``last``."""
+
+
+class IncomeRepository(OccurrenceRepository[Income]):
+    @abstractmethod
+    def period_totals(self, first: int, last: int) -> List[tuple]:
+        """``(month, year, recorrente, total)`` entre os índices de mês ``first`` e ``last``."""
+
+
+class RecurrenceRepository(Repository[Recurrence]):
+    @abstractmethod
+    def add_occurrences(self, expenses: Iterable[Expense], incomes: Iterable[Income]) -> Dict[str, int]:
+        """Grava ocorrências de gastos e entradas em uma transação; retorna as criadas por tabela."""
+
+    @abstractmethod
+    def skipped_keys(self, recurrence_ids: Iterable[int]) -> Set[OccurrenceKey]:
+        """Chaves das ocorrências removidas das recorrências ``recurrence_ids``."""
+
+
+class InstallmentRepository(Repository[Installment]):
+    """Parcelas gravadas, faturas e parcelamentos de cartão."""
+
+    @abstractmethod
+    def invoices(self, card_id: int, *, since: Optional[Tuple[int, int]] = None) -> List[CardInvoice]:
+        """Totais das parcelas gravadas por fatura do cartão, a partir de ``since`` (mês, ano)."""
+
+    @abstractmethod
+    def totals_by_period(self, status: str) -> List[Tuple[int, int, int, float]]:
+        """``(card_id, month, year, total)`` das parcelas gravadas com ``status``."""
+
+    @abstractmethod
+    def set_invoice_status(
+        self,
+        card_id: int,
+        month: int,
+        year: int,
+        status: str,
+        plan_installments: Iterable[Installment] = (),
+    ) -> int:
+        """Altera o status das parcelas da fatura, gravando ``plan_installments``; retorna quantas foram alteradas."""
+
+    @abstractmethod
+    def add_plan(self, plan: InstallmentPlan) -> InstallmentPlan:
+        ...
+
+    @abstractmethod
+    def list_plans(
+        self,
+        *,
+        card_id: Optional[int] = None,
+        expense_id: Optional[int] = None,
+        since: Optional[int] = None,
+        until: Optional[int] = None,
+    ) -> List[InstallmentPlan]:
+        """Parcelamentos com parcelas entre os índices de mês ``since`` e ``until``, se informados."""
+
+    @abstractmethod
+    def plan_overrides(self, card_id: Optional[int] = None) -> Set[Tuple[int, int]]:
+        """``(plan_id, installment_number)`` das parcelas gravadas dos parcelamentos."""
+
+    @abstractmethod
+    def get_plan_installment(self, plan_id: int, installment_number: int) -> Optional[Installment]:
+        """Parcela gravada ``installment_number`` do parcelamento, se houver."""
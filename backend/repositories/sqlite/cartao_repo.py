@@ -1,15 +1,18 @@
 """Implementação SQLite para o repositório de cartões."""
-import sqlite3
 from typing import Optional, List
 
 from ...domain.entities import Card
+from ...domain.value_objects import from_cents, to_cents
 from ..base import Repository
+from .change_log import ensure_change_tracking
+from .connection import ThreadConnections, ThreadLocalConnection
+from .money import ensure_cents_columns
 
 
-class SQLiteCardRepository(Repository[Card]):
+class SQLiteCardRepository(ThreadLocalConnection, Repository[Card]):
     def __init__(self, db_path: str = "saveyourmoney.db"):
         self.db_path = db_path
-        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.connections = ThreadConnections(self.db_path)
         self._init_db()
 
     def _init_db(self) -> None:
@@ -19,7 +22,7 @@ class SQLiteCardRepository(Repository[Card]):
             CREATE TABLE IF NOT EXISTS cards (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 name TEXT NOT NULL,
-                limit_value REAL NOT NULL,
+                limit_value INTEGER NOT NULL,
                 bank TEXT,
                 brand TEXT,
                 closing_day INTEGER NOT NULL,
@@ -27,13 +30,15 @@ class SQLiteCardRepository(Repository[Card]):
             )
             """
         )
+        ensure_cents_columns(cur, "cards", ("limit_value",))
+        ensure_change_tracking(cur, "cards")
         self.conn.commit()
 
     def add(self, entity: Card) -> Card:
         cur = self.conn.cursor()
         cur.execute(
             "INSERT INTO cards (name, limit_value, bank, brand, closing_day, due_day) VALUES (?,?,?,?,?,?)",
-            (entity.name, entity.limit, entity.bank, entity.brand, entity.closing_day, entity.due_day),
+            (entity.name, to_cents(entity.limit), entity.bank, entity.brand, entity.closing_day, entity.due_day),
         )
         entity.id = cur.lastrowid
         self.conn.commit()
@@ -50,7 +55,7 @@ class SQLiteCardRepository(Repository[Card]):
             return Card(
                 id=row[0],
                 name=row[1],
-                limit=row[2],
+                limit=from_cents(row[2]),
                 bank=row[3],
                 brand=row[4],
                 closing_day=row[5],
@@ -66,7 +71,7 @@ class SQLiteCardRepository(Repository[Card]):
             Card(
                 id=r[0],
                 name=r[1],
-                limit=r[2],
+                limit=from_cents(r[2]),
                 bank=r[3],
                 brand=r[4],
                 closing_day=r[5],
@@ -81,7 +86,7 @@ class SQLiteCardRepository(Repository[Card]):
         cur = self.conn.cursor()
         cur.execute(
             "UPDATE cards SET name=?, limit_value=?, bank=?, brand=?, closing_day=?, due_day=? WHERE id=?",
-            (entity.name, entity.limit, entity.bank, entity.brand, entity.closing_day, entity.due_day, entity.id),
+            (entity.name, to_cents(entity.limit), entity.bank, entity.brand, entity.closing_day, entity.due_day, entity.id),
         )
         self.conn.commit()
         return entity
@@ -91,9 +96,6 @@ class SQLiteCardRepository(Repository[Card]):
         cur.execute("DELETE FROM cards WHERE id=?", (entity_id,))
         self.conn.commit()
 
-    def close(self) -> None:
-        self.conn.close()
-
     def __del__(self) -> None:
         try:
             self.close()
@@ -1,15 +1,16 @@
 """Implementação SQLite para o repositório de categorias."""
-import sqlite3
 from typing import Optional, List
 
 from ...domain.entities import Category
 from ..base import Repository
+from .change_log import ensure_change_tracking
+from .connection import ThreadConnections, ThreadLocalConnection
 
 
-class SQLiteCategoryRepository(Repository[Category]):
+class SQLiteCategoryRepository(ThreadLocalConnection, Repository[Category]):
     def __init__(self, db_path: str = "saveyourmoney.db"):
         self.db_path = db_path
-        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.connections = ThreadConnections(self.db_path)
         self._init_db()
 
     def _init_db(self) -> None:
@@ -23,6 +24,7 @@ class SQLiteCategoryRepository(Repository[Category]):
             )
             """
         )
+        ensure_change_tracking(cur, "categories")
         self.conn.commit()
 
     def add(self, entity: Category) -> Category:
@@ -65,9 +67,6 @@ class SQLiteCategoryRepository(Repository[Category]):
         cur.execute("DELETE FROM categories WHERE id=?", (entity_id,))
         self.conn.commit()
 
-    def close(self) -> None:
-        self.conn.close()
-
     def __del__(self) -> None:
         try:
             self.close()
@@ -0,0 +1,51 @@
+"""Registro de alterações compartilhado pelos repositórios SQLite.
+
+Cada tabela de domínio recebe gatilhos que gravam em ``change_log`` o id da
+linha inserida, alterada ou removida, com uma sequência monotônica. Os backups
+incrementais usam essa sequência para exportar apenas o que mudou.
+"""
+import sqlite3
+
+TRACKED_OPERATIONS = (
+    ("ai", "INSERT", "NEW"),
+    ("au", "UPDATE", "NEW"),
+    ("ad", "DELETE", "OLD"),
+)
+
+
+def ensure_change_tracking(cur: sqlite3.Cursor, table_name: str) -> None:
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS change_log (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT NOT NULL,
+            row_id INTEGER NOT NULL,
+            operation TEXT NOT NULL
+        )
+        """
+    )
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_change_log_table_seq ON change_log(table_name, seq)")
+    for suffix, event, ref in TRACKED_OPERATIONS:
+        cur.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table_name}_{suffix}_log
+            AFTER {event} ON {table_name}
+            BEGIN
+                INSERT INTO change_log (table_name, row_id, operation)
+                VALUES ('{table_name}', {ref}.id, '{event[0]}');
+            END
+            """
+        )
+
+
+def current_change_seq(conn: sqlite3.Connection) -> int:
+    """Retorna a última sequência emitida, mesmo que o log já tenha sido podado."""
+    try:
+        row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name='change_log'").fetchone()
+    except sqlite3.OperationalError:
+        return 0
+    return int(row[0]) if row else 0
+
+
+def prune_change_log(conn: sqlite3.Connection, up_to_seq: int) -> None:
+    conn.execute("DELETE FROM change_log WHERE seq <= ?", (up_to_seq,))
@@ -0,0 +1,63 @@
+"""Conexões SQLite por thread para os repositórios.
+
+Com o servidor multithread, cada thread usa a sua própria conexão: transações
+de threads diferentes não se misturam e o SQLite serializa as escritas com o
+seu bloqueio de arquivo, esperando até ``BUSY_TIMEOUT_SECONDS`` por ele.
+"""
+import sqlite3
+import threading
+from typing import Dict, Tuple
+
+BUSY_TIMEOUT_SECONDS = 30.0
+
+
+class ThreadConnections:
+    """Abre uma conexão por thread para ``db_path`` e fecha as de threads encerradas."""
+
+    def __init__(self, db_path: str, timeout: float = BUSY_TIMEOUT_SECONDS) -> None:
+        self.db_path = db_path
+        self.timeout = timeout
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections: Dict[int, Tuple[threading.Thread, sqlite3.Connection]] = {}
+
+    def get(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # check_same_thread=False só para que ``close`` possa fechar conexões de outras threads.
+            conn = sqlite3.connect(self.db_path, timeout=self.timeout, check_same_thread=False)
+            self._local.conn = conn
+            with self._lock:
+                self._close_finished()
+                self._connections[id(conn)] = (threading.current_thread(), conn)
+        return conn
+
+    def _close_finished(self) -> None:
+        for key, (thread, conn) in list(self._connections.items()):
+            if not thread.is_alive():
+                conn.close()
+                del self._connections[key]
+
+    def open_count(self) -> int:
+        with self._lock:
+            return len(self._connections)
+
+    def close(self) -> None:
+        with self._lock:
+            for _, conn in self._connections.values():
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+
+class ThreadLocalConnection:
+    """Base dos repositórios SQLite: ``self.conn`` é a conexão da thread atual."""
+
+    connections: ThreadConnections
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        return self.connections.get()
+
+    def close(self) -> None:
+        self.connections.close()
@@ -1,15 +1,38 @@
 """Implementação SQLite para o repositório de entradas."""
+import json
 import sqlite3
-from typing import Optional, List
+from typing import Optional, List, Set, Tuple
 
 from ...domain.entities import Income
-from ..base import Repository
+from ...domain.period import from_month_index
+from ...domain.value_objects import from_cents, to_cents
+from ..base import IncomeRepository
+from .change_log import ensure_change_tracking
+from .connection import ThreadConnections, ThreadLocalConnection
+from .money import ensure_cents_columns
+from .occurrences import ensure_unique_occurrences, insert_occurrences
 
 
-class SQLiteIncomeRepository(Repository[Income]):
+INSERT_COLUMNS = ("name", "value", "month", "year", "confirmed", "recurrence_id", "notes")
+
+
+def occurrence_row(entity: Income) -> tuple:
+    """Valores de ``INSERT_COLUMNS`` para gravar o lançamento."""
+    return (
+        entity.name,
+        to_cents(entity.value),
+        entity.month,
+        entity.year,
+        int(entity.confirmed),
+        entity.recurrence_id,
+        entity.notes,
+    )
+
+
+class SQLiteIncomeRepository(ThreadLocalConnection, IncomeRepository):
     def __init__(self, db_path: str = "saveyourmoney.db"):
         self.db_path = db_path
-        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.connections = ThreadConnections(self.db_path)
         self._init_db()
 
     def _init_db(self) -> None:
@@ -19,40 +42,94 @@ class SQLiteIncomeRepository(Repository[Income]):
             CREATE TABLE IF NOT EXISTS incomes (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 name TEXT NOT NULL,
-                value REAL NOT NULL,
+                value INTEGER NOT NULL,
                 month INTEGER NOT NULL,
                 year INTEGER NOT NULL,
                 confirmed INTEGER NOT NULL,
-                notes TEXT
+                notes TEXT,
+                recurrence_id INTEGER
             )
             """
         )
+        cur.execute("PRAGMA table_info(incomes)")
+        columns = {row[1] for row in cur.fetchall()}
+        if "recurrence_id" not in columns:
+            cur.execute("ALTER TABLE incomes ADD COLUMN recurrence_id INTEGER")
+        ensure_cents_columns(cur, "incomes", ("value",))
         cur.execute("CREATE INDEX IF NOT EXISTS idx_incomes_month_year ON incomes(month, year)")
+        ensure_unique_occurrences(cur, "incomes")
+        ensure_change_tracking(cur, "incomes")
         self.conn.commit()
 
     def add(self, entity: Income) -> Income:
         cur = self.conn.cursor()
         cur.execute(
-            "INSERT INTO incomes (name, value, month, year, confirmed, notes) VALUES (?,?,?,?,?,?)",
-            (entity.name, entity.value, entity.month, entity.year, int(entity.confirmed), entity.notes),
+            "INSERT INTO incomes (name, value, month, year, confirmed, recurrence_id, notes) VALUES (?,?,?,?,?,?,?)",
+            (
+                entity.name,
+                to_cents(entity.value),
+                entity.month,
+                entity.year,
+                int(entity.confirmed),
+                entity.recurrence_id,
+                entity.notes,
+            ),
         )
         entity.id = cur.lastrowid
         self.conn.commit()
         return entity
 
+    def add_many(self, entities: List[Income]) -> List[Income]:
+        """Insere vários entradas em uma transação, ignorando ocorrências já existentes."""
+        cur = self.conn.cursor()
+        try:
+            cur.execute("BEGIN IMMEDIATE")
+            created = insert_occurrences(cur, "incomes", INSERT_COLUMNS, map(occurrence_row, entities))
+            rows = self._select("WHERE id IN (SELECT value FROM json_each(?)) ORDER BY id", (json.dumps(created),))
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        return rows
+
+    def recurrence_keys(self, recurrence_id: Optional[int] = None) -> Set[Tuple[int, int, int]]:
+        """Retorna ``(recurrence_id, year, month)`` das ocorrências gravadas."""
+        cur = self.conn.cursor()
+        if recurrence_id is None:
+            cur.execute("SELECT recurrence_id, year, month FROM incomes WHERE recurrence_id IS NOT NULL")
+        else:
+            cur.execute("SELECT recurrence_id, year, month FROM incomes WHERE recurrence_id=?", (recurrence_id,))
+        return {tuple(row) for row in cur.fetchall()}
+
+    def period_totals(self, first: int, last: int) -> List[tuple]:
+        """``(month, year, recorrente, total)`` entre os índices de mês ``first`` e ``last``, em um único GROUP BY."""
+        _, first_year = from_month_index(first)
+        _, last_year = from_month_index(last)
+        rows = self.conn.execute(
+            "SELECT month, year, recurrence_id IS NOT NULL, SUM(value) FROM incomes "
+            "WHERE year BETWEEN ? AND ? AND year * 12 + month - 1 BETWEEN ? AND ? "
+            "GROUP BY year, month, recurrence_id IS NOT NULL",
+            (first_year, last_year, first, last),
+        ).fetchall()
+        return [(*row[:-2], bool(row[-2]), from_cents(row[-1])) for row in rows]
+
     def get(self, entity_id: int) -> Optional[Income]:
         cur = self.conn.cursor()
-        cur.execute("SELECT id, name, value, month, year, confirmed, notes FROM incomes WHERE id=?", (entity_id,))
+        cur.execute(
+            "SELECT id, name, value, month, year, confirmed, recurrence_id, notes FROM incomes WHERE id=?",
+            (entity_id,),
+        )
         row = cur.fetchone()
         if row:
             return Income(
                 id=row[0],
                 name=row[1],
-                value=row[2],
+                value=from_cents(row[2]),
                 month=row[3],
                 year=row[4],
                 confirmed=bool(row[5]),
-                notes=row[6],
+                recurrence_id=row[6],
+                notes=row[7],
             )
         return None
 
@@ -60,8 +137,6 @@ class SQLiteIncomeRepository(Repository[Income]):
         return self.list_filtered()
 
     def list_filtered(self, *, month: Optional[int] = None, year: Optional[int] = None) -> List[Income]:
-        cur = self.conn.cursor()
-        query = "SELECT id, name, value, month, year, confirmed, notes FROM incomes"
         conditions = []
         params = []
         if month is not None:
@@ -70,19 +145,24 @@ class SQLiteIncomeRepository(Repository[Income]):
         if year is not None:
             conditions.append("year=?")
             params.append(year)
-        if conditions:
-            query = f"{query} WHERE {' AND '.join(conditions)}"
-        cur.execute(query, tuple(params))
+        clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        return self._select(clause, tuple(params))
+
+    def _select(self, clause: str, params: tuple) -> List[Income]:
+        cur = self.conn.cursor()
+        query = "SELECT id, name, value, month, year, confirmed, recurrence_id, notes FROM incomes"
+        cur.execute(f"{query} {clause}", params)
         rows = cur.fetchall()
         return [
             Income(
                 id=r[0],
                 name=r[1],
-                value=r[2],
+                value=from_cents(r[2]),
                 month=r[3],
                 year=r[4],
                 confirmed=bool(r[5]),
-                notes=r[6],
+                recurrence_id=r[6],
+                notes=r[7],
             )
             for r in rows
         ]
@@ -91,10 +171,24 @@ class SQLiteIncomeRepository(Repository[Income]):
         if entity.id is None:
             raise ValueError("Entidade precisa ter ID para ser atualizada.")
         cur = self.conn.cursor()
-        cur.execute(
-            "UPDATE incomes SET name=?, value=?, month=?, year=?, confirmed=?, notes=? WHERE id=?",
-            (entity.name, entity.value, entity.month, entity.year, int(entity.confirmed), entity.notes, entity.id),
-        )
+        try:
+            cur.execute(
+                "UPDATE incomes SET name=?, value=?, month=?, year=?, confirmed=?, recurrence_id=?, notes=? WHERE id=?",
+                (
+                    entity.name,
+                    to_cents(entity.value),
+                    entity.month,
+                    entity.year,
+                    int(entity.confirmed),
+                    entity.recurrence_id,
+                    entity.notes,
+                    entity.id,
+                ),
+            )
+        except sqlite3.IntegrityError:
+            # Outra ocorrência da mesma recorrência já ocupa o mês; libera a transação.
+            self.conn.rollback()
+            raise
         self.conn.commit()
         return entity
 
@@ -103,9 +197,6 @@ class SQLiteIncomeRepository(Repository[Income]):
         cur.execute("DELETE FROM incomes WHERE id=?", (entity_id,))
         self.conn.commit()
 
-    def close(self) -> None:
-        self.conn.close()
-
     def __del__(self) -> None:
         try:
             self.close()
@@ -1,13 +1,38 @@
 """Implementação SQLite para o repositório de gastos."""
+import json
 import sqlite3
-from typing import Optional, List
+from typing import Iterable, Optional, List, Set, Tuple
 from ...domain.entities import Expense
-from ..base import Repository
+from ...domain.period import from_month_index
+from ...domain.value_objects import from_cents, to_cents
+from ..base import ExpenseRepository
+from .change_log import ensure_change_tracking
+from .connection import ThreadConnections, ThreadLocalConnection
+from .money import ensure_cents_columns
+from .occurrences import ensure_unique_occurrences, insert_occurrences
 
-class SQLiteExpenseRepository(Repository[Expense]):
+
+INSERT_COLUMNS = ("name", "value", "month", "year", "category_id", "recurrence_id", "payment_method", "notes")
+
+
+def occurrence_row(entity: Expense) -> tuple:
+    """Valores de ``INSERT_COLUMNS`` para gravar o lançamento."""
+    return (
+        entity.name,
+        to_cents(entity.value),
+        entity.month,
+        entity.year,
+        entity.category_id,
+        entity.recurrence_id,
+        entity.payment_method,
+        entity.notes,
+    )
+
+
+class SQLiteExpenseRepository(ThreadLocalConnection, ExpenseRepository):
     def __init__(self, db_path: str = "saveyourmoney.db"):
         self.db_path = db_path
-        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.connections = ThreadConnections(self.db_path)
         self._init_db()
 
     def _init_db(self) -> None:
@@ -17,7 +42,7 @@ class SQLiteExpenseRepository(Repository[Expense]):
             CREATE TABLE IF NOT EXISTS expenses (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 name TEXT NOT NULL,
-                value REAL NOT NULL,
+                value INTEGER NOT NULL,
                 month INTEGER NOT NULL,
                 year INTEGER NOT NULL,
                 category_id INTEGER,
@@ -31,8 +56,11 @@ class SQLiteExpenseRepository(Repository[Expense]):
         columns = {row[1] for row in cur.fetchall()}
         if "recurrence_id" not in columns:
             cur.execute("ALTER TABLE expenses ADD COLUMN recurrence_id INTEGER")
+        ensure_cents_columns(cur, "expenses", ("value",))
         cur.execute("CREATE INDEX IF NOT EXISTS idx_expenses_month_year ON expenses(month, year)")
         cur.execute("CREATE INDEX IF NOT EXISTS idx_expenses_category_month_year ON expenses(category_id, month, year)")
+        ensure_unique_occurrences(cur, "expenses")
+        ensure_change_tracking(cur, "expenses")
         self.conn.commit()
 
     def add(self, entity: Expense) -> Expense:
@@ -41,7 +69,7 @@ class SQLiteExpenseRepository(Repository[Expense]):
             "INSERT INTO expenses (name, value, month, year, category_id, recurrence_id, payment_method, notes) VALUES (?,?,?,?,?,?,?,?)",
             (
                 entity.name,
-                entity.value,
+                to_cents(entity.value),
                 entity.month,
                 entity.year,
                 entity.category_id,
@@ -54,6 +82,44 @@ class SQLiteExpenseRepository(Repository[Expense]):
         self.conn.commit()
         return entity
 
+    def add_many(self, entities: List[Expense]) -> List[Expense]:
+        """Insere vários gastos em uma transação, ignorando ocorrências já existentes."""
+        cur = self.conn.cursor()
+        try:
+            cur.execute("BEGIN IMMEDIATE")
+            created = insert_occurrences(cur, "expenses", INSERT_COLUMNS, map(occurrence_row, entities))
+            rows = self._select("WHERE id IN (SELECT value FROM json_each(?)) ORDER BY id", (json.dumps(created),))
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        return rows
+
+    def recurrence_keys(self, recurrence_id: Optional[int] = None) -> Set[Tuple[int, int, int]]:
+        """Retorna ``(recurrence_id, year, month)`` das ocorrências gravadas."""
+        cur = self.conn.cursor()
+        if recurrence_id is None:
+            cur.execute("SELECT recurrence_id, year, month FROM expenses WHERE recurrence_id IS NOT NULL")
+        else:
+            cur.execute("SELECT recurrence_id, year, month FROM expenses WHERE recurrence_id=?", (recurrence_id,))
+        return {tuple(row) for row in cur.fetchall()}
+
+    def period_totals(self, first: int, last: int, excluded_ids: Iterable[int] = ()) -> List[tuple]:
+        """``(month, year, category_id, recorrente, total)`` entre os índices de mês ``first`` e ``last``, em um único GROUP BY.
+
+        Gastos em ``excluded_ids`` ficam de fora da soma.
+        """
+        _, first_year = from_month_index(first)
+        _, last_year = from_month_index(last)
+        rows = self.conn.execute(
+            "SELECT month, year, category_id, recurrence_id IS NOT NULL, SUM(value) FROM expenses "
+            "WHERE year BETWEEN ? AND ? AND year * 12 + month - 1 BETWEEN ? AND ? "
+            "AND id NOT IN (SELECT value FROM json_each(?)) "
+            "GROUP BY year, month, category_id, recurrence_id IS NOT NULL",
+            (first_year, last_year, first, last, json.dumps(sorted(excluded_ids))),
+        ).fetchall()
+        return [(*row[:-2], bool(row[-2]), from_cents(row[-1])) for row in rows]
+
     def get(self, entity_id: int) -> Optional[Expense]:
         cur = self.conn.cursor()
         cur.execute(
@@ -65,7 +131,7 @@ class SQLiteExpenseRepository(Repository[Expense]):
             return Expense(
                 id=row[0],
                 name=row[1],
-                value=row[2],
+                value=from_cents(row[2]),
                 month=row[3],
                 year=row[4],
                 category_id=row[5],
@@ -85,8 +151,6 @@ class SQLiteExpenseRepository(Repository[Expense]):
         year: Optional[int] = None,
         category_id: Optional[int] = None,
     ) -> List[Expense]:
-        cur = self.conn.cursor()
-        query = "SELECT id, name, value, month, year, category_id, recurrence_id, payment_method, notes FROM expenses"
         conditions = []
         params = []
         if month is not None:
@@ -98,15 +162,19 @@ class SQLiteExpenseRepository(Repository[Expense]):
         if category_id is not None:
             conditions.append("category_id=?")
             params.append(category_id)
-        if conditions:
-            query = f"{query} WHERE {' AND '.join(conditions)}"
-        cur.execute(query, tuple(params))
+        clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        return self._select(clause, tuple(params))
+
+    def _select(self, clause: str, params: tuple) -> List[Expense]:
+        cur = self.conn.cursor()
+        query = "SELECT id, name, value, month, year, category_id, recurrence_id, payment_method, notes FROM expenses"
+        cur.execute(f"{query} {clause}", params)
         rows = cur.fetchall()
         return [
             Expense(
                 id=r[0],
                 name=r[1],
-                value=r[2],
+                value=from_cents(r[2]),
                 month=r[3],
                 year=r[4],
                 category_id=r[5],
@@ -121,20 +189,25 @@ class SQLiteExpenseRepository(Repository[Expense]):
         if entity.id is None:
             raise ValueError("Entidade precisa ter ID para ser atualizada.")
         cur = self.conn.cursor()
-        cur.execute(
-            "UPDATE expenses SET name=?, value=?, month=?, year=?, category_id=?, recurrence_id=?, payment_method=?, notes=? WHERE id=?",
-            (
-                entity.name,
-                entity.value,
-                entity.month,
-                entity.year,
-                entity.category_id,
-                entity.recurrence_id,
-                entity.payment_method,
-                entity.notes,
-                entity.id,
-            ),
-        )
+        try:
+            cur.execute(
+                "UPDATE expenses SET name=?, value=?, month=?, year=?, category_id=?, recurrence_id=?, payment_method=?, notes=? WHERE id=?",
+                (
+                    entity.name,
+                    to_cents(entity.value),
+                    entity.month,
+                    entity.year,
+                    entity.category_id,
+                    entity.recurrence_id,
+                    entity.payment_method,
+                    entity.notes,
+                    entity.id,
+                ),
+            )
+        except sqlite3.IntegrityError:
+            # Outra ocorrência da mesma recorrência já ocupa o mês; libera a transação.
+            self.conn.rollback()
+            raise
         self.conn.commit()
         return entity
 
@@ -143,9 +216,6 @@ class SQLiteExpenseRepository(Repository[Expense]):
         cur.execute("DELETE FROM expenses WHERE id=?", (entity_id,))
         self.conn.commit()
 
-    def close(self) -> None:
-        self.conn.close()
-
     def __del__(self) -> None:
         try:
             self.close()
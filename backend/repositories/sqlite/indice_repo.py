@@ -0,0 +1,117 @@
+"""Implementação SQLite para o repositório de índices de preços."""
+import sqlite3
+from typing import Dict, Iterable, List, Optional
+
+from ...domain.entities import PriceIndex
+from ...domain.period import month_index
+from ..base import Repository
+from .change_log import ensure_change_tracking
+from .connection import ThreadConnections, ThreadLocalConnection
+
+PRICE_INDEX_COLUMNS = "id, series, month, year, value"
+PRICE_INDEX_TABLE = """
+    CREATE TABLE IF NOT EXISTS {table} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        series TEXT NOT NULL,
+        month INTEGER NOT NULL,
+        year INTEGER NOT NULL,
+        value REAL NOT NULL CHECK (value > 0),
+        UNIQUE (series, year, month)
+    )
+"""
+
+
+def _ensure_value_check(cur: sqlite3.Cursor) -> None:
+    """Recria tabelas antigas sem o ``CHECK (value > 0)``, descartando índices não positivos."""
+    (sql,) = cur.execute("SELECT sql FROM sqlite_master WHERE type='table' AND name='price_indices'").fetchone()
+    if "CHECK" in sql:
+        return
+    cur.execute("SAVEPOINT price_index_check")
+    cur.execute("DROP TABLE IF EXISTS price_indices__check")
+    cur.execute(PRICE_INDEX_TABLE.format(table="price_indices__check"))
+    cur.execute(
+        f"INSERT INTO price_indices__check ({PRICE_INDEX_COLUMNS}) "
+        f"SELECT {PRICE_INDEX_COLUMNS} FROM price_indices WHERE value > 0"
+    )
+    cur.execute("DROP TABLE price_indices")
+    cur.execute("ALTER TABLE price_indices__check RENAME TO price_indices")
+    cur.execute("RELEASE price_index_check")
+
+
+def _price_index(row: tuple) -> PriceIndex:
+    return PriceIndex(id=row[0], series=row[1], month=row[2], year=row[3], value=row[4])
+
+
+class SQLitePriceIndexRepository(ThreadLocalConnection, Repository[PriceIndex]):
+    def __init__(self, db_path: str = "saveyourmoney.db"):
+        self.db_path = db_path
+        self.connections = ThreadConnections(self.db_path)
+        self._init_db()
+
+    def _init_db(self) -> None:
+        cur = self.conn.cursor()
+        cur.execute(PRICE_INDEX_TABLE.format(table="price_indices"))
+        _ensure_value_check(cur)
+        ensure_change_tracking(cur, "price_indices")
+        self.conn.commit()
+
+    def add(self, entity: PriceIndex) -> PriceIndex:
+        cur = self.conn.cursor()
+        cur.execute(
+            "INSERT INTO price_indices (series, month, year, value) VALUES (?,?,?,?)",
+            (entity.series, entity.month, entity.year, entity.value),
+        )
+        entity.id = cur.lastrowid
+        self.conn.commit()
+        return entity
+
+    def upsert_many(self, entities: Iterable[PriceIndex]) -> int:
+        """Grava vários índices em uma transação, substituindo o valor de competências já existentes."""
+        rows = [(entity.series, entity.month, entity.year, entity.value) for entity in entities]
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO price_indices (series, month, year, value) VALUES (?,?,?,?) "
+                "ON CONFLICT (series, year, month) DO UPDATE SET value=excluded.value",
+                rows,
+            )
+        return len(rows)
+
+    def get(self, entity_id: int) -> Optional[PriceIndex]:
+        row = self.conn.execute(f"SELECT {PRICE_INDEX_COLUMNS} FROM price_indices WHERE id=?", (entity_id,)).fetchone()
+        return _price_index(row) if row else None
+
+    def list(self) -> List[PriceIndex]:
+        return self.list_filtered()
+
+    def list_filtered(self, *, series: Optional[str] = None) -> List[PriceIndex]:
+        clause, params = ("WHERE series=?", (series,)) if series is not None else ("", ())
+        rows = self.conn.execute(
+            f"SELECT {PRICE_INDEX_COLUMNS} FROM price_indices {clause} ORDER BY series, year, month",
+            params,
+        ).fetchall()
+        return [_price_index(row) for row in rows]
+
+    def values_by_period(self, series: str) -> Dict[int, float]:
+        """Valores da série por índice de mês."""
+        rows = self.conn.execute("SELECT month, year, value FROM price_indices WHERE series=?", (series,)).fetchall()
+        return {month_index(month, year): value for month, year, value in rows}
+
+    def update(self, entity: PriceIndex) -> PriceIndex:
+        if entity.id is None:
+            raise ValueError("Entidade precisa ter ID para ser atualizada.")
+        self.conn.execute(
+            "UPDATE price_indices SET series=?, month=?, year=?, value=? WHERE id=?",
+            (entity.series, entity.month, entity.year, entity.value, entity.id),
+        )
+        self.conn.commit()
+        return entity
+
+    def delete(self, entity_id: int) -> None:
+        self.conn.execute("DELETE FROM price_indices WHERE id=?", (entity_id,))
+        self.conn.commit()
+
+    def __del__(self) -> None:
+        try:
+            self.close()
+        except Exception:
+            pass
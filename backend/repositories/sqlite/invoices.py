@@ -0,0 +1,64 @@
+"""Totais de fatura por cartão e ciclo, mantidos por gatilhos.
+
+``card_invoices`` guarda a soma e a quantidade de parcelas de cada fatura
+``(card_id, year, month)``. Os gatilhos de ``installments`` atualizam a linha
+afetada a cada inserção, alteração ou remoção, inclusive nas restaurações de
+backup, então consultar faturas não precisa reagrupar as parcelas.
+"""
+import sqlite3
+
+_ADD = """
+    INSERT INTO card_invoices (card_id, year, month, total, installments)
+    VALUES (NEW.card_id, NEW.year, NEW.month, NEW.value, 1)
+    ON CONFLICT(card_id, year, month) DO UPDATE SET
+        total = total + excluded.total,
+        installments = installments + 1;
+"""
+
+_REMOVE = """
+    UPDATE card_invoices
+    SET total = total - OLD.value, installments = installments - 1
+    WHERE card_id = OLD.card_id AND year = OLD.year AND month = OLD.month;
+    DELETE FROM card_invoices
+    WHERE card_id = OLD.card_id AND year = OLD.year AND month = OLD.month AND installments <= 0;
+"""
+
+
+def ensure_invoice_totals(cur: sqlite3.Cursor) -> None:
+    declared = {row[1]: row[2].upper() for row in cur.execute("PRAGMA table_info(card_invoices)")}
+    if declared.get("total") == "REAL":
+        # Totais em reais, anteriores aos centavos: a tabela é recalculada das parcelas.
+        for suffix in ("ai", "ad", "au"):
+            cur.execute(f"DROP TRIGGER IF EXISTS trg_installments_{suffix}_invoice")
+        cur.execute("DROP TABLE card_invoices")
+        declared = {}
+    exists = bool(declared)
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS card_invoices (
+            card_id INTEGER NOT NULL,
+            year INTEGER NOT NULL,
+            month INTEGER NOT NULL,
+            total INTEGER NOT NULL DEFAULT 0,
+            installments INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (card_id, year, month)
+        ) WITHOUT ROWID
+        """
+    )
+    cur.execute(f"CREATE TRIGGER IF NOT EXISTS trg_installments_ai_invoice AFTER INSERT ON installments BEGIN {_ADD} END")
+    cur.execute(f"CREATE TRIGGER IF NOT EXISTS trg_installments_ad_invoice AFTER DELETE ON installments BEGIN {_REMOVE} END")
+    cur.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_installments_au_invoice
+        AFTER UPDATE OF card_id, year, month, value ON installments
+        BEGIN {_REMOVE} {_ADD} END
+        """
+    )
+    if not exists:
+        # Bancos anteriores à tabela: calcula os totais uma única vez a partir das parcelas.
+        cur.execute(
+            """
+            INSERT INTO card_invoices (card_id, year, month, total, installments)
+            SELECT card_id, year, month, SUM(value), COUNT(*) FROM installments GROUP BY card_id, year, month
+            """
+        )
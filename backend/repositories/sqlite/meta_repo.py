@@ -1,15 +1,18 @@
 """Implementação SQLite para o repositório de metas."""
-import sqlite3
 from typing import Optional, List
 
 from ...domain.entities import Goal
+from ...domain.value_objects import from_cents, to_cents
 from ..base import Repository
+from .change_log import ensure_change_tracking
+from .connection import ThreadConnections, ThreadLocalConnection
+from .money import ensure_cents_columns
 
 
-class SQLiteGoalRepository(Repository[Goal]):
+class SQLiteGoalRepository(ThreadLocalConnection, Repository[Goal]):
     def __init__(self, db_path: str = "saveyourmoney.db"):
         self.db_path = db_path
-        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.connections = ThreadConnections(self.db_path)
         self._init_db()
 
     def _init_db(self) -> None:
@@ -19,21 +22,23 @@ class SQLiteGoalRepository(Repository[Goal]):
             CREATE TABLE IF NOT EXISTS goals (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 name TEXT NOT NULL,
-                limit_value REAL NOT NULL,
+                limit_value INTEGER NOT NULL,
                 month INTEGER NOT NULL,
                 year INTEGER NOT NULL,
                 category_id INTEGER
             )
             """
         )
+        ensure_cents_columns(cur, "goals", ("limit_value",))
         cur.execute("CREATE INDEX IF NOT EXISTS idx_goals_month_year_category ON goals(month, year, category_id)")
+        ensure_change_tracking(cur, "goals")
         self.conn.commit()
 
     def add(self, entity: Goal) -> Goal:
         cur = self.conn.cursor()
         cur.execute(
             "INSERT INTO goals (name, limit_value, month, year, category_id) VALUES (?,?,?,?,?)",
-            (entity.name, entity.limit_value, entity.month, entity.year, entity.category_id),
+            (entity.name, to_cents(entity.limit_value), entity.month, entity.year, entity.category_id),
         )
         entity.id = cur.lastrowid
         self.conn.commit()
@@ -47,7 +52,7 @@ class SQLiteGoalRepository(Repository[Goal]):
             return Goal(
                 id=row[0],
                 name=row[1],
-                limit_value=row[2],
+                limit_value=from_cents(row[2]),
                 month=row[3],
                 year=row[4],
                 category_id=row[5],
@@ -85,7 +90,7 @@ class SQLiteGoalRepository(Repository[Goal]):
             Goal(
                 id=r[0],
                 name=r[1],
-                limit_value=r[2],
+                limit_value=from_cents(r[2]),
                 month=r[3],
                 year=r[4],
                 category_id=r[5],
@@ -99,7 +104,7 @@ class SQLiteGoalRepository(Repository[Goal]):
         cur = self.conn.cursor()
         cur.execute(
             "UPDATE goals SET name=?, limit_value=?, month=?, year=?, category_id=? WHERE id=?",
-            (entity.name, entity.limit_value, entity.month, entity.year, entity.category_id, entity.id),
+            (entity.name, to_cents(entity.limit_value), entity.month, entity.year, entity.category_id, entity.id),
         )
         self.conn.commit()
         return entity
@@ -109,9 +114,6 @@ class SQLiteGoalRepository(Repository[Goal]):
         cur.execute("DELETE FROM goals WHERE id=?", (entity_id,))
         self.conn.commit()
 
-    def close(self) -> None:
-        self.conn.close()
-
     def __del__(self) -> None:
         try:
             self.close()
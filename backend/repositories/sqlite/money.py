@@ -0,0 +1,43 @@
+"""Colunas de valores monetários gravadas em centavos inteiros.
+
+Os repositórios convertem na fronteira com ``to_cents``/``from_cents``: as
+entidades e o JSON continuam com valores decimais em reais, e os ``SUM`` do
+banco somam inteiros sem erro de arredondamento.
+"""
+import re
+import sqlite3
+from typing import Iterable
+
+# Expressão SQL que converte uma coluna em reais (REAL) para centavos.
+CENTS_EXPRESSION = "CAST(ROUND({column} * 100) AS INTEGER)"
+
+
+def ensure_cents_columns(cur: sqlite3.Cursor, table_name: str, columns: Iterable[str]) -> None:
+    """Migra colunas ``REAL`` em reais para ``INTEGER`` em centavos.
+
+    O SQLite não altera o tipo de uma coluna, então a tabela é recriada com a
+    mesma definição e as linhas são copiadas convertidas. Índices e gatilhos
+    da tabela antiga são descartados com ela: chame antes de criá-los.
+    """
+    declared = {row[1]: row[2].upper() for row in cur.execute(f"PRAGMA table_info({table_name})")}
+    pending = [column for column in columns if declared.get(column) == "REAL"]
+    if not pending:
+        return
+    (sql,) = cur.execute(
+        "SELECT sql FROM sqlite_master WHERE type='table' AND name=?", (table_name,)
+    ).fetchone()
+    staging = f"{table_name}__cents"
+    sql = re.sub(rf"^CREATE TABLE\s+\"?{table_name}\"?", f"CREATE TABLE {staging}", sql)
+    for column in pending:
+        sql = re.sub(rf"\b{column}\s+REAL\b", f"{column} INTEGER", sql)
+    names = ", ".join(declared)
+    select = ", ".join(
+        CENTS_EXPRESSION.format(column=column) if column in pending else column for column in declared
+    )
+    cur.execute("SAVEPOINT cents_migration")
+    cur.execute(f"DROP TABLE IF EXISTS {staging}")
+    cur.execute(sql)
+    cur.execute(f"INSERT INTO {staging} ({names}) SELECT {select} FROM {table_name}")
+    cur.execute(f"DROP TABLE {table_name}")
+    cur.execute(f"ALTER TABLE {staging} RENAME TO {table_name}")
+    cur.execute("RELEASE cents_migration")
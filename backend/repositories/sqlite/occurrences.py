@@ -0,0 +1,74 @@
+"""Unicidade das ocorrências geradas por recorrências.
+
+Gastos e entradas de uma recorrência são identificados por
+``(recurrence_id, year, month)``; o índice único parcial garante que gerar as
+ocorrências de novo nunca duplica linhas.
+"""
+import logging
+import sqlite3
+from typing import Iterable, List, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+def ensure_unique_occurrences(cur: sqlite3.Cursor, table_name: str) -> None:
+    """Cria o índice único das ocorrências, migrando bancos antigos uma única vez.
+
+    Bancos anteriores ao índice podem ter ocorrências duplicadas por aplicações
+    repetidas. Na migração, mantém a primeira de cada competência e copia as
+    demais para ``{table_name}_duplicadas`` antes de removê-las; depois que o
+    índice existe, nada mais é apagado.
+    """
+    index_name = f"idx_{table_name}_recurrence_period"
+    exists = cur.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='index' AND name=?", (index_name,)
+    ).fetchone()
+    if exists:
+        return
+    duplicates = f"""
+        SELECT * FROM {table_name}
+        WHERE recurrence_id IS NOT NULL
+          AND id NOT IN (
+              SELECT MIN(id) FROM {table_name}
+              WHERE recurrence_id IS NOT NULL
+              GROUP BY recurrence_id, year, month
+          )
+    """
+    removed = cur.execute(f"SELECT id FROM ({duplicates})").fetchall()
+    if removed:
+        backup_table = f"{table_name}_duplicadas"
+        cur.execute(f"CREATE TABLE IF NOT EXISTS {backup_table} AS SELECT * FROM {table_name} WHERE 0")
+        cur.execute(f"INSERT INTO {backup_table} {duplicates}")
+        cur.execute(f"DELETE FROM {table_name} WHERE id IN (SELECT id FROM ({duplicates}))")
+        logger.warning(
+            "%d ocorrência(s) duplicada(s) removida(s) de %s e copiada(s) para %s: ids %s",
+            len(removed),
+            table_name,
+            backup_table,
+            ", ".join(str(row[0]) for row in removed),
+        )
+    cur.execute(f"DROP INDEX IF EXISTS idx_{table_name}_recurrence")
+    cur.execute(
+        f"""
+        CREATE UNIQUE INDEX {index_name}
+        ON {table_name}(recurrence_id, year, month)
+        WHERE recurrence_id IS NOT NULL
+        """
+    )
+
+
+def insert_occurrences(cur: sqlite3.Cursor, table_name: str, columns: Sequence[str], rows: Iterable[tuple]) -> List[int]:
+    """Insere as linhas com um único ``executemany`` na transação aberta e retorna os ids criados.
+
+    Só o conflito de competência ``(recurrence_id, year, month)`` é ignorado;
+    qualquer outra restrição violada continua gerando erro. Os ids são
+    ``AUTOINCREMENT`` e a transação de escrita está aberta, então as linhas
+    criadas são as de id maior que o último antes da inserção.
+    """
+    (last_id,) = cur.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table_name}").fetchone()
+    cur.executemany(
+        f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)}) "
+        "ON CONFLICT(recurrence_id, year, month) WHERE recurrence_id IS NOT NULL DO NOTHING",
+        rows,
+    )
+    return [row[0] for row in cur.execute(f"SELECT id FROM {table_name} WHERE id > ? ORDER BY id", (last_id,))]
@@ -1,15 +1,55 @@
 """Implementação SQLite para o repositório de parcelas."""
-import sqlite3
-from typing import Optional, List
+from typing import Iterable, Optional, List, Set, Tuple
 
-from ...domain.entities import Installment
-from ..base import Repository
+from ...domain.entities import CardInvoice, Installment, InstallmentPlan
+from ...domain.value_objects import from_cents, to_cents
+from ..base import InstallmentRepository
+from .change_log import ensure_change_tracking
+from .connection import ThreadConnections, ThreadLocalConnection
+from .money import ensure_cents_columns
+from .invoices import ensure_invoice_totals
 
+INSTALLMENT_COLUMNS = (
+    "id, card_id, expense_name, installment_number, total_installments, value, month, year, status, plan_id"
+)
+PLAN_COLUMNS = "id, card_id, expense_name, total_value, installments, first_month, first_year, expense_id, rounding"
+# Índice de mês da última parcela de um parcelamento.
+PLAN_LAST_INDEX = "(first_year * 12 + first_month - 1 + installments - 1)"
 
-class SQLiteInstallmentRepository(Repository[Installment]):
+
+def _installment(row: tuple) -> Installment:
+    return Installment(
+        id=row[0],
+        card_id=row[1],
+        expense_name=row[2],
+        installment_number=row[3],
+        total_installments=row[4],
+        value=from_cents(row[5]),
+        month=row[6],
+        year=row[7],
+        status=row[8],
+        plan_id=row[9],
+    )
+
+
+def _plan(row: tuple) -> InstallmentPlan:
+    return InstallmentPlan(
+        id=row[0],
+        card_id=row[1],
+        expense_name=row[2],
+        total_value=from_cents(row[3]),
+        installments=row[4],
+        first_month=row[5],
+        first_year=row[6],
+        expense_id=row[7],
+        rounding=row[8],
+    )
+
+
+class SQLiteInstallmentRepository(ThreadLocalConnection, InstallmentRepository):
     def __init__(self, db_path: str = "saveyourmoney.db"):
         self.db_path = db_path
-        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.connections = ThreadConnections(self.db_path)
         self._init_db()
 
     def _init_db(self) -> None:
@@ -22,29 +62,70 @@ class SQLiteInstallmentRepository(Repository[Installment]):
                 expense_name TEXT NOT NULL,
                 installment_number INTEGER NOT NULL,
                 total_installments INTEGER NOT NULL,
-                value REAL NOT NULL,
+                value INTEGER NOT NULL,
                 month INTEGER NOT NULL,
                 year INTEGER NOT NULL,
-                status TEXT NOT NULL
+                status TEXT NOT NULL,
+                plan_id INTEGER
+            )
+            """
+        )
+        cur.execute("PRAGMA table_info(installments)")
+        columns = {row[1] for row in cur.fetchall()}
+        if "plan_id" not in columns:
+            cur.execute("ALTER TABLE installments ADD COLUMN plan_id INTEGER")
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS installment_plans (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                card_id INTEGER NOT NULL,
+                expense_name TEXT NOT NULL,
+                total_value INTEGER NOT NULL,
+                installments INTEGER NOT NULL,
+                first_month INTEGER NOT NULL,
+                first_year INTEGER NOT NULL,
+                expense_id INTEGER,
+                rounding TEXT NOT NULL DEFAULT 'last'
             )
             """
         )
+        ensure_cents_columns(cur, "installments", ("value",))
+        ensure_cents_columns(cur, "installment_plans", ("total_value",))
         cur.execute("CREATE INDEX IF NOT EXISTS idx_installments_card_month_year ON installments(card_id, month, year)")
+        # Cobre a soma das parcelas pendentes por cartão e mês sem ler a tabela.
+        cur.execute(
+            "CREATE INDEX IF NOT EXISTS idx_installments_status_card_period "
+            "ON installments(status, card_id, year, month, value)"
+        )
+        # Cada parcela de um parcelamento tem no máximo uma linha gravada.
+        cur.execute(
+            """
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_installments_plan_number
+            ON installments(plan_id, installment_number)
+            WHERE plan_id IS NOT NULL
+            """
+        )
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_installment_plans_card ON installment_plans(card_id)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_installment_plans_expense ON installment_plans(expense_id)")
+        ensure_change_tracking(cur, "installments")
+        ensure_change_tracking(cur, "installment_plans")
+        ensure_invoice_totals(cur)
         self.conn.commit()
 
     def add(self, entity: Installment) -> Installment:
         cur = self.conn.cursor()
         cur.execute(
-            "INSERT INTO installments (card_id, expense_name, installment_number, total_installments, value, month, year, status) VALUES (?,?,?,?,?,?,?,?)",
+            "INSERT INTO installments (card_id, expense_name, installment_number, total_installments, value, month, year, status, plan_id) VALUES (?,?,?,?,?,?,?,?,?)",
             (
                 entity.card_id,
                 entity.expense_name,
                 entity.installment_number,
                 entity.total_installments,
-                entity.value,
+                to_cents(entity.value),
                 entity.month,
                 entity.year,
                 entity.status,
+                entity.plan_id,
             ),
         )
         entity.id = cur.lastrowid
@@ -52,25 +133,8 @@ class SQLiteInstallmentRepository(Repository[Installment]):
         return entity
 
     def get(self, entity_id: int) -> Optional[Installment]:
-        cur = self.conn.cursor()
-        cur.execute(
-            "SELECT id, card_id, expense_name, installment_number, total_installments, value, month, year, status FROM installments WHERE id=?",
-            (entity_id,),
-        )
-        row = cur.fetchone()
-        if row:
-            return Installment(
-                id=row[0],
-                card_id=row[1],
-                expense_name=row[2],
-                installment_number=row[3],
-                total_installments=row[4],
-                value=row[5],
-                month=row[6],
-                year=row[7],
-                status=row[8],
-            )
-        return None
+        row = self.conn.execute(f"SELECT {INSTALLMENT_COLUMNS} FROM installments WHERE id=?", (entity_id,)).fetchone()
+        return _installment(row) if row else None
 
     def list(self) -> List[Installment]:
         return self.list_filtered()
@@ -82,11 +146,7 @@ class SQLiteInstallmentRepository(Repository[Installment]):
         month: Optional[int] = None,
         year: Optional[int] = None,
     ) -> List[Installment]:
-        cur = self.conn.cursor()
-        query = (
-            "SELECT id, card_id, expense_name, installment_number, total_installments, value, month, year, status "
-            "FROM installments"
-        )
+        query = f"SELECT {INSTALLMENT_COLUMNS} FROM installments"
         conditions = []
         params = []
         if card_id is not None:
@@ -100,38 +160,108 @@ class SQLiteInstallmentRepository(Repository[Installment]):
             params.append(year)
         if conditions:
             query = f"{query} WHERE {' AND '.join(conditions)}"
-        cur.execute(query, tuple(params))
-        rows = cur.fetchall()
+        return [_installment(row) for row in self.conn.execute(query, tuple(params)).fetchall()]
+
+    def invoices(
+        self,
+        card_id: int,
+        *,
+        since: Optional[tuple[int, int]] = None,
+    ) -> List[CardInvoice]:
+        """Totais das parcelas gravadas por fatura do cartão, a partir de ``since`` (mês, ano) se informado."""
+        query = "SELECT card_id, month, year, total, installments FROM card_invoices WHERE card_id=?"
+        params: list = [card_id]
+        if since is not None:
+            month, year = since
+            query += " AND (year > ? OR (year = ? AND month >= ?))"
+            params.extend([year, year, month])
+        rows = self.conn.execute(f"{query} ORDER BY year, month", tuple(params)).fetchall()
         return [
-            Installment(
-                id=r[0],
-                card_id=r[1],
-                expense_name=r[2],
-                installment_number=r[3],
-                total_installments=r[4],
-                value=r[5],
-                month=r[6],
-                year=r[7],
-                status=r[8],
-            )
+            CardInvoice(card_id=r[0], month=r[1], year=r[2], total=from_cents(r[3]), installments=r[4])
             for r in rows
         ]
 
+    def totals_by_period(self, status: str) -> List[tuple[int, int, int, float]]:
+        """``(card_id, month, year, total)`` das parcelas com ``status``, em um único GROUP BY."""
+        rows = self.conn.execute(
+            "SELECT card_id, month, year, SUM(value) FROM installments WHERE status=? "
+            "GROUP BY card_id, year, month",
+            (status,),
+        ).fetchall()
+        return [(row[0], row[1], row[2], from_cents(row[3])) for row in rows]
+
+    def set_invoice_status(
+        self,
+        card_id: int,
+        month: int,
+        year: int,
+        status: str,
+        plan_installments: Iterable[Installment] = (),
+    ) -> int:
+        """Altera o status de todas as parcelas de uma fatura em uma transação.
+
+        As parcelas gravadas mudam em um único UPDATE; ``plan_installments`` são
+        as parcelas calculadas de parcelamentos na fatura, gravadas com o novo
+        status.
+        """
+        cur = self.conn.cursor()
+        try:
+            cur.execute(
+                "UPDATE installments SET status=? WHERE card_id=? AND year=? AND month=? AND status<>?",
+                (status, card_id, year, month, status),
+            )
+            updated = cur.rowcount
+            cur.executemany(
+                "INSERT OR IGNORE INTO installments (card_id, expense_name, installment_number, total_installments, value, month, year, status, plan_id) VALUES (?,?,?,?,?,?,?,?,?)",
+                [
+                    (
+                        item.card_id,
+                        item.expense_name,
+                        item.installment_number,
+                        item.total_installments,
+                        to_cents(item.value),
+                        item.month,
+                        item.year,
+                        status,
+                        item.plan_id,
+                    )
+                    for item in plan_installments
+                ],
+            )
+            updated += max(cur.rowcount, 0)
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        return updated
+
+    def set_status(self, ids: Iterable[int], status: str) -> int:
+        """Altera o status das parcelas ``ids`` em uma transação; retorna quantas foram encontradas."""
+        cur = self.conn.cursor()
+        try:
+            cur.executemany("UPDATE installments SET status=? WHERE id=?", [(status, item) for item in ids])
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        return max(cur.rowcount, 0)
+
     def update(self, entity: Installment) -> Installment:
         if entity.id is None:
             raise ValueError("Entidade precisa ter ID para ser atualizada.")
         cur = self.conn.cursor()
         cur.execute(
-            "UPDATE installments SET card_id=?, expense_name=?, installment_number=?, total_installments=?, value=?, month=?, year=?, status=? WHERE id=?",
+            "UPDATE installments SET card_id=?, expense_name=?, installment_number=?, total_installments=?, value=?, month=?, year=?, status=?, plan_id=? WHERE id=?",
             (
                 entity.card_id,
                 entity.expense_name,
                 entity.installment_number,
                 entity.total_installments,
-                entity.value,
+                to_cents(entity.value),
                 entity.month,
                 entity.year,
                 entity.status,
+                entity.plan_id,
                 entity.id,
             ),
         )
@@ -143,8 +273,155 @@ class SQLiteInstallmentRepository(Repository[Installment]):
         cur.execute("DELETE FROM installments WHERE id=?", (entity_id,))
         self.conn.commit()
 
-    def close(self) -> None:
-        self.conn.close()
+    def add_plan(self, plan: InstallmentPlan) -> InstallmentPlan:
+        cur = self.conn.cursor()
+        cur.execute(
+            "INSERT INTO installment_plans (card_id, expense_name, total_value, installments, first_month, first_year, expense_id, rounding) VALUES (?,?,?,?,?,?,?,?)",
+            (
+                plan.card_id,
+                plan.expense_name,
+                to_cents(plan.total_value),
+                plan.installments,
+                plan.first_month,
+                plan.first_year,
+                plan.expense_id,
+                plan.rounding,
+            ),
+        )
+        plan.id = cur.lastrowid
+        self.conn.commit()
+        return plan
+
+    def get_plan(self, plan_id: int) -> Optional[InstallmentPlan]:
+        row = self.conn.execute(f"SELECT {PLAN_COLUMNS} FROM installment_plans WHERE id=?", (plan_id,)).fetchone()
+        return _plan(row) if row else None
+
+    def list_plans(
+        self,
+        *,
+        card_id: Optional[int] = None,
+        expense_id: Optional[int] = None,
+        since: Optional[int] = None,
+        until: Optional[int] = None,
+    ) -> List[InstallmentPlan]:
+        """Parcelamentos com parcelas entre os índices de mês ``since`` e ``until``, se informados."""
+        conditions = []
+        params: list = []
+        if card_id is not None:
+            conditions.append("card_id=?")
+            params.append(card_id)
+        if expense_id is not None:
+            conditions.append("expense_id=?")
+            params.append(expense_id)
+        if since is not None:
+            conditions.append(f"{PLAN_LAST_INDEX} >= ?")
+            params.append(since)
+        if until is not None:
+            conditions.append("first_year * 12 + first_month - 1 <= ?")
+            params.append(until)
+        clause = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        rows = self.conn.execute(f"SELECT {PLAN_COLUMNS} FROM installment_plans{clause} ORDER BY id", tuple(params))
+        return [_plan(row) for row in rows.fetchall()]
+
+    def plan_overrides(self, card_id: Optional[int] = None) -> Set[Tuple[int, int]]:
+        """``(plan_id, installment_number)`` das parcelas gravadas dos parcelamentos (do cartão, se informado)."""
+        query = "SELECT plan_id, installment_number FROM installments WHERE plan_id IS NOT NULL"
+        params: tuple = ()
+        if card_id is not None:
+            query += " AND plan_id IN (SELECT id FROM installment_plans WHERE card_id=?)"
+            params = (card_id,)
+        return {(row[0], row[1]) for row in self.conn.execute(query, params).fetchall()}
+
+    def update_plan(self, plan: InstallmentPlan) -> InstallmentPlan:
+        """Atualiza o parcelamento, as parcelas gravadas dele e o gasto de origem em uma transação.
+
+        A quantidade não pode ficar abaixo da maior parcela gravada (paga ou
+        editada): ela ficaria fora do parcelamento.
+        """
+        if plan.id is None:
+            raise ValueError("Entidade precisa ter ID para ser atualizada.")
+        cur = self.conn.cursor()
+        try:
+            cur.execute("BEGIN IMMEDIATE")
+            (highest,) = cur.execute(
+                "SELECT COALESCE(MAX(installment_number), 0) FROM installments WHERE plan_id=?", (plan.id,)
+            ).fetchone()
+            if plan.installments < highest:
+                raise ValueError(f"A parcela {highest} já está gravada; o parcelamento precisa ter ao menos {highest} parcelas.")
+            cur.execute(
+                "UPDATE installment_plans SET card_id=?, expense_name=?, total_value=?, installments=?, first_month=?, first_year=?, expense_id=?, rounding=? WHERE id=?",
+                (
+                    plan.card_id,
+                    plan.expense_name,
+                    to_cents(plan.total_value),
+                    plan.installments,
+                    plan.first_month,
+                    plan.first_year,
+                    plan.expense_id,
+                    plan.rounding,
+                    plan.id,
+                ),
+            )
+            cur.execute(
+                "UPDATE installments SET expense_name=?, total_installments=? WHERE plan_id=?",
+                (plan.expense_name, plan.installments, plan.id),
+            )
+            if plan.expense_id is not None:
+                cur.execute("UPDATE expenses SET value=? WHERE id=?", (to_cents(plan.total_value), plan.expense_id))
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        return plan
+
+    def get_plan_installment(self, plan_id: int, installment_number: int) -> Optional[Installment]:
+        """Parcela gravada ``installment_number`` do parcelamento, se houver."""
+        row = self.conn.execute(
+            f"SELECT {INSTALLMENT_COLUMNS} FROM installments WHERE plan_id=? AND installment_number=?",
+            (plan_id, installment_number),
+        ).fetchone()
+        return _installment(row) if row else None
+
+    def save_plan_installment(self, entity: Installment) -> Installment:
+        """Grava (ou substitui) a parcela ``installment_number`` do parcelamento ``plan_id``."""
+        row = self.conn.execute(
+            "INSERT INTO installments (card_id, expense_name, installment_number, total_installments, value, month, year, status, plan_id) "
+            "VALUES (?,?,?,?,?,?,?,?,?) "
+            "ON CONFLICT(plan_id, installment_number) WHERE plan_id IS NOT NULL "
+            "DO UPDATE SET value=excluded.value, status=excluded.status RETURNING id",
+            (
+                entity.card_id,
+                entity.expense_name,
+                entity.installment_number,
+                entity.total_installments,
+                to_cents(entity.value),
+                entity.month,
+                entity.year,
+                entity.status,
+                entity.plan_id,
+            ),
+        ).fetchone()
+        entity.id = row[0]
+        self.conn.commit()
+        return entity
+
+    def count_plan_installments(self, plan_id: int, status: str) -> int:
+        """Quantidade de parcelas gravadas do parcelamento com ``status``."""
+        (count,) = self.conn.execute(
+            "SELECT COUNT(*) FROM installments WHERE plan_id=? AND status=?", (plan_id, status)
+        ).fetchone()
+        return count
+
+    def delete_plan(self, plan_id: int) -> None:
+        """Cancela o parcelamento e remove as parcelas gravadas dele."""
+        cur = self.conn.cursor()
+        try:
+            cur.execute("DELETE FROM installments WHERE plan_id=?", (plan_id,))
+            cur.execute("DELETE FROM installment_plans WHERE id=?", (plan_id,))
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
 
     def __del__(self) -> None:
         try:
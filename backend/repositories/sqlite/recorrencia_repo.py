@@ -1,15 +1,54 @@
 """Implementação SQLite para o repositório de recorrências."""
+from dataclasses import replace
 import sqlite3
-from typing import Optional, List
+from typing import Dict, Iterable, Optional, List, Set, Tuple, Union
 
-from ...domain.entities import Recurrence
-from ..base import Repository
+from ...domain.entities import Expense, Income, Recurrence, SkippedOccurrence
+from ...domain.period import from_month_index, month_index
+from ...domain.value_objects import from_cents, to_cents
+from ...domain.recurrence_rules import RecurrenceRule
+from ..base import RecurrenceRepository
+from .change_log import ensure_change_tracking
+from .connection import ThreadConnections, ThreadLocalConnection
+from .money import ensure_cents_columns
+from . import entrada_repo, gasto_repo
+from .occurrences import insert_occurrences
 
 
-class SQLiteRecurrenceRepository(Repository[Recurrence]):
+# Ocorrências de uma recorrência a partir de um mês; usa o índice (recurrence_id, year, month).
+FROM_PERIOD = "recurrence_id=? AND year>=? AND (year>? OR month>=?)"
+# Tabela, colunas e valores de gravação dos lançamentos de cada tipo de recorrência.
+OCCURRENCE_TABLES = {
+    "expense": ("expenses", gasto_repo.INSERT_COLUMNS, gasto_repo.occurrence_row),
+    "income": ("incomes", entrada_repo.INSERT_COLUMNS, entrada_repo.occurrence_row),
+}
+RECURRENCE_COLUMNS = "id, kind, name, value, start_month, start_year, interval_months, occurrences, category_id, payment_method, confirmed, notes, virtual, frequency, start_day"
+
+
+def _recurrence(row: tuple) -> Recurrence:
+    return Recurrence(
+        id=row[0],
+        kind=row[1],
+        name=row[2],
+        value=from_cents(row[3]),
+        start_month=row[4],
+        start_year=row[5],
+        interval_months=row[6],
+        occurrences=row[7],
+        category_id=row[8],
+        payment_method=row[9],
+        confirmed=None if row[10] is None else bool(row[10]),
+        notes=row[11],
+        virtual=bool(row[12]),
+        frequency=row[13],
+        start_day=row[14],
+    )
+
+
+class SQLiteRecurrenceRepository(ThreadLocalConnection, RecurrenceRepository):
     def __init__(self, db_path: str = "saveyourmoney.db"):
         self.db_path = db_path
-        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.connections = ThreadConnections(self.db_path)
         self._init_db()
 
     def _init_db(self) -> None:
@@ -20,7 +59,7 @@ class SQLiteRecurrenceRepository(Repository[Recurrence]):
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 kind TEXT NOT NULL,
                 name TEXT NOT NULL,
-                value REAL NOT NULL,
+                value INTEGER NOT NULL,
                 start_month INTEGER NOT NULL,
                 start_year INTEGER NOT NULL,
                 interval_months INTEGER NOT NULL,
@@ -28,21 +67,51 @@ class SQLiteRecurrenceRepository(Repository[Recurrence]):
                 category_id INTEGER,
                 payment_method TEXT,
                 confirmed INTEGER,
-                notes TEXT
+                notes TEXT,
+                virtual INTEGER NOT NULL DEFAULT 0,
+                frequency TEXT NOT NULL DEFAULT 'mensal',
+                start_day INTEGER NOT NULL DEFAULT 1
             )
             """
         )
+        cur.execute("PRAGMA table_info(recurrences)")
+        columns = {row[1] for row in cur.fetchall()}
+        if "virtual" not in columns:
+            cur.execute("ALTER TABLE recurrences ADD COLUMN virtual INTEGER NOT NULL DEFAULT 0")
+        if "frequency" not in columns:
+            cur.execute("ALTER TABLE recurrences ADD COLUMN frequency TEXT NOT NULL DEFAULT 'mensal'")
+        if "start_day" not in columns:
+            cur.execute("ALTER TABLE recurrences ADD COLUMN start_day INTEGER NOT NULL DEFAULT 1")
+        ensure_cents_columns(cur, "recurrences", ("value",))
         cur.execute("CREATE INDEX IF NOT EXISTS idx_recurrences_kind_start ON recurrences(kind, start_year, start_month)")
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS skipped_occurrences (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                recurrence_id INTEGER NOT NULL,
+                month INTEGER NOT NULL,
+                year INTEGER NOT NULL,
+                UNIQUE (recurrence_id, year, month)
+            )
+            """
+        )
+        ensure_change_tracking(cur, "recurrences")
+        ensure_change_tracking(cur, "skipped_occurrences")
         self.conn.commit()
 
     def add(self, entity: Recurrence) -> Recurrence:
         cur = self.conn.cursor()
+        self._insert(cur, entity)
+        self.conn.commit()
+        return entity
+
+    def _insert(self, cur: sqlite3.Cursor, entity: Recurrence) -> None:
         cur.execute(
-            "INSERT INTO recurrences (kind, name, value, start_month, start_year, interval_months, occurrences, category_id, payment_method, confirmed, notes) VALUES (?,?,?,?,?,?,?,?,?,?,?)",
+            "INSERT INTO recurrences (kind, name, value, start_month, start_year, interval_months, occurrences, category_id, payment_method, confirmed, notes, virtual, frequency, start_day) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?)",
             (
                 entity.kind,
                 entity.name,
-                entity.value,
+                to_cents(entity.value),
                 entity.start_month,
                 entity.start_year,
                 entity.interval_months,
@@ -51,70 +120,39 @@ class SQLiteRecurrenceRepository(Repository[Recurrence]):
                 entity.payment_method,
                 None if entity.confirmed is None else int(entity.confirmed),
                 entity.notes,
+                int(entity.virtual),
+                entity.frequency,
+                entity.start_day,
             ),
         )
         entity.id = cur.lastrowid
-        self.conn.commit()
-        return entity
 
     def get(self, entity_id: int) -> Optional[Recurrence]:
         cur = self.conn.cursor()
-        cur.execute(
-            "SELECT id, kind, name, value, start_month, start_year, interval_months, occurrences, category_id, payment_method, confirmed, notes FROM recurrences WHERE id=?",
-            (entity_id,),
-        )
+        cur.execute(f"SELECT {RECURRENCE_COLUMNS} FROM recurrences WHERE id=?", (entity_id,))
         row = cur.fetchone()
-        if row:
-            return Recurrence(
-                id=row[0],
-                kind=row[1],
-                name=row[2],
-                value=row[3],
-                start_month=row[4],
-                start_year=row[5],
-                interval_months=row[6],
-                occurrences=row[7],
-                category_id=row[8],
-                payment_method=row[9],
-                confirmed=None if row[10] is None else bool(row[10]),
-                notes=row[11],
-            )
-        return None
+        return _recurrence(row) if row else None
 
     def list(self) -> List[Recurrence]:
         cur = self.conn.cursor()
-        cur.execute(
-            "SELECT id, kind, name, value, start_month, start_year, interval_months, occurrences, category_id, payment_method, confirmed, notes FROM recurrences"
-        )
-        rows = cur.fetchall()
-        return [
-            Recurrence(
-                id=r[0],
-                kind=r[1],
-                name=r[2],
-                value=r[3],
-                start_month=r[4],
-                start_year=r[5],
-                interval_months=r[6],
-                occurrences=r[7],
-                category_id=r[8],
-                payment_method=r[9],
-                confirmed=None if r[10] is None else bool(r[10]),
-                notes=r[11],
-            )
-            for r in rows
-        ]
+        cur.execute(f"SELECT {RECURRENCE_COLUMNS} FROM recurrences")
+        return [_recurrence(row) for row in cur.fetchall()]
 
     def update(self, entity: Recurrence) -> Recurrence:
         if entity.id is None:
             raise ValueError("Entidade precisa ter ID para ser atualizada.")
         cur = self.conn.cursor()
+        self._update(cur, entity)
+        self.conn.commit()
+        return entity
+
+    def _update(self, cur: sqlite3.Cursor, entity: Recurrence) -> None:
         cur.execute(
-            "UPDATE recurrences SET kind=?, name=?, value=?, start_month=?, start_year=?, interval_months=?, occurrences=?, category_id=?, payment_method=?, confirmed=?, notes=? WHERE id=?",
+            "UPDATE recurrences SET kind=?, name=?, value=?, start_month=?, start_year=?, interval_months=?, occurrences=?, category_id=?, payment_method=?, confirmed=?, notes=?, virtual=?, frequency=?, start_day=? WHERE id=?",
             (
                 entity.kind,
                 entity.name,
-                entity.value,
+                to_cents(entity.value),
                 entity.start_month,
                 entity.start_year,
                 entity.interval_months,
@@ -123,19 +161,192 @@ class SQLiteRecurrenceRepository(Repository[Recurrence]):
                 entity.payment_method,
                 None if entity.confirmed is None else int(entity.confirmed),
                 entity.notes,
+                int(entity.virtual),
+                entity.frequency,
+                entity.start_day,
                 entity.id,
             ),
         )
-        self.conn.commit()
-        return entity
 
     def delete(self, entity_id: int) -> None:
         cur = self.conn.cursor()
         cur.execute("DELETE FROM recurrences WHERE id=?", (entity_id,))
+        cur.execute("DELETE FROM skipped_occurrences WHERE recurrence_id=?", (entity_id,))
+        self.conn.commit()
+
+    def update_from(
+        self,
+        entity: Recurrence,
+        month: int,
+        year: int,
+        occurrence: Optional[Union[Expense, Income]] = None,
+    ) -> Tuple[Recurrence, int]:
+        """Aplica os dados da regra às ocorrências a partir de ``month/year``.
+
+        Atualiza a regra e reescreve as linhas gravadas do período em diante com
+        um único UPDATE indexado, na mesma transação; em regras semanais o valor
+        de cada mês é a quantidade de ocorrências nele vezes o valor da regra.
+        ``occurrence``, se informado, é o lançamento editado, gravado na mesma
+        transação antes da propagação. Uma regra virtual com
+        ocorrências anteriores ao período é dividida: a original termina antes
+        dele e uma nova regra, com os dados editados, assume as ocorrências,
+        edições e remoções seguintes. Retorna a regra resultante e o número de
+        linhas reescritas.
+        """
+        if entity.id is None:
+            raise ValueError("Entidade precisa ter ID para ser atualizada.")
+        table, assignments, values = self._occurrence_fields(entity)
+        cur = self.conn.cursor()
+        try:
+            if occurrence is not None:
+                _, columns, row = OCCURRENCE_TABLES[entity.kind]
+                cur.execute(
+                    f"UPDATE {table} SET {', '.join(f'{column}=?' for column in columns)} WHERE id=?",
+                    (*row(occurrence), occurrence.id),
+                )
+            recurrence_id = entity.id
+            before = self._occurrences_before(entity, month, year)
+            if entity.virtual and 0 < before < entity.occurrences:
+                rule = RecurrenceRule.of(entity)
+                start = rule.nth_date(before)
+                cur.execute("UPDATE recurrences SET occurrences=? WHERE id=?", (before, entity.id))
+                split = replace(
+                    entity,
+                    id=None,
+                    occurrences=entity.occurrences - before,
+                    start_month=start.month,
+                    start_year=start.year,
+                    start_day=start.day if rule.step_days else entity.start_day,
+                )
+                self._insert(cur, split)
+                cur.execute(
+                    f"UPDATE skipped_occurrences SET recurrence_id=? WHERE {FROM_PERIOD}",
+                    (split.id, entity.id, year, year, month),
+                )
+                cur.execute(
+                    f"UPDATE {table} SET recurrence_id=? WHERE {FROM_PERIOD}",
+                    (split.id, entity.id, year, year, month),
+                )
+                entity, recurrence_id = split, split.id
+            else:
+                self._update(cur, entity)
+            cur.execute(
+                f"UPDATE {table} SET {assignments} WHERE {FROM_PERIOD}",
+                (*values, recurrence_id, year, year, month),
+            )
+            updated = cur.rowcount
+            if RecurrenceRule.of(entity).step_days:
+                self._update_month_values(cur, table, entity, month_index(month, year))
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        return entity, updated
+
+    def truncate_from(self, entity: Recurrence, month: int, year: int) -> int:
+        """Encerra a recorrência antes de ``month/year`` em uma transação.
+
+        Remove as ocorrências gravadas e as remoções registradas do período em
+        diante; se nenhuma ocorrência sobra, a regra também é excluída. Retorna
+        o número de linhas removidas.
+        """
+        table = "expenses" if entity.kind == "expense" else "incomes"
+        before = self._occurrences_before(entity, month, year)
+        cur = self.conn.cursor()
+        try:
+            if before <= 0:
+                cur.execute(f"DELETE FROM {table} WHERE recurrence_id=?", (entity.id,))
+                removed = cur.rowcount
+                cur.execute("DELETE FROM skipped_occurrences WHERE recurrence_id=?", (entity.id,))
+                cur.execute("DELETE FROM recurrences WHERE id=?", (entity.id,))
+            else:
+                cur.execute(f"DELETE FROM {table} WHERE {FROM_PERIOD}", (entity.id, year, year, month))
+                removed = cur.rowcount
+                cur.execute(f"DELETE FROM skipped_occurrences WHERE {FROM_PERIOD}", (entity.id, year, year, month))
+                cur.execute(
+                    "UPDATE recurrences SET occurrences=? WHERE id=?",
+                    (min(before, entity.occurrences), entity.id),
+                )
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        return removed
+
+    @staticmethod
+    def _update_month_values(cur: sqlite3.Cursor, table: str, entity: Recurrence, first: int) -> None:
+        cur.execute(
+            f"SELECT MAX(year * 12 + month - 1) FROM {table} WHERE recurrence_id=?",
+            (entity.id,),
+        )
+        last = cur.fetchone()[0]
+        if last is None or last < first:
+            return
+        rows = []
+        for index, count in RecurrenceRule.of(entity).month_counts(first, last):
+            month, year = from_month_index(index)
+            rows.append((to_cents(entity.value) * count, entity.id, year, month))
+        cur.executemany(f"UPDATE {table} SET value=? WHERE recurrence_id=? AND year=? AND month=?", rows)
+
+    @staticmethod
+    def _occurrences_before(entity: Recurrence, month: int, year: int) -> int:
+        return RecurrenceRule.of(entity).count_before(month_index(month, year))
+
+    @staticmethod
+    def _occurrence_fields(entity: Recurrence) -> Tuple[str, str, tuple]:
+        if entity.kind == "expense":
+            return (
+                "expenses",
+                "name=?, value=?, category_id=?, payment_method=?, notes=?",
+                (entity.name, to_cents(entity.value), entity.category_id, entity.payment_method or "debit", entity.notes),
+            )
+        confirmed = True if entity.confirmed is None else entity.confirmed
+        return "incomes", "name=?, value=?, confirmed=?, notes=?", (entity.name, to_cents(entity.value), int(confirmed), entity.notes)
+
+    def add_occurrences(self, expenses: Iterable[Expense], incomes: Iterable[Income]) -> Dict[str, int]:
+        """Grava ocorrências de gastos e entradas em uma única transação.
+
+        Competências já gravadas são ignoradas; retorna quantas linhas foram
+        criadas em cada tabela.
+        """
+        cur = self.conn.cursor()
+        created: Dict[str, int] = {}
+        try:
+            cur.execute("BEGIN IMMEDIATE")
+            for kind, entities in (("expense", expenses), ("income", incomes)):
+                table, columns, row = OCCURRENCE_TABLES[kind]
+                created[table] = len(insert_occurrences(cur, table, columns, map(row, entities)))
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        return created
+
+    def skip_occurrence(self, recurrence_id: int, month: int, year: int) -> None:
+        """Marca uma ocorrência como removida (idempotente)."""
+        cur = self.conn.cursor()
+        cur.execute(
+            "INSERT OR IGNORE INTO skipped_occurrences (recurrence_id, month, year) VALUES (?,?,?)",
+            (recurrence_id, month, year),
+        )
         self.conn.commit()
 
-    def close(self) -> None:
-        self.conn.close()
+    def list_skipped(self) -> List[SkippedOccurrence]:
+        cur = self.conn.cursor()
+        cur.execute("SELECT id, recurrence_id, month, year FROM skipped_occurrences ORDER BY id")
+        return [SkippedOccurrence(id=r[0], recurrence_id=r[1], month=r[2], year=r[3]) for r in cur.fetchall()]
+
+    def skipped_keys(self, recurrence_ids: Iterable[int]) -> Set[Tuple[int, int, int]]:
+        """Retorna ``(recurrence_id, year, month)`` das ocorrências removidas."""
+        ids = list(recurrence_ids)
+        if not ids:
+            return set()
+        cur = self.conn.cursor()
+        cur.execute(
+            f"SELECT recurrence_id, year, month FROM skipped_occurrences WHERE recurrence_id IN ({','.join('?' for _ in ids)})",
+            ids,
+        )
+        return {tuple(row) for row in cur.fetchall()}
 
     def __del__(self) -> None:
         try:
@@ -1,13 +1,22 @@
 from __future__ import annotations
 
+from io import BytesIO
 import os
-from datetime import datetime
 
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify, request, send_file
 
 from .. import state
-from ..errors import bad_request, not_found
-from ..services.backup_service import BackupValidationError, export_backup_payload, restore_backup_payload
+from ..errors import bad_request, conflict, not_found
+from ..services.backup_service import (
+    BackupValidationError,
+    create_database_snapshot,
+    create_incremental_backup,
+    export_backup_payload,
+    read_change_seq,
+    restore_backup_payload,
+    restore_database_snapshot,
+)
+from ..services.ndjson_backup import export_ndjson_archive, restore_ndjson_archive
 from ..use_cases.list_cards import list_cards
 from ..use_cases.list_categories import list_categories
 from ..use_cases.list_expenses import list_expenses
@@ -19,8 +28,22 @@ from ..use_cases.list_recurrences import list_recurrences
 bp = Blueprint("backup", __name__)
 
 
+def _backup_format() -> str:
+    backup_format = (request.args.get("formato") or "json").strip().lower()
+    if backup_format not in {"json", "ndjson"}:
+        raise bad_request("Formato de backup inválido. Use 'json' ou 'ndjson'.")
+    return backup_format
+
+
 @bp.get("/backup/exportar")
 def export_backup():
+    if _backup_format() == "ndjson":
+        return send_file(
+            BytesIO(export_ndjson_archive(state.DB_PATH)),
+            mimetype="application/zip",
+            as_attachment=True,
+            download_name="saveyourmoney_backup.zip",
+        )
     payload = export_backup_payload(
         cards=list_cards(state.card_repo),
         categories=list_categories(state.category_repo),
@@ -29,32 +52,89 @@ def export_backup():
         incomes=list_incomes(state.income_repo),
         installments=list_installments(state.installment_repo),
         recurrences=list_recurrences(state.recurrence_repo),
+        skipped_occurrences=state.recurrence_repo.list_skipped(),
+        installment_plans=state.installment_repo.list_plans(),
+        price_indices=state.price_index_repo.list(),
+        change_seq=read_change_seq(state.DB_PATH),
     )
     return jsonify(payload)
 
 
 @bp.post("/backup/restaurar")
 def restore_backup():
+    if _backup_format() == "ndjson":
+        return _restore_ndjson()
     data = request.get_json(silent=True)
     if data is None:
         raise bad_request("Envie um JSON de backup válido.")
+    incrementals = data.get("incrementals") if isinstance(data, dict) else None
+    if incrementals is not None and not isinstance(incrementals, list):
+        raise bad_request("Campo 'incrementals' deve ser uma lista.")
     try:
-        counts = restore_backup_payload(state.DB_PATH, data)
+        counts = restore_backup_payload(state.DB_PATH, data, incrementals)
     except BackupValidationError as exc:
+        if exc.errors:
+            return jsonify({"error": str(exc), "errors": exc.errors}), 400
         raise bad_request(str(exc))
     except Exception:
         return jsonify({"error": "Não foi possível restaurar o backup. Verifique se o arquivo é válido."}), 500
     return jsonify({"message": "Backup restaurado com sucesso.", "imported": counts}), 200
 
 
+def _restore_ndjson():
+    upload = request.files.get("arquivo")
+    archive = upload.read() if upload else request.get_data()
+    if not archive:
+        raise bad_request("Envie o arquivo ZIP do backup.")
+    try:
+        tables = restore_ndjson_archive(state.DB_PATH, archive)
+    except BackupValidationError as exc:
+        raise bad_request(str(exc))
+    if any(result["status"] == "error" for result in tables.values()):
+        return (
+            jsonify(
+                {
+                    "error": "Algumas tabelas não foram restauradas. Corrija o arquivo e envie novamente.",
+                    "tables": tables,
+                }
+            ),
+            400,
+        )
+    return jsonify({"message": "Backup restaurado com sucesso.", "tables": tables}), 200
+
+
+@bp.post("/backup/restaurar/<nome>")
+def restore_snapshot(nome: str):
+    if os.path.basename(nome) != nome or not nome.endswith(".db"):
+        raise bad_request("Nome de snapshot inválido.")
+    snapshot_path = os.path.join(state.BACKUP_DIR, nome)
+    if not os.path.isfile(snapshot_path):
+        raise not_found("Snapshot não encontrado.")
+    data = request.get_json(silent=True) or {}
+    incrementals = data.get("incrementals")
+    if incrementals is not None and not isinstance(incrementals, list):
+        raise bad_request("Campo 'incrementals' deve ser uma lista.")
+    try:
+        counts = restore_database_snapshot(state.DB_PATH, snapshot_path, incrementals)
+    except BackupValidationError as exc:
+        raise bad_request(str(exc))
+    except Exception:
+        return jsonify({"error": "Não foi possível restaurar o snapshot. Verifique se o arquivo é válido."}), 500
+    return jsonify({"message": "Backup restaurado com sucesso.", "imported": counts}), 200
+
+
 @bp.post("/backup")
 def backup_database():
     if not state.DB_PATH or not os.path.exists(state.DB_PATH):
         raise not_found("Banco de dados não encontrado.")
-    os.makedirs(state.BACKUP_DIR, exist_ok=True)
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    backup_name = f"saveyourmoney_{timestamp}.db"
-    backup_path = os.path.join(state.BACKUP_DIR, backup_name)
-    with open(state.DB_PATH, "rb") as source, open(backup_path, "wb") as target:
-        target.write(source.read())
-    return jsonify({"backup": backup_name, "path": backup_path}), 201
+    data = request.get_json(silent=True) or {}
+    mode = str(data.get("mode") or data.get("modo") or "full").strip().lower()
+    if mode not in {"full", "incremental"}:
+        raise bad_request("Modo de backup inválido. Use 'full' ou 'incremental'.")
+    if mode == "incremental":
+        try:
+            result = create_incremental_backup(state.DB_PATH, state.BACKUP_DIR)
+        except BackupValidationError as exc:
+            raise conflict(str(exc))
+        return jsonify(result), 201
+    return jsonify(create_database_snapshot(state.DB_PATH, state.BACKUP_DIR)), 201
@@ -1,12 +1,12 @@
 from __future__ import annotations
 
-from dataclasses import asdict
 
 from flask import Blueprint, jsonify, request
 
 from .. import state
 from ..errors import bad_request, conflict, not_found
 from ..schemas.cards import CardCreate, CardUpdate
+from ..use_cases.card_usage import card_usage
 from ..use_cases.create_card import create_card
 from ..use_cases.list_cards import list_cards
 
@@ -16,7 +16,15 @@ bp = Blueprint("cards", __name__)
 @bp.get("/cartoes")
 def get_cards():
     cards = list_cards(state.card_repo)
-    return jsonify([asdict(card) for card in cards])
+    return jsonify(cards)
+
+
+@bp.get("/cartoes/uso")
+def get_cards_usage():
+    months = request.args.get("meses", default=6, type=int)
+    if months is None or not 1 <= months <= 120:
+        raise bad_request("meses deve estar entre 1 e 120.")
+    return jsonify(card_usage(state.card_repo, state.installment_repo, months))
 
 
 @bp.post("/cartoes")
@@ -27,7 +35,7 @@ def post_card():
         card = create_card(state.card_repo, payload.to_entity())
     except (TypeError, ValueError) as exc:
         raise bad_request(f"Dados inválidos para cartão. {exc}")
-    return jsonify(asdict(card)), 201
+    return jsonify(card), 201
 
 
 @bp.put("/cartoes/<int:card_id>")
@@ -42,14 +50,16 @@ def put_card(card_id: int):
         state.card_repo.update(updated)
     except (TypeError, ValueError) as exc:
         raise bad_request(f"Dados inválidos para cartão. {exc}")
-    return jsonify(asdict(updated)), 200
+    return jsonify(updated), 200
 
 
 @bp.delete("/cartoes/<int:card_id>")
 def delete_card(card_id: int):
     if not state.card_repo.get(card_id):
         raise not_found("Cartão não encontrado.")
-    has_installments = any(installment.card_id == card_id for installment in state.installment_repo.list())
+    has_installments = any(
+        installment.card_id == card_id for installment in state.installment_repo.list()
+    ) or bool(state.installment_repo.list_plans(card_id=card_id))
     if has_installments:
         raise conflict("Não é possível excluir cartão com parcelas vinculadas.")
     state.card_repo.delete(card_id)
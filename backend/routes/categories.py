@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-from dataclasses import asdict
 
 from flask import Blueprint, jsonify, request
 
@@ -16,7 +15,7 @@ bp = Blueprint("categories", __name__)
 @bp.get("/categorias")
 def get_categories():
     categories = list_categories(state.category_repo)
-    return jsonify([asdict(category) for category in categories])
+    return jsonify(categories)
 
 
 @bp.post("/categorias")
@@ -27,7 +26,7 @@ def post_category():
         category = create_category(state.category_repo, payload.to_entity())
     except ValueError as exc:
         raise bad_request(str(exc))
-    return jsonify(asdict(category)), 201
+    return jsonify(category), 201
 
 
 @bp.put("/categorias/<int:category_id>")
@@ -42,7 +41,7 @@ def put_category(category_id: int):
     except ValueError as exc:
         raise bad_request(str(exc))
     state.category_repo.update(updated)
-    return jsonify(asdict(updated)), 200
+    return jsonify(updated), 200
 
 
 @bp.delete("/categorias/<int:category_id>")
@@ -1,20 +1,24 @@
 from __future__ import annotations
 
-from dataclasses import asdict
+from dataclasses import replace
+import sqlite3
 
 from flask import Blueprint, jsonify, request
 
 from .. import state
-from ..domain.entities import Installment, Recurrence
-from ..errors import bad_request, not_found
-from ..routes.utils import ensure_card_exists, ensure_category_exists
-from ..schemas.common import parse_cancel_scope, parse_edit_scope, parse_optional_int
+from ..domain.entities import INSTALLMENT_PAID, InstallmentPlan, Recurrence
+from ..domain.period import from_month_index, month_index
+from ..domain.recurrence_rules import RecurrenceRule, check_start_day, interval_for, occurrences_until, parse_frequency
+from ..errors import bad_request, conflict, not_found
+from ..routes.utils import ensure_card_exists, ensure_category_exists, skip_occurrence
+from ..schemas.common import parse_cancel_scope, parse_edit_scope, parse_optional_bool, parse_optional_int, pick
 from ..schemas.expenses import ExpenseCreate, ExpenseUpdate
 from ..use_cases.create_expense import create_expense
-from ..use_cases.create_installments import create_installments
+from ..use_cases.create_installment_plan import create_installment_plan
 from ..use_cases.create_recurrence import create_recurrence
 from ..use_cases.list_expenses import list_expenses
-from ..services.finance_service import generate_installments
+from ..services.invoice_engine import first_invoice_index
+from ..services.recurrence_expansion import occurrence_counts, occurrence_value
 
 bp = Blueprint("expenses", __name__)
 
@@ -24,12 +28,12 @@ def get_expenses():
     month = request.args.get("mes", type=int)
     year = request.args.get("ano", type=int)
     recurring_filter = (request.args.get("recorrente") or "todos").strip().lower()
-    expenses = list_expenses(state.expense_repo, month=month, year=year)
+    expenses = list_expenses(state.expense_repo, month=month, year=year, recurrence_repo=state.recurrence_repo)
     if recurring_filter == "sim":
         expenses = [item for item in expenses if item.recurrence_id is not None]
     elif recurring_filter == "nao":
         expenses = [item for item in expenses if item.recurrence_id is None]
-    return jsonify([asdict(expense) for expense in expenses])
+    return jsonify(expenses)
 
 
 @bp.post("/gastos")
@@ -41,35 +45,37 @@ def post_expense():
         recurring_data = data.get("recurring") or {}
         recurrence_id = None
         if recurring_data.get("enabled"):
-            frequency = str(recurring_data.get("frequency") or "mensal").strip().lower()
-            interval_by_frequency = {"semanal": 1, "mensal": 1, "anual": 12}
-            interval_months = int(recurring_data.get("interval_months") or interval_by_frequency.get(frequency, 1))
-            if interval_months <= 0:
-                raise ValueError("interval_months deve ser maior que zero.")
-            occurrences = int(recurring_data.get("occurrences") or 12)
-            if recurring_data.get("end_month") and recurring_data.get("end_year"):
-                end_month = int(recurring_data.get("end_month"))
-                end_year = int(recurring_data.get("end_year"))
-                start_index = expense_payload.year * 12 + expense_payload.month
-                end_index = end_year * 12 + end_month
-                total_months = max(end_index - start_index, 0)
-                occurrences = max((total_months // interval_months) + 1, 1)
-            created_recurrence = create_recurrence(
-                state.recurrence_repo,
-                Recurrence(
-                    kind="expense",
-                    name=expense_payload.name,
-                    value=expense_payload.value,
-                    start_month=expense_payload.month,
-                    start_year=expense_payload.year,
-                    interval_months=interval_months,
-                    occurrences=occurrences,
-                    category_id=expense_payload.category_id,
-                    payment_method=expense_payload.payment_method,
-                    notes=expense_payload.notes,
-                ),
+            frequency = parse_frequency(recurring_data.get("frequency"))
+            interval_months = interval_for(frequency, parse_optional_int(recurring_data.get("interval_months"), "Intervalo de meses"))
+            start_day = parse_optional_int(pick(recurring_data, "start_day", "dia_inicio"), "Dia inicial")
+            start_day = check_start_day(1 if start_day is None else start_day)
+            recurrence = Recurrence(
+                kind="expense",
+                name=expense_payload.name,
+                value=expense_payload.value,
+                start_month=expense_payload.month,
+                start_year=expense_payload.year,
+                interval_months=interval_months,
+                occurrences=int(recurring_data.get("occurrences") or 12),
+                category_id=expense_payload.category_id,
+                payment_method=expense_payload.payment_method,
+                notes=expense_payload.notes,
+                virtual=bool(parse_optional_bool(recurring_data.get("virtual"))),
+                frequency=frequency,
+                start_day=start_day,
             )
+            if recurring_data.get("end_month") and recurring_data.get("end_year"):
+                recurrence.occurrences = occurrences_until(
+                    RecurrenceRule.of(recurrence),
+                    int(recurring_data.get("end_month")),
+                    int(recurring_data.get("end_year")),
+                )
+            created_recurrence = create_recurrence(state.recurrence_repo, recurrence)
             recurrence_id = created_recurrence.id
+            # O lançamento do mês inicial soma todas as ocorrências semanais do mês.
+            start = month_index(expense_payload.month, expense_payload.year)
+            for _, count in occurrence_counts(created_recurrence, start, start):
+                expense_payload = replace(expense_payload, value=occurrence_value(created_recurrence, count))
 
         expense = create_expense(state.expense_repo, expense_payload.to_entity(recurrence_id))
     except (TypeError, ValueError) as exc:
@@ -86,30 +92,30 @@ def post_expense():
             raise bad_request("cartao_id é obrigatório para parcelas.")
         try:
             ensure_card_exists(card_id)
+            purchase_day = parse_optional_int(
+                pick(installments_payload, "purchase_day", "dia_compra"),
+                "Dia da compra",
+            )
+            if purchase_day is not None and purchase_day > 31:
+                raise ValueError("Dia da compra deve estar entre 1 e 31.")
+            first_month, first_year = from_month_index(
+                first_invoice_index(state.card_repo.get(card_id), expense.month, expense.year, purchase_day)
+            )
+            create_installment_plan(
+                state.installment_repo,
+                InstallmentPlan(
+                    card_id=card_id,
+                    expense_name=expense.name,
+                    total_value=expense.value,
+                    installments=num_installments,
+                    first_month=first_month,
+                    first_year=first_year,
+                    expense_id=expense.id,
+                ),
+            )
         except ValueError as exc:
             raise bad_request(str(exc))
-        values = generate_installments(expense.value, num_installments)
-        created_installments = []
-        month = expense.month
-        year = expense.year
-        for index, value in enumerate(values, start=1):
-            installment = Installment(
-                card_id=card_id,
-                expense_name=expense.name,
-                installment_number=index,
-                total_installments=num_installments,
-                value=value,
-                month=month,
-                year=year,
-                status="pendente",
-            )
-            created_installments.append(installment)
-            month += 1
-            if month > 12:
-                month = 1
-                year += 1
-        create_installments(state.installment_repo, created_installments)
-    return jsonify(asdict(expense)), 201
+    return jsonify(expense), 201
 
 
 @bp.put("/gastos/<int:expense_id>")
@@ -123,19 +129,26 @@ def put_expense(expense_id: int):
         payload = ExpenseUpdate.from_payload(data, existing)
         ensure_category_exists(payload.category_id)
         entity = payload.to_entity(expense_id, existing.recurrence_id)
-        state.expense_repo.update(entity)
-        if scope == "future" and existing.recurrence_id:
-            recurrence = state.recurrence_repo.get(existing.recurrence_id)
-            if recurrence:
-                recurrence.name = entity.name
-                recurrence.value = entity.value
-                recurrence.category_id = entity.category_id
-                recurrence.payment_method = entity.payment_method
-                recurrence.notes = entity.notes
-                state.recurrence_repo.update(recurrence)
+        recurrence = state.recurrence_repo.get(existing.recurrence_id) if scope == "future" and existing.recurrence_id else None
+        if not recurrence:
+            state.expense_repo.update(entity)
+        else:
+            recurrence.name = entity.name
+            # Em regras semanais a linha do mês soma as ocorrências; a regra guarda o valor de cada uma.
+            start = month_index(existing.month, existing.year)
+            counts = occurrence_counts(recurrence, start, start)
+            recurrence.value = round(entity.value / counts[0][1], 2) if counts else entity.value
+            recurrence.category_id = entity.category_id
+            recurrence.payment_method = entity.payment_method
+            recurrence.notes = entity.notes
+            # O gasto editado e a propagação às ocorrências seguintes são gravados em uma transação.
+            recurrence, _ = state.recurrence_repo.update_from(recurrence, existing.month, existing.year, occurrence=entity)
+            entity.recurrence_id = recurrence.id
+    except sqlite3.IntegrityError:
+        raise conflict("Já existe uma ocorrência desta recorrência neste mês.")
     except (TypeError, ValueError) as exc:
         raise bad_request(f"Dados inválidos para gasto. {exc}")
-    return jsonify(asdict(entity)), 200
+    return jsonify(entity), 200
 
 
 @bp.delete("/gastos/<int:expense_id>")
@@ -148,11 +161,24 @@ def delete_expense(expense_id: int):
         scope = parse_cancel_scope(data.get("scope"))
     except ValueError as exc:
         raise bad_request(str(exc))
-    if existing.recurrence_id and scope in {"future", "all"}:
-        state.recurrence_repo.delete(existing.recurrence_id)
-        for expense in state.expense_repo.list():
-            if expense.recurrence_id == existing.recurrence_id:
-                state.expense_repo.delete(expense.id)
+    recurrence = state.recurrence_repo.get(existing.recurrence_id) if existing.recurrence_id else None
+    if recurrence and scope in {"future", "all"}:
+        if scope == "future":
+            state.recurrence_repo.truncate_from(recurrence, existing.month, existing.year)
+        else:
+            state.recurrence_repo.truncate_from(recurrence, recurrence.start_month, recurrence.start_year)
         return jsonify({"message": "Recorrência cancelada com sucesso."}), 200
+    plans = state.installment_repo.list_plans(expense_id=expense_id)
+    paid = sum(state.installment_repo.count_plan_installments(plan.id, INSTALLMENT_PAID) for plan in plans)
+    if paid:
+        try:
+            force = bool(parse_optional_bool(data.get("force")))
+        except ValueError as exc:
+            raise bad_request(str(exc))
+        if not force:
+            raise conflict(f"O parcelamento deste gasto tem {paid} parcela(s) paga(s). Envie \"force\": true para excluir mesmo assim.")
     state.expense_repo.delete(expense_id)
+    for plan in plans:
+        state.installment_repo.delete_plan(plan.id)
+    skip_occurrence(existing.recurrence_id, existing.month, existing.year)
     return jsonify({"message": "Gasto excluído com sucesso."}), 200
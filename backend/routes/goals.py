@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-from dataclasses import asdict
 
 from flask import Blueprint, jsonify, request
 
@@ -19,7 +18,7 @@ def get_goals():
     month = request.args.get("mes", type=int)
     year = request.args.get("ano", type=int)
     goals = list_goals(state.goal_repo, month=month, year=year)
-    return jsonify([asdict(goal) for goal in goals])
+    return jsonify(goals)
 
 
 @bp.post("/metas")
@@ -31,7 +30,7 @@ def post_goal():
         goal = create_goal(state.goal_repo, payload.to_entity())
     except (TypeError, ValueError) as exc:
         raise bad_request(f"Dados inválidos para meta. {exc}")
-    return jsonify(asdict(goal)), 201
+    return jsonify(goal), 201
 
 
 @bp.put("/metas/<int:goal_id>")
@@ -47,7 +46,7 @@ def put_goal(goal_id: int):
         state.goal_repo.update(updated)
     except (TypeError, ValueError) as exc:
         raise bad_request(f"Dados inválidos para meta. {exc}")
-    return jsonify(asdict(updated)), 200
+    return jsonify(updated), 200
 
 
 @bp.delete("/metas/<int:goal_id>")
@@ -2,9 +2,21 @@ from __future__ import annotations
 
 from flask import Blueprint
 
+from .. import state
+from ..services.calculator_registry import CALCULATOR_CACHE
+
 bp = Blueprint("health", __name__)
 
 
 @bp.get("/health")
 def health() -> tuple[dict, int]:
-    return {"status": "ok"}, 200
+    scheduler = state.backup_scheduler
+    materializer = state.recurrence_materializer
+    server = state.server_status
+    return {
+        "status": "ok",
+        "backup_scheduler": scheduler.status() if scheduler else None,
+        "recurrence_materializer": materializer.status() if materializer else None,
+        "calculator_cache": CALCULATOR_CACHE.stats(),
+        "server": server.status() if server else None,
+    }, 200
@@ -1,11 +1,12 @@
 from __future__ import annotations
 
-from dataclasses import asdict
+import sqlite3
 
 from flask import Blueprint, jsonify, request
 
 from .. import state
-from ..errors import bad_request, not_found
+from ..errors import bad_request, conflict, not_found
+from ..routes.utils import skip_occurrence
 from ..schemas.incomes import IncomeCreate, IncomeUpdate
 from ..use_cases.create_income import create_income
 from ..use_cases.list_incomes import list_incomes
@@ -17,8 +18,8 @@ bp = Blueprint("incomes", __name__)
 def get_incomes():
     month = request.args.get("mes", type=int)
     year = request.args.get("ano", type=int)
-    incomes = list_incomes(state.income_repo, month=month, year=year)
-    return jsonify([asdict(income) for income in incomes])
+    incomes = list_incomes(state.income_repo, month=month, year=year, recurrence_repo=state.recurrence_repo)
+    return jsonify(incomes)
 
 
 @bp.post("/entradas")
@@ -29,7 +30,7 @@ def post_income():
         income = create_income(state.income_repo, payload.to_entity())
     except (TypeError, ValueError) as exc:
         raise bad_request(f"Dados inválidos para entrada. {exc}")
-    return jsonify(asdict(income)), 201
+    return jsonify(income), 201
 
 
 @bp.put("/entradas/<int:income_id>")
@@ -40,16 +41,20 @@ def put_income(income_id: int):
     data = request.get_json(silent=True) or {}
     try:
         payload = IncomeUpdate.from_payload(data, existing)
-        updated = payload.to_entity(income_id)
+        updated = payload.to_entity(income_id, existing.recurrence_id)
         state.income_repo.update(updated)
+    except sqlite3.IntegrityError:
+        raise conflict("Já existe uma ocorrência desta recorrência neste mês.")
     except (TypeError, ValueError) as exc:
         raise bad_request(f"Dados inválidos para entrada. {exc}")
-    return jsonify(asdict(updated)), 200
+    return jsonify(updated), 200
 
 
 @bp.delete("/entradas/<int:income_id>")
 def delete_income(income_id: int):
-    if not state.income_repo.get(income_id):
+    existing = state.income_repo.get(income_id)
+    if not existing:
         raise not_found("Entrada não encontrada.")
     state.income_repo.delete(income_id)
+    skip_occurrence(existing.recurrence_id, existing.month, existing.year)
     return jsonify({"message": "Entrada excluída com sucesso."}), 200
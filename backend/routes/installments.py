@@ -1,12 +1,16 @@
 from __future__ import annotations
 
-from dataclasses import asdict
 
 from flask import Blueprint, jsonify, request
 
 from .. import state
-from ..errors import bad_request
+from ..domain.entities import INSTALLMENT_PAID
+from ..domain.period import from_month_index
+from ..errors import bad_request, not_found
 from ..services.finance_service import calculate_invoice
+from ..services.invoice_engine import invoice_dates, open_invoice_index
+from ..schemas.installments import InstallmentPlanUpdate, InstallmentStatusUpdate, InvoicePayment, PlanInstallmentUpdate
+from ..use_cases.card_invoices import list_invoices, pay_invoice, plan_installment
 from ..use_cases.list_installments import list_installments
 
 bp = Blueprint("installments", __name__)
@@ -17,8 +21,8 @@ def get_installments():
     card_id = request.args.get("cartao_id", type=int) or request.args.get("card_id", type=int)
     month = request.args.get("mes", type=int)
     year = request.args.get("ano", type=int)
-    installments = list_installments(state.installment_repo, card_id=card_id, month=month, year=year)
-    return jsonify([asdict(installment) for installment in installments])
+    installments = list_installments(state.installment_repo, card_id=card_id, month=month, year=year, expand_plans=True)
+    return jsonify(installments)
 
 
 @bp.get("/faturas")
@@ -28,6 +32,114 @@ def get_invoice():
     year = request.args.get("ano", type=int)
     if not card_id or not month or not year:
         raise bad_request("cartao_id, mes e ano são obrigatórios.")
-    installments = list_installments(state.installment_repo, card_id=card_id, month=month, year=year)
+    card = state.card_repo.get(card_id)
+    if not card:
+        raise not_found("Cartão não encontrado.")
+    installments = list_installments(state.installment_repo, card_id=card_id, month=month, year=year, expand_plans=True)
     total = calculate_invoice([installment.value for installment in installments])
-    return jsonify({"total": total, "parcelas": [asdict(item) for item in installments]})
+    closing, due = invoice_dates(card, month, year)
+    return jsonify(
+        {
+            "total": total,
+            "fechamento": closing.isoformat(),
+            "vencimento": due.isoformat(),
+            "parcelas": installments,
+        }
+    )
+
+
+@bp.get("/faturas/timeline")
+def get_invoice_timeline():
+    card_id = request.args.get("cartao_id", type=int) or request.args.get("card_id", type=int)
+    if not card_id:
+        raise bad_request("cartao_id é obrigatório.")
+    card = state.card_repo.get(card_id)
+    if not card:
+        raise not_found("Cartão não encontrado.")
+    open_index = open_invoice_index(card)
+    invoices = list_invoices(state.installment_repo, card_id, since=open_index)
+    timeline = []
+    for invoice in invoices:
+        closing, due = invoice_dates(card, invoice.month, invoice.year)
+        timeline.append(
+            {
+                "month": invoice.month,
+                "year": invoice.year,
+                "status": "aberta" if (invoice.month, invoice.year) == from_month_index(open_index) else "futura",
+                "fechamento": closing.isoformat(),
+                "vencimento": due.isoformat(),
+                "total": invoice.total,
+                "parcelas": invoice.installments,
+            }
+        )
+    return jsonify({"cartao_id": card_id, "faturas": timeline})
+
+
+@bp.post("/parcelas/status")
+def post_installments_status():
+    data = request.get_json(silent=True) or {}
+    try:
+        payload = InstallmentStatusUpdate.from_payload(data)
+    except ValueError as exc:
+        raise bad_request(f"Dados inválidos para parcelas. {exc}")
+    updated = state.installment_repo.set_status(payload.ids, payload.status)
+    return jsonify({"status": payload.status, "updated": updated, "not_found": len(payload.ids) - updated}), 200
+
+
+@bp.post("/faturas/pagar")
+def post_invoice_payment():
+    data = request.get_json(silent=True) or {}
+    try:
+        payload = InvoicePayment.from_payload(data)
+    except ValueError as exc:
+        raise bad_request(f"Dados inválidos para fatura. {exc}")
+    if not state.card_repo.get(payload.card_id):
+        raise not_found("Cartão não encontrado.")
+    updated = pay_invoice(state.installment_repo, payload.card_id, payload.month, payload.year, INSTALLMENT_PAID)
+    return jsonify({"cartao_id": payload.card_id, "mes": payload.month, "ano": payload.year, "updated": updated}), 200
+
+
+@bp.get("/parcelamentos")
+def get_installment_plans():
+    card_id = request.args.get("cartao_id", type=int) or request.args.get("card_id", type=int)
+    return jsonify(state.installment_repo.list_plans(card_id=card_id))
+
+
+@bp.put("/parcelamentos/<int:plan_id>")
+def put_installment_plan(plan_id: int):
+    existing = state.installment_repo.get_plan(plan_id)
+    if not existing:
+        raise not_found("Parcelamento não encontrado.")
+    data = request.get_json(silent=True) or {}
+    try:
+        plan = InstallmentPlanUpdate.from_payload(data, existing).to_entity(existing)
+        state.installment_repo.update_plan(plan)
+    except (TypeError, ValueError) as exc:
+        raise bad_request(f"Dados inválidos para parcelamento. {exc}")
+    return jsonify(plan), 200
+
+
+@bp.put("/parcelamentos/<int:plan_id>/parcelas/<int:number>")
+def put_plan_installment(plan_id: int, number: int):
+    plan = state.installment_repo.get_plan(plan_id)
+    if not plan:
+        raise not_found("Parcelamento não encontrado.")
+    installment = plan_installment(state.installment_repo, plan, number)
+    if not installment:
+        raise not_found("Parcela não encontrada.")
+    data = request.get_json(silent=True) or {}
+    try:
+        payload = PlanInstallmentUpdate.from_payload(data, installment)
+    except ValueError as exc:
+        raise bad_request(f"Dados inválidos para parcela. {exc}")
+    installment.status = payload.status
+    installment.value = payload.value
+    return jsonify(state.installment_repo.save_plan_installment(installment)), 200
+
+
+@bp.delete("/parcelamentos/<int:plan_id>")
+def delete_installment_plan(plan_id: int):
+    if not state.installment_repo.get_plan(plan_id):
+        raise not_found("Parcelamento não encontrado.")
+    state.installment_repo.delete_plan(plan_id)
+    return jsonify({"message": "Parcelamento cancelado com sucesso."}), 200
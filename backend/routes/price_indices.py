@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+
+from flask import Blueprint, jsonify, request
+
+from .. import state
+from ..errors import bad_request
+from ..services.price_index import parse_index_csv, parse_series
+
+bp = Blueprint("price_indices", __name__)
+
+
+@bp.get("/indices")
+def get_price_indices():
+    series = request.args.get("serie")
+    indices = state.price_index_repo.list_filtered(series=parse_series(series) if series else None)
+    return jsonify(indices)
+
+
+@bp.post("/indices/importar")
+def import_price_indices():
+    upload = request.files.get("arquivo")
+    content = upload.read() if upload else request.get_data()
+    if not content:
+        raise bad_request("Envie o arquivo CSV do índice.")
+    series = parse_series(request.args.get("serie") or request.form.get("serie"))
+    try:
+        indices = parse_index_csv(content.decode("utf-8-sig"), series)
+    except UnicodeDecodeError:
+        raise bad_request("CSV deve estar em UTF-8.")
+    except ValueError as exc:
+        raise bad_request(f"CSV de índice inválido. {exc}")
+    imported = state.price_index_repo.upsert_many(indices)
+    return jsonify({"message": "Índices importados com sucesso.", "serie": series, "imported": imported}), 200
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+from datetime import date
+
+from flask import Blueprint, jsonify, request
+
+from .. import state
+from ..domain.period import month_index
+from ..errors import bad_request
+from ..repositories.sqlite.change_log import current_change_seq
+from ..services.lru_cache import LRUCache
+from ..use_cases.project_cash_flow import project_cash_flow
+
+bp = Blueprint("projection", __name__)
+
+MAX_PROJECTION_MONTHS = 120
+# Projeções por (banco, versão dos dados, mês inicial, meses): qualquer escrita muda a versão.
+PROJECTION_CACHE = LRUCache(32)
+
+
+@bp.get("/projecao")
+def get_projection():
+    months = request.args.get("meses", default=12, type=int)
+    if months is None or not 1 <= months <= MAX_PROJECTION_MONTHS:
+        raise bad_request(f"meses deve estar entre 1 e {MAX_PROJECTION_MONTHS}.")
+    today = date.today()
+    repo = state.expense_repo
+    key = (repo.db_path, current_change_seq(repo.conn), month_index(today.month, today.year), months)
+    projection = PROJECTION_CACHE.get_or_compute(
+        key,
+        lambda: project_cash_flow(
+            state.recurrence_repo,
+            state.expense_repo,
+            state.income_repo,
+            state.installment_repo,
+            state.goal_repo,
+            months,
+            today,
+        ),
+    )
+    return jsonify(projection)
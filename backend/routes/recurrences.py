@@ -1,16 +1,21 @@
 from __future__ import annotations
 
-from dataclasses import asdict
 
 from flask import Blueprint, jsonify, request
 
 from .. import state
+from ..domain.entities import Expense, Income
 from ..errors import bad_request, not_found
-from ..routes.utils import ensure_category_exists
+from ..routes.utils import ensure_category_exists, skip_occurrence
+from ..schemas.expenses import ExpenseUpdate
+from ..schemas.incomes import IncomeUpdate
 from ..schemas.recurrences import RecurrenceCreate, RecurrenceUpdate
+from ..services.recurrence_expansion import expand_occurrence_counts, occurrence_value
+from ..services.recurrence_materializer import apply_horizon
 from ..use_cases.apply_recurrence import apply_recurrence
 from ..use_cases.create_recurrence import create_recurrence
 from ..use_cases.list_recurrences import list_recurrences
+from ..use_cases.materialize_recurrences import materialize_recurrences
 
 bp = Blueprint("recurrences", __name__)
 
@@ -18,7 +23,7 @@ bp = Blueprint("recurrences", __name__)
 @bp.get("/recorrencias")
 def get_recurrences():
     recurrences = list_recurrences(state.recurrence_repo)
-    return jsonify([asdict(recurrence) for recurrence in recurrences])
+    return jsonify(recurrences)
 
 
 @bp.post("/recorrencias")
@@ -30,7 +35,7 @@ def post_recurrence():
         recurrence = create_recurrence(state.recurrence_repo, payload.to_entity())
     except (TypeError, ValueError) as exc:
         raise bad_request(f"Dados inválidos para recorrência. {exc}")
-    return jsonify(asdict(recurrence)), 201
+    return jsonify(recurrence), 201
 
 
 @bp.put("/recorrencias/<int:recurrence_id>")
@@ -46,20 +51,84 @@ def put_recurrence(recurrence_id: int):
         state.recurrence_repo.update(updated)
     except (TypeError, ValueError) as exc:
         raise bad_request(f"Dados inválidos para recorrência. {exc}")
-    return jsonify(asdict(updated)), 200
+    return jsonify(updated), 200
 
 
 @bp.delete("/recorrencias/<int:recurrence_id>")
 def delete_recurrence(recurrence_id: int):
-    if not state.recurrence_repo.get(recurrence_id):
+    recurrence = state.recurrence_repo.get(recurrence_id)
+    if not recurrence:
         raise not_found("Recorrência não encontrada.")
-    state.recurrence_repo.delete(recurrence_id)
-    for expense in state.expense_repo.list():
-        if expense.recurrence_id == recurrence_id:
-            state.expense_repo.delete(expense.id)
+    state.recurrence_repo.truncate_from(recurrence, recurrence.start_month, recurrence.start_year)
     return jsonify({"message": "Recorrência excluída com sucesso."}), 200
 
 
+def _get_occurrence(recurrence_id: int, year: int, month: int):
+    recurrence = state.recurrence_repo.get(recurrence_id)
+    if not recurrence:
+        raise not_found("Recorrência não encontrada.")
+    occurrences = expand_occurrence_counts(recurrence, month=month, year=year) if 1 <= month <= 12 else []
+    if not occurrences:
+        raise not_found("Ocorrência não encontrada para esta recorrência.")
+    repo = state.expense_repo if recurrence.kind == "expense" else state.income_repo
+    stored = [item for item in repo.list_filtered(month=month, year=year) if item.recurrence_id == recurrence_id]
+    return recurrence, repo, stored, occurrence_value(recurrence, occurrences[0][2])
+
+
+@bp.put("/recorrencias/<int:recurrence_id>/ocorrencias/<int:ano>/<int:mes>")
+def put_occurrence(recurrence_id: int, ano: int, mes: int):
+    recurrence, repo, stored, value = _get_occurrence(recurrence_id, ano, mes)
+    data = {
+        key: value
+        for key, value in (request.get_json(silent=True) or {}).items()
+        if key not in {"month", "mes", "year", "ano"}
+    }
+    if stored:
+        base = stored[0]
+    elif recurrence.kind == "expense":
+        base = Expense(
+            name=recurrence.name,
+            value=value,
+            month=mes,
+            year=ano,
+            category_id=recurrence.category_id,
+            recurrence_id=recurrence_id,
+            payment_method=recurrence.payment_method or "debit",
+            notes=recurrence.notes,
+        )
+    else:
+        base = Income(
+            name=recurrence.name,
+            value=value,
+            month=mes,
+            year=ano,
+            confirmed=recurrence.confirmed if recurrence.confirmed is not None else True,
+            recurrence_id=recurrence_id,
+            notes=recurrence.notes,
+        )
+    try:
+        if recurrence.kind == "expense":
+            payload = ExpenseUpdate.from_payload(data, base)
+            ensure_category_exists(payload.category_id)
+            entity = payload.to_entity(base.id, recurrence_id)
+        else:
+            entity = IncomeUpdate.from_payload(data, base).to_entity(base.id, recurrence_id)
+    except (TypeError, ValueError) as exc:
+        raise bad_request(f"Dados inválidos para ocorrência. {exc}")
+    if entity.id is None:
+        return jsonify(repo.add(entity)), 201
+    return jsonify(repo.update(entity)), 200
+
+
+@bp.delete("/recorrencias/<int:recurrence_id>/ocorrencias/<int:ano>/<int:mes>")
+def delete_occurrence(recurrence_id: int, ano: int, mes: int):
+    recurrence, repo, stored, _ = _get_occurrence(recurrence_id, ano, mes)
+    for item in stored:
+        repo.delete(item.id)
+    skip_occurrence(recurrence.id, mes, ano)
+    return jsonify({"message": "Ocorrência excluída com sucesso."}), 200
+
+
 @bp.post("/recorrencias/aplicar")
 def apply_recurrence_endpoint():
     data = request.get_json(silent=True) or {}
@@ -69,5 +138,17 @@ def apply_recurrence_endpoint():
     recurrence = state.recurrence_repo.get(int(recurrence_id))
     if not recurrence:
         raise not_found("Recorrência não encontrada.")
-    expenses, incomes = apply_recurrence(recurrence, state.expense_repo, state.income_repo)
-    return jsonify({"expenses": [asdict(e) for e in expenses], "incomes": [asdict(i) for i in incomes]})
+    if recurrence.virtual:
+        raise bad_request("Recorrências virtuais são calculadas na leitura e não precisam ser aplicadas.")
+    until = apply_horizon(state.recurrence_materializer)
+    expenses, incomes = apply_recurrence(
+        recurrence, state.expense_repo, state.income_repo, until, state.recurrence_repo
+    )
+    return jsonify({"expenses": expenses, "incomes": incomes})
+
+
+@bp.post("/recorrencias/aplicar-todas")
+def apply_all_recurrences_endpoint():
+    until = apply_horizon(state.recurrence_materializer)
+    created = materialize_recurrences(state.recurrence_repo, state.expense_repo, state.income_repo, until)
+    return jsonify(created)
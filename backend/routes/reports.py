@@ -14,14 +14,20 @@ from reportlab.pdfgen import canvas
 from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
 
 from .. import state
+from ..domain.period import from_month_index, month_index
+from ..domain.value_objects import from_cents, to_cents
 from ..errors import bad_request
+from ..services.price_index import deflate, deflation_factors, parse_period, parse_series
 from ..use_cases.list_categories import list_categories
 from ..use_cases.list_expenses import list_expenses
 from ..use_cases.list_goals import list_goals
 from ..use_cases.list_incomes import list_incomes
+from ..use_cases.report_period import period_totals
 
 bp = Blueprint("reports", __name__)
 
+MAX_REPORT_PERIOD_MONTHS = 600
+
 
 @bp.get("/relatorios/mes")
 def report_month():
@@ -30,24 +36,99 @@ def report_month():
     if not month or not year:
         raise bad_request("mes e ano são obrigatórios.")
     report = build_month_report(month, year)
+    return jsonify(_deflate_month_report(report))
+
+
+def _period_arg(name: str) -> int:
+    try:
+        return parse_period(request.args.get(name, ""))
+    except ValueError as exc:
+        raise bad_request(f"{name}: {exc}")
+
+
+def _deflation_args() -> tuple[int, str] | None:
+    """``(mês-base, série)`` quando a requisição pede valores deflacionados."""
+    if not request.args.get("deflacionar"):
+        return None
+    return _period_arg("deflacionar"), parse_series(request.args.get("serie"))
+
+
+def _deflation_factors(base: int, series: str, periods: list[int]):
+    try:
+        return deflation_factors(state.price_index_repo.values_by_period(series), base, periods)
+    except ValueError as exc:
+        raise bad_request(f"Não foi possível deflacionar pela série {series}. {exc}")
+
+
+def _period_label(index: int) -> str:
+    month, year = from_month_index(index)
+    return f"{year}-{month:02d}"
+
+
+def _deflate_month_report(report: dict) -> dict:
+    """Com ``deflacionar=AAAA-MM``, converte os totais para a moeda do mês-base; metas seguem nominais."""
+    deflation = _deflation_args()
+    if deflation is None:
+        return report
+    base, series = deflation
+    factor = float(_deflation_factors(base, series, [month_index(report["month"], report["year"])])[0])
+    for key in ("total_expenses", "total_incomes", "balance"):
+        report[key] = round(report[key] * factor, 2)
+    report["by_category"] = {name: round(value * factor, 2) for name, value in report["by_category"].items()}
+    report["deflacao"] = {"serie": series, "base": _period_label(base), "fator": round(factor, 6)}
+    return report
+
+
+@bp.get("/relatorios/periodo")
+def report_period():
+    first = _period_arg("inicio")
+    last = _period_arg("fim")
+    if last < first:
+        raise bad_request("fim deve ser igual ou posterior a inicio.")
+    if last - first + 1 > MAX_REPORT_PERIOD_MONTHS:
+        raise bad_request(f"O período deve ter no máximo {MAX_REPORT_PERIOD_MONTHS} meses.")
+    totals = period_totals(state.expense_repo, state.income_repo, state.recurrence_repo, first, last)
+    report = {"inicio": _period_label(first), "fim": _period_label(last)}
+    deflation = _deflation_args()
+    if deflation is not None:
+        base, series = deflation
+        factors = _deflation_factors(base, series, list(range(first, last + 1)))
+        totals = deflate(totals, factors)
+        report["deflacao"] = {"serie": series, "base": _period_label(base)}
+    incomes, expenses = totals["entradas"], totals["gastos"]
+    report["total_incomes"] = round(float(incomes.sum()), 2)
+    report["total_expenses"] = round(float(expenses.sum()), 2)
+    report["balance"] = round(float(incomes.sum() - expenses.sum()), 2)
+    report["meses"] = [
+        {
+            "month": month,
+            "year": year,
+            "total_incomes": round(float(incomes[offset]), 2),
+            "total_expenses": round(float(expenses[offset]), 2),
+            "balance": round(float(incomes[offset] - expenses[offset]), 2),
+            **({"fator": round(float(factors[offset]), 6)} if deflation is not None else {}),
+        }
+        for offset, (month, year) in enumerate(from_month_index(index) for index in range(first, last + 1))
+    ]
     return jsonify(report)
 
 
 def build_month_report(month: int, year: int) -> dict:
-    expenses = list_expenses(state.expense_repo, month=month, year=year)
-    incomes = list_incomes(state.income_repo, month=month, year=year)
+    expenses = list_expenses(state.expense_repo, month=month, year=year, recurrence_repo=state.recurrence_repo)
+    incomes = list_incomes(state.income_repo, month=month, year=year, recurrence_repo=state.recurrence_repo)
     categories = {category.id: category.name for category in list_categories(state.category_repo)}
-    total_expenses = sum(expense.value for expense in expenses)
-    total_incomes = sum(income.value for income in incomes)
+    # Somas em centavos: exatas, sem arredondar a cada passo.
+    total_expenses = sum(to_cents(expense.value) for expense in expenses)
+    total_incomes = sum(to_cents(income.value) for income in incomes)
     by_category = {}
     for expense in expenses:
         label = categories.get(expense.category_id, "Sem categoria")
-        by_category[label] = by_category.get(label, 0) + expense.value
+        by_category[label] = by_category.get(label, 0) + to_cents(expense.value)
     goals = list_goals(state.goal_repo, month=month, year=year)
     goal_status = []
     for goal in goals:
         if goal.category_id:
-            spent = sum(exp.value for exp in expenses if exp.category_id == goal.category_id)
+            spent = sum(to_cents(exp.value) for exp in expenses if exp.category_id == goal.category_id)
         else:
             spent = total_expenses
         goal_status.append(
@@ -55,17 +136,17 @@ def build_month_report(month: int, year: int) -> dict:
                 "id": goal.id,
                 "name": goal.name,
                 "limit_value": goal.limit_value,
-                "spent": round(spent, 2),
-                "remaining": round(goal.limit_value - spent, 2),
+                "spent": from_cents(spent),
+                "remaining": from_cents(to_cents(goal.limit_value) - spent),
             }
         )
     return {
         "month": month,
         "year": year,
-        "total_expenses": round(total_expenses, 2),
-        "total_incomes": round(total_incomes, 2),
-        "balance": round(total_incomes - total_expenses, 2),
-        "by_category": by_category,
+        "total_expenses": from_cents(total_expenses),
+        "total_incomes": from_cents(total_incomes),
+        "balance": from_cents(total_incomes - total_expenses),
+        "by_category": {label: from_cents(total) for label, total in by_category.items()},
         "goals": goal_status,
     }
 
@@ -76,7 +157,7 @@ def report_month_csv():
     year = request.args.get("ano", type=int)
     if not month or not year:
         raise bad_request("mes e ano são obrigatórios.")
-    report = build_month_report(month, year)
+    report = _deflate_month_report(build_month_report(month, year))
     buffer = StringIO()
     writer = csv.writer(buffer)
     writer.writerow(["tipo", "nome", "valor", "extra"])
@@ -360,8 +441,8 @@ def report_month_pdf():
         raise bad_request("mes e ano são obrigatórios.")
 
     report = build_month_report(month, year)
-    expenses = list_expenses(state.expense_repo, month=month, year=year)
-    incomes = list_incomes(state.income_repo, month=month, year=year)
+    expenses = list_expenses(state.expense_repo, month=month, year=year, recurrence_repo=state.recurrence_repo)
+    incomes = list_incomes(state.income_repo, month=month, year=year, recurrence_repo=state.recurrence_repo)
     categories = {category.id: category.name for category in list_categories(state.category_repo)}
 
     issued_at = datetime.now()
@@ -16,3 +16,11 @@ def ensure_card_exists(card_id: int | None) -> None:
         return
     if not state.card_repo or not state.card_repo.get(card_id):
         raise ValueError("Cartão não encontrado.")
+
+
+def skip_occurrence(recurrence_id: int | None, month: int, year: int) -> None:
+    """Impede que uma ocorrência removida volte a ser calculada ou gerada."""
+    if recurrence_id is None:
+        return
+    if state.recurrence_repo.get(recurrence_id):
+        state.recurrence_repo.skip_occurrence(recurrence_id, month, year)
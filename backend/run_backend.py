@@ -1,11 +1,21 @@
 """Entry point para o backend empacotado (PyInstaller)."""
 from __future__ import annotations
 
+import multiprocessing
 import os
+import signal
+import sys
 
-from backend.app import app
+from backend.app import app, start_background_services
+from backend.server import serve
 
 
 if __name__ == "__main__":
+    # Necessário para o pool de processos compartilhado (spawn) no executável congelado.
+    multiprocessing.freeze_support()
     debug_mode = os.environ.get("SAVEYOURMONEY_DEBUG") == "1"
-    app.run(port=5000, debug=debug_mode, use_reloader=debug_mode)
+    # Encerramento pelo Electron vira saída limpa, executando o backup final via atexit.
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    if not debug_mode or os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        start_background_services()
+    serve(app, debug=debug_mode)
@@ -62,7 +62,7 @@ class IncomeUpdate:
             notes=pick(data, "notes", "observacao", default=existing.notes),
         )
 
-    def to_entity(self, income_id: int) -> Income:
+    def to_entity(self, income_id: int, recurrence_id: int | None = None) -> Income:
         return Income(
             id=income_id,
             name=self.name,
@@ -70,5 +70,6 @@ class IncomeUpdate:
             month=self.month,
             year=self.year,
             confirmed=self.confirmed,
+            recurrence_id=recurrence_id,
             notes=self.notes,
         )
@@ -0,0 +1,90 @@
+"""DTOs for installments and invoices."""
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from .common import parse_float, parse_int, pick
+from ..domain.entities import INSTALLMENT_PAID, INSTALLMENT_STATUSES, Installment, InstallmentPlan
+
+
+def parse_status(raw_value, default: str) -> str:
+    status = str(raw_value or default).strip().lower()
+    if status not in INSTALLMENT_STATUSES:
+        raise ValueError(f"Status inválido. Use {', '.join(INSTALLMENT_STATUSES)}.")
+    return status
+
+
+@dataclass(frozen=True)
+class InvoicePayment:
+    card_id: int
+    month: int
+    year: int
+
+    @classmethod
+    def from_payload(cls, data: dict) -> "InvoicePayment":
+        month = parse_int(pick(data, "month", "mes"), "Mês")
+        if not 1 <= month <= 12:
+            raise ValueError("Mês deve estar entre 1 e 12.")
+        return cls(
+            card_id=parse_int(pick(data, "card_id", "cartao_id"), "Cartão"),
+            month=month,
+            year=parse_int(pick(data, "year", "ano"), "Ano"),
+        )
+
+
+@dataclass(frozen=True)
+class InstallmentStatusUpdate:
+    ids: list[int]
+    status: str
+
+    @classmethod
+    def from_payload(cls, data: dict) -> "InstallmentStatusUpdate":
+        raw_ids = data.get("ids")
+        if not isinstance(raw_ids, list) or not raw_ids:
+            raise ValueError("ids deve ser uma lista não vazia.")
+        ids = list(dict.fromkeys(parse_int(item, "ID da parcela") for item in raw_ids))
+        return cls(ids=ids, status=parse_status(data.get("status"), INSTALLMENT_PAID))
+
+
+@dataclass(frozen=True)
+class InstallmentPlanUpdate:
+    expense_name: str
+    total_value: float
+    installments: int
+
+    @classmethod
+    def from_payload(cls, data: dict, existing: InstallmentPlan) -> "InstallmentPlanUpdate":
+        name = pick(data, "expense_name", "name", "nome", default=existing.expense_name)
+        total_value = pick(data, "total_value", "value", "valor", default=existing.total_value)
+        installments = pick(data, "installments", "total", "total_parcelas", default=existing.installments)
+        return cls(
+            expense_name=str(name or "").strip(),
+            total_value=parse_float(total_value, "Valor"),
+            installments=parse_int(installments, "Total de parcelas"),
+        )
+
+    def to_entity(self, existing: InstallmentPlan) -> InstallmentPlan:
+        return InstallmentPlan(
+            id=existing.id,
+            card_id=existing.card_id,
+            expense_name=self.expense_name,
+            total_value=self.total_value,
+            installments=self.installments,
+            first_month=existing.first_month,
+            first_year=existing.first_year,
+            expense_id=existing.expense_id,
+            rounding=existing.rounding,
+        )
+
+
+@dataclass(frozen=True)
+class PlanInstallmentUpdate:
+    status: str
+    value: float
+
+    @classmethod
+    def from_payload(cls, data: dict, existing: Installment) -> "PlanInstallmentUpdate":
+        value = parse_float(pick(data, "value", "valor", default=existing.value), "Valor")
+        if value < 0:
+            raise ValueError("Valor da parcela não pode ser negativo.")
+        return cls(status=parse_status(data.get("status"), existing.status), value=value)
@@ -5,6 +5,7 @@ from dataclasses import dataclass
 
 from .common import parse_float, parse_int, parse_optional_bool, parse_optional_int, parse_optional_str, parse_required_str, pick
 from ..domain.entities import Recurrence
+from ..domain.recurrence_rules import check_start_day, interval_for, parse_frequency
 
 
 @dataclass(frozen=True)
@@ -20,26 +21,33 @@ class RecurrenceCreate:
     payment_method: str | None
     confirmed: bool | None
     notes: str | None
+    virtual: bool
+    frequency: str = "mensal"
+    start_day: int = 1
 
     @classmethod
     def from_payload(cls, data: dict) -> "RecurrenceCreate":
         kind = parse_required_str(data, "kind", "tipo", field_name="Tipo de recorrência")
         name = parse_required_str(data, "name", "nome", field_name="Nome da recorrência")
+        frequency = parse_frequency(pick(data, "frequency", "frequencia"))
         return cls(
             kind=kind,
             name=name,
             value=parse_float(pick(data, "value", "valor"), "Valor"),
             start_month=parse_int(pick(data, "start_month", "mes_inicio"), "Mês inicial"),
             start_year=parse_int(pick(data, "start_year", "ano_inicio"), "Ano inicial"),
-            interval_months=parse_int(
-                pick(data, "interval_months", "intervalo_meses", default=1),
-                "Intervalo de meses",
+            interval_months=interval_for(
+                frequency,
+                parse_optional_int(pick(data, "interval_months", "intervalo_meses"), "Intervalo de meses"),
             ),
             occurrences=parse_int(pick(data, "occurrences", "ocorrencias", default=12), "Ocorrências"),
             category_id=parse_optional_int(pick(data, "category_id", "categoria_id"), "Categoria"),
             payment_method=parse_optional_str(data, "payment_method", "forma"),
             confirmed=parse_optional_bool(pick(data, "confirmed", "confirmado")),
             notes=parse_optional_str(data, "notes", "observacao"),
+            virtual=bool(parse_optional_bool(pick(data, "virtual"))),
+            frequency=frequency,
+            start_day=check_start_day(parse_int(pick(data, "start_day", "dia_inicio", default=1), "Dia inicial")),
         )
 
     def to_entity(self) -> Recurrence:
@@ -55,6 +63,9 @@ class RecurrenceCreate:
             payment_method=self.payment_method,
             confirmed=self.confirmed,
             notes=self.notes,
+            virtual=self.virtual,
+            frequency=self.frequency,
+            start_day=self.start_day,
         )
 
 
@@ -71,21 +82,25 @@ class RecurrenceUpdate:
     payment_method: str | None
     confirmed: bool | None
     notes: str | None
+    virtual: bool
+    frequency: str = "mensal"
+    start_day: int = 1
 
     @classmethod
     def from_payload(cls, data: dict, existing: Recurrence) -> "RecurrenceUpdate":
         confirmed_raw = pick(data, "confirmed", "confirmado", default=existing.confirmed)
         confirmed = parse_optional_bool(confirmed_raw) if confirmed_raw is not None else existing.confirmed
+        frequency = parse_frequency(pick(data, "frequency", "frequencia", default=existing.frequency))
+        # Ao trocar a frequência sem informar o intervalo, vale o padrão da nova frequência.
+        default_interval = existing.interval_months if frequency == existing.frequency else None
+        interval_raw = pick(data, "interval_months", "intervalo_meses", default=default_interval)
         return cls(
             kind=pick(data, "kind", "tipo", default=existing.kind),
             name=pick(data, "name", "nome", default=existing.name),
             value=parse_float(pick(data, "value", "valor", default=existing.value), "Valor"),
             start_month=parse_int(pick(data, "start_month", "mes_inicio", default=existing.start_month), "Mês inicial"),
             start_year=parse_int(pick(data, "start_year", "ano_inicio", default=existing.start_year), "Ano inicial"),
-            interval_months=parse_int(
-                pick(data, "interval_months", "intervalo_meses", default=existing.interval_months),
-                "Intervalo de meses",
-            ),
+            interval_months=interval_for(frequency, parse_optional_int(interval_raw, "Intervalo de meses")),
             occurrences=parse_int(pick(data, "occurrences", "ocorrencias", default=existing.occurrences), "Ocorrências"),
             category_id=parse_optional_int(
                 pick(data, "category_id", "categoria_id", default=existing.category_id),
@@ -94,6 +109,11 @@ class RecurrenceUpdate:
             payment_method=pick(data, "payment_method", "forma", default=existing.payment_method),
             confirmed=confirmed,
             notes=pick(data, "notes", "observacao", default=existing.notes),
+            virtual=bool(parse_optional_bool(pick(data, "virtual", default=existing.virtual))),
+            frequency=frequency,
+            start_day=check_start_day(
+                parse_int(pick(data, "start_day", "dia_inicio", default=existing.start_day), "Dia inicial")
+            ),
         )
 
     def to_entity(self, recurrence_id: int) -> Recurrence:
@@ -110,4 +130,7 @@ class RecurrenceUpdate:
             payment_method=self.payment_method,
             confirmed=self.confirmed,
             notes=self.notes,
+            virtual=self.virtual,
+            frequency=self.frequency,
+            start_day=self.start_day,
         )
@@ -0,0 +1,81 @@
+"""Execução do servidor HTTP: waitress multithread em produção, Flask em debug."""
+from __future__ import annotations
+
+import logging
+import os
+from typing import Any, Dict, Optional
+
+from flask import Flask
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 5000
+DEFAULT_THREADS = 8
+MAX_THREADS = 64
+
+logger = logging.getLogger(__name__)
+
+
+def configured_threads() -> int:
+    """Threads do servidor em ``SAVEYOURMONEY_THREADS`` (padrão 8, entre 1 e 64)."""
+    raw_value = os.environ.get("SAVEYOURMONEY_THREADS", "").strip()
+    try:
+        threads = int(raw_value) if raw_value else DEFAULT_THREADS
+    except ValueError:
+        logger.warning("SAVEYOURMONEY_THREADS inválido (%r); usando %d.", raw_value, DEFAULT_THREADS)
+        return DEFAULT_THREADS
+    return min(max(threads, 1), MAX_THREADS)
+
+
+class ServerStatus:
+    """Modo do servidor e fila de requisições, exibidos em ``/health``.
+
+    ``queue_depth`` é o número de requisições já recebidas esperando uma thread
+    livre; ``active_threads`` são as threads atendendo requisições agora.
+    """
+
+    def __init__(self, mode: str, threads: int, dispatcher: Any = None) -> None:
+        self.mode = mode
+        self.threads = threads
+        self.dispatcher = dispatcher
+
+    def status(self) -> Dict[str, Any]:
+        dispatcher = self.dispatcher
+        return {
+            "mode": self.mode,
+            "threads": self.threads,
+            "queue_depth": len(dispatcher.queue) if dispatcher is not None else None,
+            "active_threads": max(dispatcher.active_count, 0) if dispatcher is not None else None,
+        }
+
+
+def create_production_server(app: Flask, *, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, threads: Optional[int] = None):
+    """Cria o servidor waitress sem iniciá-lo e registra o status em ``state``."""
+    from waitress import create_server
+
+    from . import state
+
+    threads = threads or configured_threads()
+    server = create_server(app, host=host, port=port, threads=threads, ident="SaveYourMoney")
+    state.server_status = ServerStatus("waitress", threads, server.task_dispatcher)
+    return server
+
+
+def serve(app: Flask, *, debug: bool = False, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> None:
+    """Atende requisições até o processo ser encerrado.
+
+    Em debug usa o servidor de desenvolvimento do Flask com recarga; caso
+    contrário, waitress com ``SAVEYOURMONEY_THREADS`` threads. Sem waitress
+    instalado, cai para o servidor do Flask com uma thread por requisição.
+    """
+    from . import state
+
+    if not debug:
+        try:
+            server = create_production_server(app, host=host, port=port)
+        except ImportError:
+            logger.warning("waitress não está instalado; usando o servidor de desenvolvimento do Flask.")
+        else:
+            server.run()
+            return
+    state.server_status = ServerStatus("flask", 0)
+    app.run(host=host, port=port, debug=debug, use_reloader=debug, threaded=True)
@@ -0,0 +1,108 @@
+"""Tabelas de amortização nos sistemas Price e SAC.
+
+Cada coluna é calculada de uma vez, com operações de array sobre o vetor de
+períodos ``k = 1..n`` e as fórmulas fechadas de cada sistema:
+
+- Price: parcela fixa ``P * r / (1 - (1 + r) ** -n)``; saldo após ``k``
+  pagamentos ``P * (1 + r) ** k - parcela * ((1 + r) ** k - 1) / r``.
+- SAC: amortização fixa ``P / n``; saldo após ``k`` pagamentos
+  ``P - k * P / n``.
+
+Em ambos os juros do período são ``r`` vezes o saldo anterior.
+"""
+from __future__ import annotations
+
+import csv
+from dataclasses import dataclass
+from io import StringIO
+from typing import Dict, Iterator
+
+import numpy as np
+
+AMORTIZATION_SYSTEMS = ("price", "sac")
+MAX_AMORTIZATION_MONTHS = 420
+CSV_HEADER = ("mes", "parcela", "juros", "amortizacao", "saldo")
+
+
+@dataclass(frozen=True)
+class AmortizationSchedule:
+    system: str
+    payment: np.ndarray
+    interest: np.ndarray
+    principal: np.ndarray
+    balance: np.ndarray
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "total_pago": round(float(self.payment.sum()), 2),
+            "total_juros": round(float(self.interest.sum()), 2),
+        }
+
+    def rows(self) -> list:
+        """Linhas ``{mes, parcela, juros, amortizacao, saldo}`` arredondadas em centavos."""
+        columns = [np.round(column, 2).tolist() for column in (self.payment, self.interest, self.principal, self.balance)]
+        return [
+            {"mes": month, "parcela": payment, "juros": interest, "amortizacao": principal, "saldo": balance}
+            for month, (payment, interest, principal, balance) in enumerate(zip(*columns), start=1)
+        ]
+
+    def csv_lines(self) -> Iterator[str]:
+        """Gera o CSV linha a linha, para respostas em streaming."""
+        buffer = StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(CSV_HEADER)
+        for row in self.rows():
+            writer.writerow(row.values())
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+
+def parse_system(raw_value: object) -> str:
+    system = str(raw_value or "price").strip().lower()
+    if system not in AMORTIZATION_SYSTEMS:
+        raise ValueError(f"Sistema de amortização inválido. Use {', '.join(AMORTIZATION_SYSTEMS)}.")
+    return system
+
+
+def amortization_schedule(
+    principal: float,
+    monthly_rate_percent: float,
+    months: int,
+    system: str = "price",
+) -> AmortizationSchedule:
+    if principal <= 0:
+        raise ValueError("Valor financiado deve ser maior que zero.")
+    if not 1 <= months <= MAX_AMORTIZATION_MONTHS:
+        raise ValueError(f"Quantidade de meses deve estar entre 1 e {MAX_AMORTIZATION_MONTHS}.")
+    if monthly_rate_percent < 0:
+        raise ValueError("Taxa mensal não pode ser negativa.")
+    system = parse_system(system)
+    rate = monthly_rate_percent / 100.0
+    periods = np.arange(1, months + 1, dtype=float)
+    if system == "sac":
+        amortization = principal / months
+        balance = principal - periods * amortization
+        payments_principal = np.full(months, amortization)
+    elif rate == 0:
+        payment_value = principal / months
+        balance = principal - periods * payment_value
+        payments_principal = np.full(months, payment_value)
+    else:
+        growth = (1 + rate) ** periods
+        payment_value = principal * rate / (1 - (1 + rate) ** -months)
+        balance = principal * growth - payment_value * (growth - 1) / rate
+        payments_principal = None
+    balance[-1] = 0.0
+    previous = np.concatenate(([principal], balance[:-1]))
+    interest = previous * rate
+    if payments_principal is None:
+        payments_principal = previous - balance
+    balance = np.maximum(balance, 0.0)
+    return AmortizationSchedule(
+        system=system,
+        payment=payments_principal + interest,
+        interest=interest,
+        principal=payments_principal,
+        balance=balance,
+    )
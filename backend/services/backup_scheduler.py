@@ -0,0 +1,73 @@
+"""Agendador de backups automáticos executado em thread de segundo plano."""
+from __future__ import annotations
+
+from datetime import datetime
+import glob
+import os
+from typing import Any
+
+from .backup_service import create_database_snapshot, pending_changes
+from .periodic_worker import PeriodicWorker
+
+SCHEDULED_PREFIX = "saveyourmoney_auto"
+
+
+class BackupScheduler(PeriodicWorker):
+    """Gera snapshots online em intervalo fixo e no encerramento do processo.
+
+    A execução é ignorada quando nenhuma linha mudou desde o último backup
+    (sequência do ``change_log``). A cópia é feita em passos curtos para não
+    bloquear as requisições que usam o mesmo banco.
+    """
+
+    thread_name = "backup-scheduler"
+
+    def __init__(
+        self,
+        db_path: str,
+        backup_dir: str,
+        interval_seconds: float,
+        *,
+        keep: int = 10,
+        pages_per_step: int = 256,
+    ) -> None:
+        super().__init__(interval_seconds)
+        self.db_path = db_path
+        self.backup_dir = backup_dir
+        self.keep = keep
+        self.pages_per_step = pages_per_step
+        self._status["last_backup"] = None
+
+    def stop(self, *, final_backup: bool = True) -> None:
+        super().stop()
+        if final_backup and self.interval_seconds > 0:
+            self.run_once()
+
+    def run_once(self) -> dict[str, Any]:
+        started_at = datetime.now().isoformat(timespec="seconds")
+        try:
+            if not os.path.exists(self.db_path) or not pending_changes(self.db_path):
+                self._update(last_run=started_at, last_status="skipped", last_error=None)
+                return self.status()
+            result = create_database_snapshot(
+                self.db_path,
+                self.backup_dir,
+                prefix=SCHEDULED_PREFIX,
+                pages=self.pages_per_step,
+                sleep=0.01,
+            )
+            self._prune_old_snapshots()
+            self._update(last_run=started_at, last_status="ok", last_backup=result["backup"], last_error=None)
+        except Exception as exc:
+            self._update(last_run=started_at, last_status="error", last_error=str(exc))
+        return self.status()
+
+    def _prune_old_snapshots(self) -> None:
+        if self.keep <= 0:
+            return
+        snapshots = sorted(glob.glob(os.path.join(self.backup_dir, f"{SCHEDULED_PREFIX}_*.db")))
+        for path in snapshots[: -self.keep]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
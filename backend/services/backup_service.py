@@ -1,19 +1,135 @@
-﻿"""Serviços de exportação e restauração de backup JSON."""
+"""Serviços de exportação e restauração de backup JSON."""
 from __future__ import annotations
 
 from dataclasses import asdict
-from datetime import datetime
+from datetime import datetime, timezone
+import json
+import os
 import sqlite3
-from typing import Any
-
-from ..domain.entities import Card, Category, Expense, Goal, Income, Installment, Recurrence
+from typing import Any, Callable
+
+from ..domain.entities import (
+    Card,
+    Category,
+    Expense,
+    Goal,
+    Income,
+    Installment,
+    InstallmentPlan,
+    PriceIndex,
+    Recurrence,
+    SkippedOccurrence,
+)
+from ..domain.value_objects import from_cents, to_cents
+from ..repositories.sqlite.change_log import current_change_seq, prune_change_log
+from ..repositories.sqlite.money import CENTS_EXPRESSION
+from .process_pool import map_in_pool
 
 BACKUP_VERSION = "1.0"
 SUPPORTED_BACKUP_MAJOR = "1"
+# Gravado em ``PRAGMA user_version`` dos snapshots .db; snapshots antigos têm 0.
+# Versão 2: valores monetários em centavos inteiros.
+SCHEMA_VERSION = 2
+
+# Tabelas de domínio na ordem de restauração, com as colunas persistidas.
+BACKUP_TABLES: dict[str, tuple[str, ...]] = {
+    "categories": ("id", "name", "description"),
+    "cards": ("id", "name", "limit_value", "bank", "brand", "closing_day", "due_day"),
+    "recurrences": (
+        "id",
+        "kind",
+        "name",
+        "value",
+        "start_month",
+        "start_year",
+        "interval_months",
+        "occurrences",
+        "category_id",
+        "payment_method",
+        "confirmed",
+        "notes",
+        "virtual",
+        "frequency",
+        "start_day",
+    ),
+    "skipped_occurrences": ("id", "recurrence_id", "month", "year"),
+    "expenses": (
+        "id",
+        "name",
+        "value",
+        "month",
+        "year",
+        "category_id",
+        "recurrence_id",
+        "payment_method",
+        "notes",
+    ),
+    "incomes": ("id", "name", "value", "month", "year", "confirmed", "recurrence_id", "notes"),
+    "installment_plans": (
+        "id",
+        "card_id",
+        "expense_name",
+        "total_value",
+        "installments",
+        "first_month",
+        "first_year",
+        "expense_id",
+        "rounding",
+    ),
+    "installments": (
+        "id",
+        "card_id",
+        "expense_name",
+        "installment_number",
+        "total_installments",
+        "value",
+        "month",
+        "year",
+        "status",
+        "plan_id",
+    ),
+    "goals": ("id", "name", "limit_value", "month", "year", "category_id"),
+    "price_indices": ("id", "series", "month", "year", "value"),
+}
+# Referências entre tabelas (coluna, tabela referenciada); o esquema não declara FOREIGN KEY.
+FOREIGN_KEYS: dict[str, tuple[tuple[str, str], ...]] = {
+    "recurrences": (("category_id", "categories"),),
+    "skipped_occurrences": (("recurrence_id", "recurrences"),),
+    "expenses": (("category_id", "categories"), ("recurrence_id", "recurrences")),
+    "incomes": (("recurrence_id", "recurrences"),),
+    "installment_plans": (("card_id", "cards"), ("expense_id", "expenses")),
+    "installments": (("card_id", "cards"), ("plan_id", "installment_plans")),
+    "goals": (("category_id", "categories"),),
+}
+# Colunas cujo nome difere do campo da entidade e colunas booleanas gravadas como 0/1.
+COLUMN_FIELDS: dict[str, dict[str, str]] = {"cards": {"limit_value": "limit"}}
+BOOL_COLUMNS: dict[str, frozenset[str]] = {
+    "incomes": frozenset({"confirmed"}),
+    "recurrences": frozenset({"confirmed", "virtual"}),
+}
+# Colunas gravadas em centavos; o JSON (inclusive o incremental) usa reais.
+MONEY_COLUMNS: dict[str, frozenset[str]] = {
+    "cards": frozenset({"limit_value"}),
+    "recurrences": frozenset({"value"}),
+    "expenses": frozenset({"value"}),
+    "incomes": frozenset({"value"}),
+    "installment_plans": frozenset({"total_value"}),
+    "installments": frozenset({"value"}),
+    "goals": frozenset({"limit_value"}),
+}
+# Tabelas com índice único por ocorrência de recorrência.
+OCCURRENCE_TABLES = frozenset({"expenses", "incomes"})
 
 
 class BackupValidationError(ValueError):
-    """Erro de validação do payload de backup."""
+    """Erro de validação do payload de backup.
+
+    ``errors`` lista cada problema encontrado com a coleção e o índice do item.
+    """
+
+    def __init__(self, message: str, errors: list[dict[str, Any]] | None = None) -> None:
+        super().__init__(message)
+        self.errors = errors or []
 
 
 def export_backup_payload(
@@ -25,10 +141,14 @@ def export_backup_payload(
     incomes: list[Income],
     installments: list[Installment],
     recurrences: list[Recurrence],
+    skipped_occurrences: list[SkippedOccurrence] | None = None,
+    installment_plans: list[InstallmentPlan] | None = None,
+    price_indices: list[PriceIndex] | None = None,
+    change_seq: int | None = None,
 ) -> dict[str, Any]:
-    return {
+    payload = {
         "version": BACKUP_VERSION,
-        "exportedAt": datetime.utcnow().date().isoformat(),
+        "exportedAt": datetime.now(timezone.utc).date().isoformat(),
         "cards": [asdict(item) for item in cards],
         "expenses": [asdict(item) for item in expenses],
         "recurringExpenses": [asdict(item) for item in recurrences],
@@ -38,154 +158,54 @@ def export_backup_payload(
         "goals": [asdict(item) for item in goals],
         "settings": {},
     }
-
-
-def restore_backup_payload(db_path: str, payload: Any) -> dict[str, int]:
+    if skipped_occurrences is not None:
+        payload["skippedOccurrences"] = [asdict(item) for item in skipped_occurrences]
+    if installment_plans is not None:
+        payload["installmentPlans"] = [asdict(item) for item in installment_plans]
+    if price_indices is not None:
+        payload["priceIndices"] = [asdict(item) for item in price_indices]
+    if change_seq is not None:
+        payload["changeSeq"] = change_seq
+    return payload
+
+
+def restore_backup_payload(
+    db_path: str,
+    payload: Any,
+    incrementals: list[Any] | None = None,
+) -> dict[str, int]:
     data = _validate_payload(payload)
-    categories = [_parse_category(item) for item in data["categories"]]
-    cards = [_parse_card(item) for item in data["cards"]]
-    expenses = [_parse_expense(item) for item in data["expenses"]]
-    recurrences = [_parse_recurrence(item) for item in data["recurrences"]]
-    incomes = [_parse_income(item) for item in data["incomes"]]
-    installments = [_parse_installment(item) for item in data["installments"]]
-    goals = [_parse_goal(item) for item in data["goals"]]
-
-    _validate_relationships(
-        categories=categories,
-        cards=cards,
-        expenses=expenses,
-        recurrences=recurrences,
-        goals=goals,
-        installments=installments,
-    )
+    incrementals = incrementals or []
+    if incrementals and not isinstance(data["changeSeq"], int):
+        raise BackupValidationError("Backups incrementais exigem um backup completo com 'changeSeq'.")
+    for incremental in incrementals:
+        _validate_incremental(incremental)
+    parsed = _parse_collections(data)
+    _validate_relationships(**parsed)
 
     conn = sqlite3.connect(db_path)
     try:
         conn.execute("PRAGMA foreign_keys = OFF")
         conn.execute("BEGIN")
 
-        tables = [
-            "installments",
-            "expenses",
-            "incomes",
-            "recurrences",
-            "goals",
-            "cards",
-            "categories",
-        ]
-        for table in tables:
+        for table in reversed(BACKUP_TABLES):
             conn.execute(f"DELETE FROM {table}")
-
-        for category in categories:
-            conn.execute(
-                "INSERT INTO categories (id, name, description) VALUES (?, ?, ?)",
-                (category.id, category.name, category.description),
-            )
-
-        for card in cards:
-            conn.execute(
-                (
-                    "INSERT INTO cards "
-                    "(id, name, limit_value, bank, brand, closing_day, due_day) "
-                    "VALUES (?, ?, ?, ?, ?, ?, ?)"
-                ),
-                (card.id, card.name, card.limit, card.bank, card.brand, card.closing_day, card.due_day),
-            )
-
-        for expense in expenses:
-            conn.execute(
-                (
-                    "INSERT INTO expenses "
-                    "(id, name, value, month, year, category_id, recurrence_id, payment_method, notes) "
-                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
-                ),
-                (
-                    expense.id,
-                    expense.name,
-                    expense.value,
-                    expense.month,
-                    expense.year,
-                    expense.category_id,
-                    expense.recurrence_id,
-                    expense.payment_method,
-                    expense.notes,
-                ),
-            )
-
-        for income in incomes:
-            conn.execute(
-                "INSERT INTO incomes (id, name, value, month, year, confirmed, notes) VALUES (?, ?, ?, ?, ?, ?, ?)",
-                (income.id, income.name, income.value, income.month, income.year, int(income.confirmed), income.notes),
-            )
-
-        for recurrence in recurrences:
-            conn.execute(
-                (
-                    "INSERT INTO recurrences "
-                    "(id, kind, name, value, start_month, start_year, interval_months, occurrences, "
-                    "category_id, payment_method, confirmed, notes) "
-                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
-                ),
-                (
-                    recurrence.id,
-                    recurrence.kind,
-                    recurrence.name,
-                    recurrence.value,
-                    recurrence.start_month,
-                    recurrence.start_year,
-                    recurrence.interval_months,
-                    recurrence.occurrences,
-                    recurrence.category_id,
-                    recurrence.payment_method,
-                    None if recurrence.confirmed is None else int(recurrence.confirmed),
-                    recurrence.notes,
-                ),
-            )
-
-        for installment in installments:
-            conn.execute(
-                (
-                    "INSERT INTO installments "
-                    "(id, card_id, expense_name, installment_number, total_installments, value, month, year, status) "
-                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
-                ),
-                (
-                    installment.id,
-                    installment.card_id,
-                    installment.expense_name,
-                    installment.installment_number,
-                    installment.total_installments,
-                    installment.value,
-                    installment.month,
-                    installment.year,
-                    installment.status,
-                ),
-            )
-
-        for goal in goals:
-            conn.execute(
-                "INSERT INTO goals (id, name, limit_value, month, year, category_id) VALUES (?, ?, ?, ?, ?, ?)",
-                (goal.id, goal.name, goal.limit_value, goal.month, goal.year, goal.category_id),
-            )
-
-        _reset_sequences(conn, "categories", categories)
-        _reset_sequences(conn, "cards", cards)
-        _reset_sequences(conn, "expenses", expenses)
-        _reset_sequences(conn, "incomes", incomes)
-        _reset_sequences(conn, "recurrences", recurrences)
-        _reset_sequences(conn, "installments", installments)
-        _reset_sequences(conn, "goals", goals)
+        for table in BACKUP_TABLES:
+            _insert_entities(conn, table, parsed[table])
+            _reset_sequences(conn, table, parsed[table])
+
+        counts = {table: len(parsed[table]) for table in BACKUP_TABLES}
+        base_seq = data["changeSeq"]
+        for incremental in incrementals:
+            if incremental["baseSeq"] != base_seq:
+                raise BackupValidationError("Sequência de backups incrementais fora de ordem.")
+            _apply_incremental(conn, incremental)
+            base_seq = incremental["changeSeq"]
+        if incrementals:
+            counts["incrementals"] = len(incrementals)
 
         conn.commit()
-        return {
-            "cards": len(cards),
-            "categories": len(categories),
-            "expenses": len(expenses),
-            "incomes": len(incomes),
-            "recurrences": len(recurrences),
-            "installments": len(installments),
-            "goals": len(goals),
-        }
+        return counts
     except Exception:
         conn.rollback()
         raise
@@ -228,43 +248,43 @@ def _validate_payload(payload: Any) -> dict[str, Any]:
     if not isinstance(goals, list):
         raise BackupValidationError("Arquivo inválido: campo 'goals' deve ser uma lista.")
 
+    skipped = payload.get("skippedOccurrences", [])
+    if not isinstance(skipped, list):
+        raise BackupValidationError("Arquivo inválido: campo 'skippedOccurrences' deve ser uma lista.")
+
+    plans = payload.get("installmentPlans", [])
+    if not isinstance(plans, list):
+        raise BackupValidationError("Arquivo inválido: campo 'installmentPlans' deve ser uma lista.")
+
+    price_indices = payload.get("priceIndices", [])
+    if not isinstance(price_indices, list):
+        raise BackupValidationError("Arquivo inválido: campo 'priceIndices' deve ser uma lista.")
+
     settings = payload.get("settings", {})
     if not isinstance(settings, dict):
         raise BackupValidationError("Arquivo inválido: campo 'settings' deve ser um objeto.")
 
+    change_seq = payload.get("changeSeq")
+    if change_seq is not None and (isinstance(change_seq, bool) or not isinstance(change_seq, int)):
+        raise BackupValidationError("Arquivo inválido: campo 'changeSeq' deve ser um inteiro.")
+
     return {
         "version": version,
+        "changeSeq": change_seq,
         "cards": payload["cards"],
         "expenses": payload["expenses"],
         "categories": payload["categories"],
         "recurrences": recurring,
+        "skipped_occurrences": skipped,
         "incomes": incomes,
+        "installment_plans": plans,
         "installments": installments,
         "goals": goals,
+        "price_indices": price_indices,
         "settings": settings,
     }
 
 
-def _parse_record(item: Any, field_name: str) -> dict[str, Any]:
-    if not isinstance(item, dict):
-        raise BackupValidationError(f"Arquivo inválido: item em '{field_name}' deve ser um objeto.")
-    return item
-
-
-def _require_int(item: dict[str, Any], field: str, collection: str) -> int:
-    try:
-        return int(item[field])
-    except (TypeError, ValueError, KeyError) as exc:
-        raise BackupValidationError(f"Campo '{field}' inválido em '{collection}'.") from exc
-
-
-def _require_float(item: dict[str, Any], field: str, collection: str) -> float:
-    try:
-        return float(item[field])
-    except (TypeError, ValueError, KeyError) as exc:
-        raise BackupValidationError(f"Campo '{field}' inválido em '{collection}'.") from exc
-
-
 def _optional_int(value: Any) -> int | None:
     if value is None or value == "":
         return None
@@ -284,158 +304,412 @@ def _optional_bool(value: Any) -> bool | None:
     raise ValueError("Valor booleano inválido.")
 
 
-def _parse_category(raw: Any) -> Category:
-    item = _parse_record(raw, "categories")
-    try:
-        return Category(
-            id=_require_int(item, "id", "categories"),
-            name=str(item["name"]),
-            description=item.get("description"),
-        )
-    except (TypeError, ValueError, KeyError) as exc:
-        raise BackupValidationError("Registro inválido em 'categories'.") from exc
+def _bool_default_true(value: Any) -> bool:
+    confirmed = _optional_bool(value)
+    return True if confirmed is None else confirmed
 
 
-def _parse_card(raw: Any) -> Card:
-    item = _parse_record(raw, "cards")
-    try:
-        return Card(
-            id=_require_int(item, "id", "cards"),
-            name=str(item["name"]),
-            limit=_require_float(item, "limit", "cards"),
-            bank=item.get("bank"),
-            brand=item.get("brand"),
-            closing_day=_require_int(item, "closing_day", "cards"),
-            due_day=_require_int(item, "due_day", "cards"),
-        )
-    except (TypeError, ValueError, KeyError) as exc:
-        raise BackupValidationError("Registro inválido em 'cards'.") from exc
+def _bool_default_false(value: Any) -> bool:
+    return bool(_optional_bool(value))
 
 
-def _parse_expense(raw: Any) -> Expense:
-    item = _parse_record(raw, "expenses")
-    try:
-        return Expense(
-            id=_require_int(item, "id", "expenses"),
-            name=str(item["name"]),
-            value=_require_float(item, "value", "expenses"),
-            month=_require_int(item, "month", "expenses"),
-            year=_require_int(item, "year", "expenses"),
-            category_id=_optional_int(item.get("category_id")),
-            recurrence_id=_optional_int(item.get("recurrence_id")),
-            payment_method=str(item.get("payment_method") or "debit"),
-            notes=item.get("notes"),
-        )
-    except (TypeError, ValueError, KeyError) as exc:
-        raise BackupValidationError("Registro inválido em 'expenses'.") from exc
+def _str_or(default: str) -> Callable[[Any], str]:
+    def coerce(value: Any) -> str:
+        return str(value or default)
 
+    return coerce
 
-def _parse_income(raw: Any) -> Income:
-    item = _parse_record(raw, "income")
-    try:
-        confirmed = _optional_bool(item.get("confirmed", True))
-        if confirmed is None:
-            confirmed = True
-        return Income(
-            id=_require_int(item, "id", "income"),
-            name=str(item["name"]),
-            value=_require_float(item, "value", "income"),
-            month=_require_int(item, "month", "income"),
-            year=_require_int(item, "year", "income"),
-            confirmed=confirmed,
-            notes=item.get("notes"),
-        )
-    except (TypeError, ValueError, KeyError) as exc:
-        raise BackupValidationError("Registro inválido em 'income'.") from exc
 
+def _identity(value: Any) -> Any:
+    return value
 
-def _parse_recurrence(raw: Any) -> Recurrence:
-    item = _parse_record(raw, "recurringExpenses")
-    confirmed = _optional_bool(item.get("confirmed"))
-    try:
-        return Recurrence(
-            id=_require_int(item, "id", "recurringExpenses"),
-            kind=str(item["kind"]),
-            name=str(item["name"]),
-            value=_require_float(item, "value", "recurringExpenses"),
-            start_month=_require_int(item, "start_month", "recurringExpenses"),
-            start_year=_require_int(item, "start_year", "recurringExpenses"),
-            interval_months=_require_int(item, "interval_months", "recurringExpenses"),
-            occurrences=_require_int(item, "occurrences", "recurringExpenses"),
-            category_id=_optional_int(item.get("category_id")),
-            payment_method=item.get("payment_method"),
-            confirmed=confirmed,
-            notes=item.get("notes"),
-        )
-    except (TypeError, ValueError, KeyError) as exc:
-        raise BackupValidationError("Registro inválido em 'recurringExpenses'.") from exc
 
+# Tamanho dos blocos validados em paralelo e mínimo de registros para usar o pool.
+VALIDATION_CHUNK_SIZE = 5_000
+PARALLEL_VALIDATION_THRESHOLD = 20_000
 
-def _parse_installment(raw: Any) -> Installment:
-    item = _parse_record(raw, "installments")
-    try:
-        return Installment(
-            id=_require_int(item, "id", "installments"),
-            card_id=_require_int(item, "card_id", "installments"),
-            expense_name=str(item["expense_name"]),
-            installment_number=_require_int(item, "installment_number", "installments"),
-            total_installments=_require_int(item, "total_installments", "installments"),
-            value=_require_float(item, "value", "installments"),
-            month=_require_int(item, "month", "installments"),
-            year=_require_int(item, "year", "installments"),
-            status=str(item.get("status") or "pendente"),
-        )
-    except (TypeError, ValueError, KeyError) as exc:
-        raise BackupValidationError("Registro inválido em 'installments'.") from exc
 
+class _RecordValidator:
+    """Validador compilado de uma coleção do backup.
 
-def _parse_goal(raw: Any) -> Goal:
-    item = _parse_record(raw, "goals")
-    try:
-        return Goal(
-            id=_require_int(item, "id", "goals"),
-            name=str(item["name"]),
-            limit_value=_require_float(item, "limit_value", "goals"),
-            month=_require_int(item, "month", "goals"),
-            year=_require_int(item, "year", "goals"),
-            category_id=_optional_int(item.get("category_id")),
-        )
-    except (TypeError, ValueError, KeyError) as exc:
-        raise BackupValidationError("Registro inválido em 'goals'.") from exc
-
+    A lista de campos (chave, coerção, obrigatoriedade) é montada uma única vez;
+    validar um item é só percorrer essa tupla, sem reconstruir lookups.
+    """
 
-def _validate_relationships(
+    def __init__(self, collection: str, factory: Callable[..., Any], fields: list[tuple]) -> None:
+        self.collection = collection
+        self._factory = factory
+        self._required = tuple((name, key, coerce) for name, key, coerce, required, _ in fields if required)
+        self._optional = tuple(
+            (name, key, coerce, default) for name, key, coerce, required, default in fields if not required
+        )
+        self._object_error = f"Arquivo inválido: item em '{collection}' deve ser um objeto."
+        self._record_error = f"Registro inválido em '{collection}'."
+        self._field_errors = {key: f"Campo '{key}' inválido em '{collection}'." for _, key, _ in self._required}
+
+    def parse(self, item: Any) -> Any:
+        if not isinstance(item, dict):
+            raise BackupValidationError(self._object_error)
+        values = {}
+        for name, key, coerce in self._required:
+            try:
+                values[name] = coerce(item[key])
+            except (TypeError, ValueError, KeyError) as exc:
+                raise BackupValidationError(self._field_errors[key]) from exc
+        try:
+            for name, key, coerce, default in self._optional:
+                values[name] = coerce(item.get(key, default))
+            return self._factory(**values)
+        except (TypeError, ValueError) as exc:
+            raise BackupValidationError(self._record_error) from exc
+
+    def validate(self, items: list[Any], offset: int = 0) -> tuple[list[Any], list[dict[str, Any]]]:
+        parsed = []
+        errors = []
+        parse = self.parse
+        for index, item in enumerate(items, start=offset):
+            try:
+                parsed.append(parse(item))
+            except BackupValidationError as exc:
+                errors.append({"collection": self.collection, "index": index, "error": str(exc)})
+        return parsed, errors
+
+
+_VALIDATORS: dict[str, _RecordValidator] = {
+    "categories": _RecordValidator(
+        "categories",
+        Category,
+        [
+            ("id", "id", int, True, None),
+            ("name", "name", str, True, None),
+            ("description", "description", _identity, False, None),
+        ],
+    ),
+    "cards": _RecordValidator(
+        "cards",
+        Card,
+        [
+            ("id", "id", int, True, None),
+            ("name", "name", str, True, None),
+            ("limit", "limit", float, True, None),
+            ("closing_day", "closing_day", int, True, None),
+            ("due_day", "due_day", int, True, None),
+            ("bank", "bank", _identity, False, None),
+            ("brand", "brand", _identity, False, None),
+        ],
+    ),
+    "expenses": _RecordValidator(
+        "expenses",
+        Expense,
+        [
+            ("id", "id", int, True, None),
+            ("name", "name", str, True, None),
+            ("value", "value", float, True, None),
+            ("month", "month", int, True, None),
+            ("year", "year", int, True, None),
+            ("category_id", "category_id", _optional_int, False, None),
+            ("recurrence_id", "recurrence_id", _optional_int, False, None),
+            ("payment_method", "payment_method", _str_or("debit"), False, None),
+            ("notes", "notes", _identity, False, None),
+        ],
+    ),
+    "recurrences": _RecordValidator(
+        "recurringExpenses",
+        Recurrence,
+        [
+            ("id", "id", int, True, None),
+            ("kind", "kind", str, True, None),
+            ("name", "name", str, True, None),
+            ("value", "value", float, True, None),
+            ("start_month", "start_month", int, True, None),
+            ("start_year", "start_year", int, True, None),
+            ("interval_months", "interval_months", int, True, None),
+            ("occurrences", "occurrences", int, True, None),
+            ("category_id", "category_id", _optional_int, False, None),
+            ("payment_method", "payment_method", _identity, False, None),
+            ("confirmed", "confirmed", _optional_bool, False, None),
+            ("notes", "notes", _identity, False, None),
+            ("virtual", "virtual", _bool_default_false, False, None),
+            ("frequency", "frequency", _str_or("mensal"), False, None),
+            ("start_day", "start_day", int, False, 1),
+        ],
+    ),
+    "skipped_occurrences": _RecordValidator(
+        "skippedOccurrences",
+        SkippedOccurrence,
+        [
+            ("id", "id", int, True, None),
+            ("recurrence_id", "recurrence_id", int, True, None),
+            ("month", "month", int, True, None),
+            ("year", "year", int, True, None),
+        ],
+    ),
+    "incomes": _RecordValidator(
+        "income",
+        Income,
+        [
+            ("id", "id", int, True, None),
+            ("name", "name", str, True, None),
+            ("value", "value", float, True, None),
+            ("month", "month", int, True, None),
+            ("year", "year", int, True, None),
+            ("confirmed", "confirmed", _bool_default_true, False, True),
+            ("recurrence_id", "recurrence_id", _optional_int, False, None),
+            ("notes", "notes", _identity, False, None),
+        ],
+    ),
+    "installment_plans": _RecordValidator(
+        "installmentPlans",
+        InstallmentPlan,
+        [
+            ("id", "id", int, True, None),
+            ("card_id", "card_id", int, True, None),
+            ("expense_name", "expense_name", str, True, None),
+            ("total_value", "total_value", float, True, None),
+            ("installments", "installments", int, True, None),
+            ("first_month", "first_month", int, True, None),
+            ("first_year", "first_year", int, True, None),
+            ("expense_id", "expense_id", _optional_int, False, None),
+            ("rounding", "rounding", _str_or("last"), False, None),
+        ],
+    ),
+    "installments": _RecordValidator(
+        "installments",
+        Installment,
+        [
+            ("id", "id", int, True, None),
+            ("card_id", "card_id", int, True, None),
+            ("expense_name", "expense_name", str, True, None),
+            ("installment_number", "installment_number", int, True, None),
+            ("total_installments", "total_installments", int, True, None),
+            ("value", "value", float, True, None),
+            ("month", "month", int, True, None),
+            ("year", "year", int, True, None),
+            ("status", "status", _str_or("pendente"), False, None),
+            ("plan_id", "plan_id", _optional_int, False, None),
+        ],
+    ),
+    "goals": _RecordValidator(
+        "goals",
+        Goal,
+        [
+            ("id", "id", int, True, None),
+            ("name", "name", str, True, None),
+            ("limit_value", "limit_value", float, True, None),
+            ("month", "month", int, True, None),
+            ("year", "year", int, True, None),
+            ("category_id", "category_id", _optional_int, False, None),
+        ],
+    ),
+    "price_indices": _RecordValidator(
+        "priceIndices",
+        PriceIndex,
+        [
+            ("id", "id", int, True, None),
+            ("series", "series", str, True, None),
+            ("month", "month", int, True, None),
+            ("year", "year", int, True, None),
+            ("value", "value", float, True, None),
+        ],
+    ),
+}
+
+
+def _validate_chunk(collection: str, items: list[Any], offset: int) -> tuple[list[Any], list[dict[str, Any]]]:
+    return _VALIDATORS[collection].validate(items, offset)
+
+
+def _validate_collections(data: dict[str, Any]) -> tuple[dict[str, list[Any]], list[dict[str, Any]]]:
+    """Valida todas as coleções e reúne todos os erros com o índice de cada item.
+
+    Payloads grandes são divididos em blocos validados no pool de processos compartilhado;
+    os blocos voltam em ordem, preservando a posição original dos registros.
+    """
+    jobs = [
+        (collection, items[start : start + VALIDATION_CHUNK_SIZE], start)
+        for collection, items in ((name, data.get(name, [])) for name in _VALIDATORS)
+        for start in range(0, len(items), VALIDATION_CHUNK_SIZE)
+    ]
+    total = sum(len(data.get(name, [])) for name in _VALIDATORS)
+    results = None
+    if total >= PARALLEL_VALIDATION_THRESHOLD and len(jobs) > 1:
+        results = map_in_pool(_validate_chunk, jobs)
+    if results is None:
+        results = [_validate_chunk(*job) for job in jobs]
+
+    parsed: dict[str, list[Any]] = {name: [] for name in _VALIDATORS}
+    errors: list[dict[str, Any]] = []
+    for (collection, _, _), (records, chunk_errors) in zip(jobs, results):
+        parsed[collection].extend(records)
+        errors.extend(chunk_errors)
+    return parsed, errors
+
+
+def _parse_collections(data: dict[str, Any]) -> dict[str, list[Any]]:
+    parsed, errors = _validate_collections(data)
+    if errors:
+        raise BackupValidationError(_summarize_errors(errors), errors)
+    return parsed
+
+
+def _summarize_errors(errors: list[dict[str, Any]]) -> str:
+    first = errors[0]
+    if len(errors) == 1:
+        return first["error"]
+    return f"{first['error']} (e mais {len(errors) - 1} erro(s))"
+
+
+def _validate_relationships(**collections: list[Any]) -> None:
+    errors = _relationship_errors(**collections)
+    if errors:
+        raise BackupValidationError(_summarize_errors(errors), errors)
+
+
+def _relationship_errors(
     *,
     categories: list[Category],
     cards: list[Card],
     expenses: list[Expense],
     recurrences: list[Recurrence],
+    skipped_occurrences: list[SkippedOccurrence],
+    incomes: list[Income],
     goals: list[Goal],
     installments: list[Installment],
-) -> None:
+    installment_plans: list[InstallmentPlan] | None = None,
+    **_: list[Any],
+) -> list[dict[str, Any]]:
+    installment_plans = installment_plans or []
     category_ids = {item.id for item in categories}
     card_ids = {item.id for item in cards}
-
-    for expense in expenses:
-        if expense.category_id is not None and expense.category_id not in category_ids:
-            raise BackupValidationError("Integridade inválida: gasto referencia categoria inexistente.")
-
-    for recurrence in recurrences:
-        if recurrence.category_id is not None and recurrence.category_id not in category_ids:
-            raise BackupValidationError("Integridade inválida: recorrência referencia categoria inexistente.")
-
     recurrence_ids = {item.id for item in recurrences}
-    for expense in expenses:
-        if expense.recurrence_id is not None and expense.recurrence_id not in recurrence_ids:
-            raise BackupValidationError("Integridade inválida: gasto recorrente referencia recorrência inexistente.")
+    expense_ids = {item.id for item in expenses}
+    plan_ids = {item.id for item in installment_plans}
+    errors: list[dict[str, Any]] = []
+
+    def check(collection: str, items: list[Any], is_valid: Callable[[Any], bool], message: str) -> None:
+        for index, item in enumerate(items):
+            if not is_valid(item):
+                errors.append({"collection": collection, "index": index, "error": message})
+
+    check(
+        "expenses",
+        expenses,
+        lambda item: item.category_id is None or item.category_id in category_ids,
+        "Integridade inválida: gasto referencia categoria inexistente.",
+    )
+    check(
+        "recurringExpenses",
+        recurrences,
+        lambda item: item.category_id is None or item.category_id in category_ids,
+        "Integridade inválida: recorrência referencia categoria inexistente.",
+    )
+    check(
+        "expenses",
+        expenses,
+        lambda item: item.recurrence_id is None or item.recurrence_id in recurrence_ids,
+        "Integridade inválida: gasto recorrente referencia recorrência inexistente.",
+    )
+    check(
+        "income",
+        incomes,
+        lambda item: item.recurrence_id is None or item.recurrence_id in recurrence_ids,
+        "Integridade inválida: entrada recorrente referencia recorrência inexistente.",
+    )
+    check(
+        "skippedOccurrences",
+        skipped_occurrences,
+        lambda item: item.recurrence_id in recurrence_ids,
+        "Integridade inválida: ocorrência removida referencia recorrência inexistente.",
+    )
+    check(
+        "goals",
+        goals,
+        lambda item: item.category_id is None or item.category_id in category_ids,
+        "Integridade inválida: meta referencia categoria inexistente.",
+    )
+    check(
+        "installments",
+        installments,
+        lambda item: item.card_id in card_ids,
+        "Integridade inválida: parcela referencia cartão inexistente.",
+    )
+    check(
+        "installmentPlans",
+        installment_plans,
+        lambda item: item.card_id in card_ids,
+        "Integridade inválida: parcelamento referencia cartão inexistente.",
+    )
+    check(
+        "installmentPlans",
+        installment_plans,
+        lambda item: item.expense_id is None or item.expense_id in expense_ids,
+        "Integridade inválida: parcelamento referencia gasto inexistente.",
+    )
+    check(
+        "installments",
+        installments,
+        lambda item: item.plan_id is None or item.plan_id in plan_ids,
+        "Integridade inválida: parcela referencia parcelamento inexistente.",
+    )
+    return errors
+
+
+def _entity_row(table: str, entity: Any) -> tuple[Any, ...]:
+    fields = COLUMN_FIELDS.get(table, {})
+    bool_columns = BOOL_COLUMNS.get(table, frozenset())
+    money_columns = MONEY_COLUMNS.get(table, frozenset())
+    row = []
+    for column in BACKUP_TABLES[table]:
+        value = getattr(entity, fields.get(column, column))
+        if column in bool_columns and value is not None:
+            value = int(value)
+        elif column in money_columns and value is not None:
+            value = to_cents(value)
+        row.append(value)
+    return tuple(row)
+
+
+def _row_record(table: str, row: tuple[Any, ...]) -> dict[str, Any]:
+    """Converte uma linha do banco no formato de registro usado pelo JSON de backup."""
+    fields = COLUMN_FIELDS.get(table, {})
+    bool_columns = BOOL_COLUMNS.get(table, frozenset())
+    money_columns = MONEY_COLUMNS.get(table, frozenset())
+    record = {}
+    for column, value in zip(BACKUP_TABLES[table], row):
+        if column in bool_columns and value is not None:
+            value = bool(value)
+        elif column in money_columns and value is not None:
+            value = from_cents(value)
+        record[fields.get(column, column)] = value
+    return record
+
+
+def _insert_entities(conn: sqlite3.Connection, table: str, entities: list[Any]) -> None:
+    columns = BACKUP_TABLES[table]
+    if table in OCCURRENCE_TABLES:
+        entities = _unique_occurrences(entities)
+    conn.executemany(
+        f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})",
+        [_entity_row(table, entity) for entity in entities],
+    )
+
 
-    for goal in goals:
-        if goal.category_id is not None and goal.category_id not in category_ids:
-            raise BackupValidationError("Integridade inválida: meta referencia categoria inexistente.")
+def _unique_occurrences(entities: list[Any]) -> list[Any]:
+    """Mantém só a primeira linha de cada ``(recurrence_id, year, month)``.
 
-    for installment in installments:
-        if installment.card_id not in card_ids:
-            raise BackupValidationError("Integridade inválida: parcela referencia cartão inexistente.")
+    Backups antigos podem ter ocorrências duplicadas por aplicações repetidas,
+    que o índice único atual rejeitaria.
+    """
+    seen: set[tuple[int, int, int]] = set()
+    unique = []
+    for entity in entities:
+        if entity.recurrence_id is not None:
+            key = (entity.recurrence_id, entity.year, entity.month)
+            if key in seen:
+                continue
+            seen.add(key)
+        unique.append(entity)
+    return unique
 
 
 def _reset_sequences(conn: sqlite3.Connection, table_name: str, rows: list[Any]) -> None:
@@ -444,3 +718,341 @@ def _reset_sequences(conn: sqlite3.Connection, table_name: str, rows: list[Any])
     if max_id > 0:
         conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)", (table_name, max_id))
 
+
+def _sync_sequence(conn: sqlite3.Connection, table_name: str) -> None:
+    """Equivalente a ``_reset_sequences`` calculado a partir das linhas já gravadas."""
+    row = conn.execute(f"SELECT MAX(id) FROM {table_name}").fetchone()
+    max_id = row[0] or 0
+    conn.execute("DELETE FROM sqlite_sequence WHERE name=?", (table_name,))
+    if max_id > 0:
+        conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)", (table_name, max_id))
+
+
+def _convert_money(table: str, record: dict[str, Any], convert: Callable[[Any], Any]) -> dict[str, Any]:
+    """Aplica ``convert`` às colunas monetárias de um registro do backup incremental."""
+    for column in MONEY_COLUMNS.get(table, frozenset()):
+        if record.get(column) is not None:
+            record[column] = convert(record[column])
+    return record
+
+
+def read_change_seq(db_path: str) -> int:
+    conn = sqlite3.connect(db_path)
+    try:
+        return current_change_seq(conn)
+    finally:
+        conn.close()
+
+
+def export_incremental_payload(db_path: str, since_seq: int) -> dict[str, Any]:
+    """Exporta apenas as linhas alteradas depois de ``since_seq``."""
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute("BEGIN")
+        change_seq = current_change_seq(conn)
+        changes: dict[str, dict[str, list[Any]]] = {}
+        for table, columns in BACKUP_TABLES.items():
+            changed_ids = "SELECT row_id FROM change_log WHERE table_name=? AND seq > ? AND seq <= ?"
+            params = (table, since_seq, change_seq)
+            rows = conn.execute(
+                f"SELECT {', '.join(columns)} FROM {table} WHERE id IN ({changed_ids})",
+                params,
+            ).fetchall()
+            deleted = conn.execute(
+                f"SELECT DISTINCT row_id FROM change_log WHERE table_name=? AND seq > ? AND seq <= ? "
+                f"AND row_id NOT IN (SELECT id FROM {table})",
+                params,
+            ).fetchall()
+            if rows or deleted:
+                changes[table] = {
+                    "upserts": [_convert_money(table, dict(zip(columns, row)), from_cents) for row in rows],
+                    "deletes": [row[0] for row in deleted],
+                }
+        return {
+            "version": BACKUP_VERSION,
+            "kind": "incremental",
+            "exportedAt": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "baseSeq": since_seq,
+            "changeSeq": change_seq,
+            "changes": changes,
+        }
+    finally:
+        conn.rollback()
+        conn.close()
+
+
+def _validate_incremental(payload: Any) -> None:
+    if not isinstance(payload, dict) or payload.get("kind") != "incremental":
+        raise BackupValidationError("Arquivo inválido: backup incremental esperado.")
+    version = payload.get("version")
+    if not isinstance(version, str) or version.split(".", 1)[0] != SUPPORTED_BACKUP_MAJOR:
+        raise BackupValidationError("Versão de backup incompatível com esta aplicação.")
+    for field in ("baseSeq", "changeSeq"):
+        if isinstance(payload.get(field), bool) or not isinstance(payload.get(field), int):
+            raise BackupValidationError(f"Arquivo inválido: campo '{field}' deve ser um inteiro.")
+    changes = payload.get("changes")
+    if not isinstance(changes, dict):
+        raise BackupValidationError("Arquivo inválido: campo 'changes' deve ser um objeto.")
+    for table, change in changes.items():
+        columns = BACKUP_TABLES.get(table)
+        if columns is None:
+            raise BackupValidationError(f"Arquivo inválido: tabela '{table}' desconhecida.")
+        if not isinstance(change, dict):
+            raise BackupValidationError(f"Arquivo inválido: alterações de '{table}' devem ser um objeto.")
+        upserts = change.get("upserts", [])
+        deletes = change.get("deletes", [])
+        if not isinstance(upserts, list) or not isinstance(deletes, list):
+            raise BackupValidationError(f"Arquivo inválido: alterações de '{table}' devem ser listas.")
+        for row in upserts:
+            if not isinstance(row, dict) or not isinstance(row.get("id"), int) or not set(row) <= set(columns):
+                raise BackupValidationError(f"Registro inválido em '{table}'.")
+        if not all(isinstance(row_id, int) for row_id in deletes):
+            raise BackupValidationError(f"Registro inválido em '{table}'.")
+
+
+def _apply_incremental(conn: sqlite3.Connection, payload: dict[str, Any]) -> None:
+    for table, columns in BACKUP_TABLES.items():
+        change = payload["changes"].get(table)
+        if not change:
+            continue
+        deletes = change.get("deletes", [])
+        if deletes:
+            conn.executemany(f"DELETE FROM {table} WHERE id=?", [(row_id,) for row_id in deletes])
+        updates = ", ".join(f"{column}=excluded.{column}" for column in columns if column != "id")
+        placeholders = ", ".join("?" for _ in columns)
+        conn.executemany(
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders}) "
+            f"ON CONFLICT(id) DO UPDATE SET {updates}",
+            [
+                tuple(record.get(column) for column in columns)
+                for record in (_convert_money(table, dict(row), to_cents) for row in change.get("upserts", []))
+            ],
+        )
+        _sync_sequence(conn, table)
+
+
+def apply_incremental_payload(db_path: str, payload: Any, *, expected_base_seq: int | None = None) -> int:
+    """Aplica um backup incremental sobre o banco atual e retorna a nova sequência base."""
+    _validate_incremental(payload)
+    if expected_base_seq is not None and payload["baseSeq"] != expected_base_seq:
+        raise BackupValidationError("Sequência de backups incrementais fora de ordem.")
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute("BEGIN")
+        _apply_incremental(conn, payload)
+        conn.commit()
+        return payload["changeSeq"]
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def _ensure_backup_history(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS backup_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL,
+            name TEXT NOT NULL,
+            change_seq INTEGER NOT NULL,
+            created_at TEXT NOT NULL
+        )
+        """
+    )
+
+
+def _record_backup(conn: sqlite3.Connection, kind: str, name: str, change_seq: int) -> None:
+    _ensure_backup_history(conn)
+    conn.execute(
+        "INSERT INTO backup_history (kind, name, change_seq, created_at) VALUES (?, ?, ?, ?)",
+        (kind, name, change_seq, datetime.now().isoformat(timespec="seconds")),
+    )
+
+
+def last_backup_seq(conn: sqlite3.Connection) -> int | None:
+    _ensure_backup_history(conn)
+    row = conn.execute("SELECT change_seq FROM backup_history ORDER BY id DESC LIMIT 1").fetchone()
+    return None if row is None else int(row[0])
+
+
+def pending_changes(db_path: str) -> bool:
+    """Indica se houve alterações desde o último backup registrado."""
+    conn = sqlite3.connect(db_path)
+    try:
+        base_seq = last_backup_seq(conn)
+        conn.commit()
+        return base_seq is None or current_change_seq(conn) > base_seq
+    finally:
+        conn.close()
+
+
+def create_database_snapshot(
+    db_path: str,
+    backup_dir: str,
+    *,
+    prefix: str = "saveyourmoney",
+    pages: int = -1,
+    sleep: float = 0.25,
+) -> dict[str, Any]:
+    """Copia o banco com a API de backup online do SQLite e registra a sequência.
+
+    Com ``pages`` positivo a cópia é feita em passos, liberando o banco para
+    outras conexões entre eles.
+    """
+    os.makedirs(backup_dir, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    backup_name = f"{prefix}_{timestamp}.db"
+    backup_path = os.path.join(backup_dir, backup_name)
+    source = sqlite3.connect(db_path)
+    try:
+        target = sqlite3.connect(backup_path)
+        try:
+            source.backup(target, pages=pages, sleep=sleep)
+            target.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            change_seq = current_change_seq(target)
+        finally:
+            target.close()
+        _record_backup(source, "full", backup_name, change_seq)
+        prune_change_log(source, change_seq)
+        source.commit()
+    finally:
+        source.close()
+    return {"backup": backup_name, "path": backup_path, "change_seq": change_seq}
+
+
+def create_incremental_backup(db_path: str, backup_dir: str) -> dict[str, Any]:
+    """Grava em JSON somente as alterações feitas desde o último backup."""
+    conn = sqlite3.connect(db_path)
+    try:
+        base_seq = last_backup_seq(conn)
+        conn.commit()
+    finally:
+        conn.close()
+    if base_seq is None:
+        raise BackupValidationError("Crie um backup completo antes do primeiro incremental.")
+    payload = export_incremental_payload(db_path, base_seq)
+    os.makedirs(backup_dir, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    backup_name = f"saveyourmoney_{timestamp}_incremental.json"
+    backup_path = os.path.join(backup_dir, backup_name)
+    with open(backup_path, "w", encoding="utf-8") as target:
+        json.dump(payload, target, ensure_ascii=False)
+    conn = sqlite3.connect(db_path)
+    try:
+        _record_backup(conn, "incremental", backup_name, payload["changeSeq"])
+        conn.commit()
+    finally:
+        conn.close()
+    changed_rows = sum(
+        len(change["upserts"]) + len(change["deletes"]) for change in payload["changes"].values()
+    )
+    return {
+        "backup": backup_name,
+        "path": backup_path,
+        "base_seq": payload["baseSeq"],
+        "change_seq": payload["changeSeq"],
+        "changes": changed_rows,
+    }
+
+
+def _snapshot_select_list(conn: sqlite3.Connection, table: str, columns: tuple[str, ...]) -> str | None:
+    snapshot_columns = {row[1]: row[2].upper() for row in conn.execute(f"PRAGMA snapshot.table_info({table})")}
+    if not snapshot_columns:
+        return None
+    money_columns = MONEY_COLUMNS.get(table, frozenset())
+    # Colunas adicionadas depois do snapshot recebem o padrão da coluna (ou NULL).
+    fallbacks = {
+        row[1]: row[4] if row[4] is not None else "NULL"
+        for row in conn.execute(f"PRAGMA main.table_info({table})")
+        if not row[3] or row[4] is not None
+    }
+    expressions = []
+    for column in columns:
+        if column in money_columns and snapshot_columns.get(column) == "REAL":
+            # Snapshots anteriores à versão 2 guardam valores em reais.
+            expressions.append(CENTS_EXPRESSION.format(column=column))
+        elif column in snapshot_columns:
+            expressions.append(column)
+        elif column in fallbacks:
+            expressions.append(fallbacks[column])
+        else:
+            raise BackupValidationError(f"Snapshot incompatível: coluna '{table}.{column}' ausente.")
+    return ", ".join(expressions)
+
+
+def restore_database_snapshot(
+    db_path: str,
+    snapshot_path: str,
+    incrementals: list[Any] | None = None,
+) -> dict[str, int]:
+    """Restaura um snapshot .db copiando as tabelas com ``INSERT ... SELECT`` via ATTACH.
+
+    Uma linha do snapshot que viole alguma restrição desfaz toda a restauração
+    e é informada como ``BackupValidationError``.
+    """
+    incrementals = incrementals or []
+    for incremental in incrementals:
+        _validate_incremental(incremental)
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute("ATTACH DATABASE ? AS snapshot", (snapshot_path,))
+        try:
+            version = conn.execute("PRAGMA snapshot.user_version").fetchone()[0]
+            if version > SCHEMA_VERSION:
+                raise BackupValidationError("Snapshot criado por uma versão mais nova do aplicativo.")
+            select_lists = {
+                table: _snapshot_select_list(conn, table, columns) for table, columns in BACKUP_TABLES.items()
+            }
+            if not any(select_lists.values()):
+                raise BackupValidationError("Arquivo inválido: snapshot sem tabelas do Save Your Money.")
+            has_sequence = conn.execute(
+                "SELECT 1 FROM snapshot.sqlite_master WHERE type='table' AND name='sqlite_sequence'"
+            ).fetchone()
+            base_seq = 0
+            if has_sequence:
+                row = conn.execute("SELECT seq FROM snapshot.sqlite_sequence WHERE name='change_log'").fetchone()
+                base_seq = int(row[0]) if row else 0
+
+            conn.execute("BEGIN")
+            for table in reversed(BACKUP_TABLES):
+                conn.execute(f"DELETE FROM main.{table}")
+            counts: dict[str, int] = {}
+            for table, columns in BACKUP_TABLES.items():
+                select_list = select_lists[table]
+                if select_list is None:
+                    counts[table] = 0
+                else:
+                    # Como no JSON, snapshots antigos podem repetir uma ocorrência; vale a primeira.
+                    where = (
+                        f" WHERE recurrence_id IS NULL OR id IN (SELECT MIN(id) FROM snapshot.{table} "
+                        "WHERE recurrence_id IS NOT NULL GROUP BY recurrence_id, year, month)"
+                        if table in OCCURRENCE_TABLES
+                        else ""
+                    )
+                    try:
+                        cursor = conn.execute(
+                            f"INSERT INTO main.{table} ({', '.join(columns)}) "
+                            f"SELECT {select_list} FROM snapshot.{table}{where} ORDER BY id"
+                        )
+                    except sqlite3.IntegrityError as exc:
+                        raise BackupValidationError(f"Registro inválido em '{table}' no snapshot: {exc}.") from exc
+                    counts[table] = cursor.rowcount
+                _sync_sequence(conn, table)
+            for incremental in incrementals:
+                if incremental["baseSeq"] != base_seq:
+                    raise BackupValidationError("Sequência de backups incrementais fora de ordem.")
+                _apply_incremental(conn, incremental)
+                base_seq = incremental["changeSeq"]
+            if incrementals:
+                counts["incrementals"] = len(incrementals)
+            conn.commit()
+            return counts
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.execute("DETACH DATABASE snapshot")
+    finally:
+        conn.close()
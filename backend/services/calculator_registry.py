@@ -0,0 +1,254 @@
+"""Registro das operações da calculadora.
+
+Cada operação recebe o payload da requisição e devolve o resultado; os nomes
+aceitos em ``operation`` são as chaves de ``OPERATIONS``. Novas operações são
+registradas com ``@operation("nome")``, sem mexer nas rotas; as que também
+geram CSV registram o gerador de linhas com ``@csv_export("nome")``.
+
+As operações são puras, então os resultados ficam em um cache LRU limitado,
+com chave no nome da operação e no payload normalizado; operações que não são
+determinísticas informam em ``cache_if`` quando o resultado pode ser reutilizado.
+Operações caras informam em ``cost`` o custo do payload, somado nos lotes.
+"""
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional, Tuple
+
+from .amortization import amortization_schedule
+from .debt_payoff import debt_payoff_grid, parse_sweep_axis
+from .finance_service import (
+    calculate_basic,
+    calculate_compound_interest,
+    calculate_discount,
+    calculate_monthly_return,
+    calculate_simple_interest,
+    simulate_debt_payoff,
+    simulate_installment,
+)
+from .lru_cache import LRUCache, freeze
+from .monte_carlo import MAX_PROJECTION_CELLS, project_balance, projection_cost
+
+CalculatorOperation = Callable[[Mapping[str, Any]], Any]
+CsvExport = Callable[[Mapping[str, Any]], Iterator[str]]
+
+OPERATIONS: Dict[str, CalculatorOperation] = {}
+CSV_EXPORTS: Dict[str, CsvExport] = {}
+CACHE_CONDITIONS: Dict[str, Callable[[Mapping[str, Any]], bool]] = {}
+COSTS: Dict[str, Callable[[Mapping[str, Any]], int]] = {}
+
+# Resultados guardados entre requisições (o widget reenvia os mesmos cenários).
+CALCULATOR_CACHE_SIZE = 1024
+# Limite aproximado de memória do cache; grades e cronogramas grandes ocupam centenas de KB cada.
+CALCULATOR_CACHE_BYTES = 32 * 1024 * 1024
+CALCULATOR_CACHE = LRUCache(CALCULATOR_CACHE_SIZE, CALCULATOR_CACHE_BYTES)
+# Chaves do payload que não mudam o resultado.
+IGNORED_KEYS = frozenset({"operation", "format", "formato"})
+# Soma máxima dos custos das operações de um lote.
+MAX_BATCH_COST = 2 * MAX_PROJECTION_CELLS
+
+INVALID_OPERATION = "Operação de calculadora inválida."
+INVALID_PARAMETERS = "Parâmetros inválidos para a calculadora."
+
+
+class UnknownOperationError(ValueError):
+    """Operação que não está no registro."""
+
+
+def operation(
+    *names: str,
+    cache_if: Optional[Callable[[Mapping[str, Any]], bool]] = None,
+    cost: Optional[Callable[[Mapping[str, Any]], int]] = None,
+) -> Callable[[CalculatorOperation], CalculatorOperation]:
+    def register(func: CalculatorOperation) -> CalculatorOperation:
+        for name in names:
+            OPERATIONS[name] = func
+            if cache_if is not None:
+                CACHE_CONDITIONS[name] = cache_if
+            if cost is not None:
+                COSTS[name] = cost
+        return func
+
+    return register
+
+
+def csv_export(name: str) -> Callable[[CsvExport], CsvExport]:
+    def register(func: CsvExport) -> CsvExport:
+        CSV_EXPORTS[name] = func
+        return func
+
+    return register
+
+
+def parse_operation(data: Mapping[str, Any]) -> str:
+    name = str(data.get("operation") or "").strip().lower()
+    if name not in OPERATIONS:
+        raise UnknownOperationError(INVALID_OPERATION)
+    return name
+
+
+def calculate(data: Mapping[str, Any]) -> Dict[str, Any]:
+    """Executa a operação do payload; erros de parâmetro saem como ``ValueError``."""
+    name = parse_operation(data)
+    payload = {**data, "operation": name}
+    try:
+        condition = CACHE_CONDITIONS.get(name)
+        if condition is not None and not condition(payload):
+            result = OPERATIONS[name](payload)
+        else:
+            key = (name, freeze({key: value for key, value in data.items() if key not in IGNORED_KEYS}))
+            result = CALCULATOR_CACHE.get_or_compute(key, lambda: OPERATIONS[name](payload))
+    except (TypeError, ValueError, ArithmeticError) as exc:
+        raise ValueError(f"{INVALID_PARAMETERS} {exc}") from exc
+    return {"operation": name, "result": result}
+
+
+def calculate_csv(data: Mapping[str, Any]) -> Tuple[str, Iterator[str]]:
+    """Valida o payload e devolve a operação e o gerador das linhas CSV."""
+    name = parse_operation(data)
+    if name not in CSV_EXPORTS:
+        raise ValueError("Operação sem exportação em CSV.")
+    try:
+        return name, CSV_EXPORTS[name]({**data, "operation": name})
+    except (TypeError, ValueError, ArithmeticError) as exc:
+        raise ValueError(f"{INVALID_PARAMETERS} {exc}") from exc
+
+
+def operation_cost(item: Any) -> int:
+    """Custo declarado da operação do item; itens inválidos custam zero e falham ao executar."""
+    if not isinstance(item, Mapping):
+        return 0
+    cost = COSTS.get(str(item.get("operation") or "").strip().lower())
+    try:
+        return max(cost(item), 0) if cost is not None else 0
+    except (TypeError, ValueError, ArithmeticError):
+        return 0
+
+
+def calculate_many(items: List[Any]) -> List[Dict[str, Any]]:
+    """Executa um lote; cada item falha sozinho, com ``error`` no lugar de ``result``.
+
+    O lote inteiro é recusado com ``ValueError`` se a soma dos custos passar de
+    ``MAX_BATCH_COST``.
+    """
+    if sum(operation_cost(item) for item in items) > MAX_BATCH_COST:
+        raise ValueError(f"Lote excede o limite de custo de {MAX_BATCH_COST} (simulações x meses).")
+    results = []
+    for item in items:
+        if not isinstance(item, Mapping):
+            results.append({"operation": None, "error": INVALID_OPERATION})
+            continue
+        try:
+            results.append(calculate(item))
+        except ValueError as exc:
+            results.append({"operation": item.get("operation"), "error": str(exc)})
+    return results
+
+
+@operation("soma", "subtracao", "multiplicacao", "divisao")
+def _basic(data: Mapping[str, Any]) -> float:
+    return calculate_basic(data["operation"], float(data.get("a")), float(data.get("b")))
+
+
+@operation("juros_simples")
+def _simple_interest(data: Mapping[str, Any]) -> dict:
+    return calculate_simple_interest(
+        principal=float(data.get("principal")),
+        monthly_rate_percent=float(data.get("rate")),
+        months=int(data.get("months")),
+    )
+
+
+@operation("juros_compostos")
+def _compound_interest(data: Mapping[str, Any]) -> dict:
+    return calculate_compound_interest(
+        principal=float(data.get("principal")),
+        monthly_rate_percent=float(data.get("rate")),
+        months=int(data.get("months")),
+    )
+
+
+@operation("parcelamento")
+def _installment(data: Mapping[str, Any]) -> dict:
+    return simulate_installment(
+        principal=float(data.get("principal")),
+        monthly_rate_percent=float(data.get("rate")),
+        months=int(data.get("months")),
+    )
+
+
+@operation("desconto")
+def _discount(data: Mapping[str, Any]) -> dict:
+    return calculate_discount(
+        original_value=float(data.get("principal")),
+        discount_percent=float(data.get("rate")),
+    )
+
+
+@operation("rendimento_mensal")
+def _monthly_return(data: Mapping[str, Any]) -> dict:
+    return calculate_monthly_return(
+        principal=float(data.get("principal")),
+        monthly_rate_percent=float(data.get("rate")),
+    )
+
+
+@operation("quitacao_divida")
+def _debt_payoff(data: Mapping[str, Any]) -> dict:
+    return simulate_debt_payoff(
+        debt_value=float(data.get("principal")),
+        payment_per_month=float(data.get("payment")),
+        monthly_rate_percent=float(data.get("rate")),
+    )
+
+
+@operation("quitacao_divida_grade")
+def _debt_payoff_grid(data: Mapping[str, Any]) -> dict:
+    return debt_payoff_grid(
+        debt_value=float(data.get("principal")),
+        payments=parse_sweep_axis(data, "payments", "pagamentos"),
+        rates_percent=parse_sweep_axis(data, "rates", "taxas"),
+    )
+
+
+def _projection_paths(data: Mapping[str, Any]) -> int:
+    return int(data.get("paths", data.get("simulacoes")) or 10_000)
+
+
+@operation(
+    "projecao_monte_carlo",
+    cache_if=lambda data: data.get("seed") is not None,
+    cost=lambda data: projection_cost(_projection_paths(data), int(data.get("months"))),
+)
+def _monte_carlo(data: Mapping[str, Any]) -> dict:
+    target = data.get("target", data.get("meta"))
+    seed = data.get("seed")
+    return project_balance(
+        principal=float(data.get("principal") or 0),
+        contribution=float(data.get("contribution", data.get("aporte")) or 0),
+        months=int(data.get("months")),
+        monthly_rate_percent=float(data.get("rate")),
+        volatility_percent=float(data.get("volatility", data.get("volatilidade")) or 0),
+        paths=_projection_paths(data),
+        target=None if target is None else float(target),
+        seed=None if seed is None else int(seed),
+    )
+
+
+def _schedule(data: Mapping[str, Any]):
+    return amortization_schedule(
+        principal=float(data.get("principal")),
+        monthly_rate_percent=float(data.get("rate")),
+        months=int(data.get("months")),
+        system=data.get("system") or data.get("sistema") or "price",
+    )
+
+
+@operation("amortizacao")
+def _amortization(data: Mapping[str, Any]) -> dict:
+    schedule = _schedule(data)
+    return {"sistema": schedule.system, **schedule.summary(), "parcelas": schedule.rows()}
+
+
+@csv_export("amortizacao")
+def _amortization_csv(data: Mapping[str, Any]) -> Iterator[str]:
+    return _schedule(data).csv_lines()
@@ -0,0 +1,86 @@
+"""Grade de cenários de quitação de dívida.
+
+Aplica a mesma forma fechada de ``finance_service.simulate_debt_payoff`` a
+todas as combinações de pagamento mensal e taxa de uma vez, com operações de
+array: cada célula recebe os meses até a quitação e o total pago, ou ``None``
+quando o pagamento não quita a dívida no prazo máximo.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, List, Mapping, Sequence
+
+import numpy as np
+
+from .finance_service import MAX_PAYOFF_MONTHS
+
+# Limite de células (pagamentos x taxas) por grade.
+MAX_GRID_CELLS = 10_000
+
+
+def parse_sweep_axis(data: Mapping[str, Any], name: str, label: str) -> List[float]:
+    """Lê um eixo como lista explícita (``name``) ou faixa ``{start, stop, step}``."""
+    values = data.get(name)
+    if isinstance(values, list):
+        axis = [float(value) for value in values]
+    elif isinstance(values, Mapping):
+        start = float(values.get("start", values.get("inicio")))
+        stop = float(values.get("stop", values.get("fim")))
+        step = float(values.get("step", values.get("passo")))
+        if step <= 0 or stop < start:
+            raise ValueError(f"Faixa de {label} inválida.")
+        count = int(np.floor((stop - start) / step + 1e-9)) + 1
+        if count > MAX_GRID_CELLS:
+            raise ValueError(f"Faixa de {label} excede {MAX_GRID_CELLS} valores.")
+        axis = np.round(start + step * np.arange(count), 6).tolist()
+    else:
+        raise ValueError(f"Informe {name} como lista ou faixa com start, stop e step.")
+    if not axis:
+        raise ValueError(f"Informe ao menos um valor em {name}.")
+    return axis
+
+
+def _balance(debt: float, payments: np.ndarray, rates: np.ndarray, months: np.ndarray) -> np.ndarray:
+    growth = (1 + rates) ** months
+    safe_rates = np.where(rates == 0, 1.0, rates)
+    return np.where(rates == 0, debt - payments * months, debt * growth - payments * (growth - 1) / safe_rates)
+
+
+def debt_payoff_grid(debt_value: float, payments: Sequence[float], rates_percent: Sequence[float]) -> Dict[str, Any]:
+    """Meses e total pago para cada taxa (linhas) e pagamento (colunas)."""
+    if len(payments) * len(rates_percent) > MAX_GRID_CELLS:
+        raise ValueError(f"A grade deve ter no máximo {MAX_GRID_CELLS} combinações.")
+    if min(payments) <= 0:
+        raise ValueError("Pagamento mensal deve ser maior que zero.")
+    if debt_value <= 0:
+        raise ValueError("Valor da dívida deve ser maior que zero.")
+    payment, rate = np.meshgrid(np.asarray(payments, dtype=float), np.asarray(rates_percent, dtype=float) / 100.0)
+    growth = 1 + rate
+    feasible = payment > debt_value * growth * rate
+    with np.errstate(divide="ignore", invalid="ignore"):
+        estimate = np.where(
+            rate == 0,
+            debt_value / payment,
+            np.log(payment / (payment - rate * debt_value)) / np.log(growth),
+        )
+        months = np.maximum(np.ceil(np.where(feasible, estimate, 1) - 1e-9), 1)
+        # Mesmo ajuste de vizinhos da versão escalar.
+        earlier = (months > 1) & (_balance(debt_value, payment, rate, months - 2) * growth <= payment)
+        later = ~earlier & (_balance(debt_value, payment, rate, months - 1) * growth > payment)
+        months = months - earlier + later
+        last_payment = _balance(debt_value, payment, rate, months - 1) * growth
+    total_paid = payment * (months - 1) + last_payment
+    valid = feasible & (months <= MAX_PAYOFF_MONTHS)
+    return {
+        "pagamentos": [float(value) for value in payments],
+        "taxas": [float(value) for value in rates_percent],
+        "meses": _cells(valid, months.astype(int)),
+        "total_pago": _cells(valid, np.round(total_paid, 2)),
+    }
+
+
+def _cells(valid: np.ndarray, values: np.ndarray) -> List[List[Any]]:
+    """Matriz em listas, com ``None`` nas combinações que não quitam a dívida."""
+    return [
+        [value if ok else None for value, ok in zip(row, valid_row)]
+        for row, valid_row in zip(values.tolist(), valid.tolist())
+    ]
@@ -5,8 +5,13 @@ simples CRUD, como gerar parcelas ou calcular faturas. Estas funções são
 simplificadas e servirão como base para implementações futuras mais robustas.
 """
 
-from typing import List
-from ..domain.value_objects import MonthlyCompetence
+import math
+from typing import List, Tuple
+from ..domain.period import month_range, periods
+from ..domain.value_objects import Money, MonthlyCompetence, from_cents, to_cents
+
+# Prazo máximo aceito na simulação de quitação de dívidas.
+MAX_PAYOFF_MONTHS = 1200
 
 
 def generate_installments(total_value: float, num_installments: int) -> List[float]:
@@ -18,17 +23,18 @@ def generate_installments(total_value: float, num_installments: int) -> List[flo
     Returns:
         Lista de valores de cada parcela.
     """
-    if num_installments <= 0:
-        raise ValueError("Número de parcelas deve ser maior que zero.")
-    base = round(total_value / num_installments, 2)
-    installments = [base] * num_installments
-    diff = round(total_value - sum(installments), 2)
-    installments[-1] = round(installments[-1] + diff, 2)
-    return installments
+    base, last = split_installments(total_value, num_installments)
+    return [base] * (num_installments - 1) + [last]
+
+
+def split_installments(total_value: float, num_installments: int) -> Tuple[float, float]:
+    """Valor das parcelas iguais e da última, que recebe a diferença de centavos."""
+    parts = Money.of(total_value).split(num_installments)
+    return parts[0].amount, parts[-1].amount
 
 
 def calculate_invoice(installments: List[float]) -> float:
-    return round(sum(installments), 2)
+    return from_cents(sum(to_cents(value) for value in installments))
 
 
 def calculate_basic(operation: str, a: float, b: float) -> float:
@@ -98,23 +104,50 @@ def calculate_monthly_return(principal: float, monthly_rate_percent: float) -> d
     }
 
 
+def _debt_balance(debt_value: float, payment: float, rate: float, months: int) -> float:
+    """Saldo após ``months`` pagamentos: ``D * g ** k - p * (g ** k - 1) / r``."""
+    if rate == 0:
+        return debt_value - payment * months
+    growth = (1 + rate) ** months
+    return debt_value * growth - payment * (growth - 1) / rate
+
+
+def debt_payoff_months(debt_value: float, payment: float, rate: float) -> int:
+    """Menor ``n`` em que o saldo corrigido do mês cabe no pagamento.
+
+    Pela fórmula de anuidade, ``n = ceil(log(p / (p - r * D)) / log(1 + r))``;
+    o resultado é conferido nos vizinhos para corrigir o arredondamento do
+    ponto flutuante.
+    """
+    if rate == 0:
+        estimate = debt_value / payment
+    else:
+        estimate = math.log(payment / (payment - rate * debt_value)) / math.log(1 + rate)
+    months = max(math.ceil(estimate - 1e-9), 1)
+    if months > 1 and _debt_balance(debt_value, payment, rate, months - 2) * (1 + rate) <= payment:
+        months -= 1
+    elif _debt_balance(debt_value, payment, rate, months - 1) * (1 + rate) > payment:
+        months += 1
+    return months
+
+
 def simulate_debt_payoff(debt_value: float, payment_per_month: float, monthly_rate_percent: float) -> dict:
+    """Quitação com juros mensais sobre o saldo e pagamento fixo, em forma fechada.
+
+    A última parcela é só o saldo restante corrigido pelos juros do mês.
+    """
     if payment_per_month <= 0:
         raise ValueError("Pagamento mensal deve ser maior que zero.")
     rate = monthly_rate_percent / 100.0
-    current = debt_value
-    paid_total = 0.0
-    months = 0
-    while current > 0 and months < 1200:
-        current = current * (1 + rate)
-        if payment_per_month <= current * rate:
-            raise ValueError("Pagamento mensal insuficiente para quitar a dívida com essa taxa.")
-        payment = min(payment_per_month, current)
-        current -= payment
-        paid_total += payment
-        months += 1
-    if current > 0:
+    if debt_value <= 0:
+        return {"meses": 0, "total_pago": 0.0, "juros_pago": round(-debt_value, 2)}
+    if payment_per_month <= debt_value * (1 + rate) * rate:
+        raise ValueError("Pagamento mensal insuficiente para quitar a dívida com essa taxa.")
+    months = debt_payoff_months(debt_value, payment_per_month, rate)
+    if months > MAX_PAYOFF_MONTHS:
         raise ValueError("Não foi possível calcular a quitação da dívida.")
+    last_payment = _debt_balance(debt_value, payment_per_month, rate, months - 1) * (1 + rate)
+    paid_total = payment_per_month * (months - 1) + last_payment
     return {
         "meses": months,
         "total_pago": round(paid_total, 2),
@@ -123,10 +156,8 @@ def simulate_debt_payoff(debt_value: float, payment_per_month: float, monthly_ra
 
 
 def generate_competences(start_month: int, start_year: int, interval_months: int, occurrences: int) -> List[MonthlyCompetence]:
-    competences: List[MonthlyCompetence] = []
-    current = MonthlyCompetence(month=start_month, year=start_year)
-    for _ in range(occurrences):
-        competences.append(current)
-        for _ in range(interval_months):
-            current = current.next()
-    return competences
+    start = MonthlyCompetence(month=start_month, year=start_year)
+    if interval_months <= 0:
+        raise ValueError("Intervalo deve ser maior que zero.")
+    indices = month_range(start.index, occurrences, interval_months)
+    return [MonthlyCompetence(month=month, year=year) for month, year in periods(indices)]
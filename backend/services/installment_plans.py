@@ -0,0 +1,86 @@
+"""Expansão de parcelamentos em parcelas.
+
+Um parcelamento guarda só o total, a quantidade e a primeira competência; a
+parcela ``n`` cai no índice de mês ``primeira + n - 1`` e vale a parcela base,
+exceto a última, que recebe a diferença de centavos. Parcelas gravadas com o
+``plan_id`` (edições e pagamentos) substituem a calculada.
+"""
+from __future__ import annotations
+
+from typing import AbstractSet, Dict, Iterable, List, Optional, Tuple
+
+from ..domain.entities import INSTALLMENT_PENDING, Installment, InstallmentPlan
+from ..domain.period import filter_bounds, from_month_index, month_index, month_range
+from ..domain.value_objects import to_cents
+from .finance_service import split_installments
+
+# (plan_id, installment_number) das parcelas gravadas de um parcelamento.
+OverrideKeys = AbstractSet[Tuple[int, int]]
+
+
+def plan_indices(plan: InstallmentPlan, first: Optional[int] = None, last: Optional[int] = None) -> range:
+    """Índices de mês das parcelas dentro de ``[first, last]``."""
+    indices = month_range(month_index(plan.first_month, plan.first_year), plan.installments)
+    start = indices.start if first is None else max(indices.start, first)
+    stop = indices.stop if last is None else min(indices.stop, last + 1)
+    return range(start, max(start, stop))
+
+
+def plan_last_index(plan: InstallmentPlan) -> int:
+    return month_index(plan.first_month, plan.first_year) + plan.installments - 1
+
+
+def expand_plan(
+    plan: InstallmentPlan,
+    *,
+    month: Optional[int] = None,
+    year: Optional[int] = None,
+    exclude: OverrideKeys = frozenset(),
+    status: str = INSTALLMENT_PENDING,
+) -> List[Installment]:
+    """Parcelas calculadas no filtro ``mes``/``ano`` das listagens, sem as gravadas."""
+    bounds = filter_bounds(month, year)
+    indices = plan_indices(plan, *bounds) if bounds else plan_indices(plan)
+    start = month_index(plan.first_month, plan.first_year)
+    base, last = split_installments(plan.total_value, plan.installments)
+    installments = []
+    for index in indices:
+        number = index - start + 1
+        if (plan.id, number) in exclude:
+            continue
+        installment_month, installment_year = from_month_index(index)
+        if month is not None and installment_month != month:
+            continue
+        installments.append(
+            Installment(
+                card_id=plan.card_id,
+                expense_name=plan.expense_name,
+                installment_number=number,
+                total_installments=plan.installments,
+                value=last if number == plan.installments else base,
+                month=installment_month,
+                year=installment_year,
+                status=status,
+                plan_id=plan.id,
+            )
+        )
+    return installments
+
+
+def plan_totals(
+    plans: Iterable[InstallmentPlan],
+    exclude: OverrideKeys = frozenset(),
+    first: Optional[int] = None,
+) -> Dict[Tuple[int, int], Tuple[int, int]]:
+    """Soma em centavos e quantidade das parcelas calculadas por ``(card_id, índice de mês)``."""
+    totals: Dict[Tuple[int, int], Tuple[int, int]] = {}
+    for plan in plans:
+        start = month_index(plan.first_month, plan.first_year)
+        base, last = (to_cents(value) for value in split_installments(plan.total_value, plan.installments))
+        for index in plan_indices(plan, first):
+            number = index - start + 1
+            if (plan.id, number) in exclude:
+                continue
+            total, count = totals.get((plan.card_id, index), (0, 0))
+            totals[(plan.card_id, index)] = (total + (last if number == plan.installments else base), count + 1)
+    return totals
@@ -0,0 +1,45 @@
+"""Ciclos de fatura de cartão a partir do dia de fechamento e de vencimento.
+
+Uma fatura é identificada pelo mês em que fecha. Compras feitas até o dia de
+fechamento entram na fatura do próprio mês; depois dele, na do mês seguinte.
+O vencimento cai no mesmo mês do fechamento quando ``due_day`` é posterior a
+``closing_day`` e no mês seguinte caso contrário. Dias além do fim do mês são
+ajustados para o último dia.
+"""
+from __future__ import annotations
+
+import calendar
+from datetime import date
+from typing import Optional, Tuple
+
+from ..domain.entities import Card
+from ..domain.period import from_month_index, month_index
+
+
+def _clamped_date(index: int, day: int) -> date:
+    month, year = from_month_index(index)
+    return date(year, month, min(day, calendar.monthrange(year, month)[1]))
+
+
+def first_invoice_index(card: Card, month: int, year: int, purchase_day: Optional[int] = None) -> int:
+    """Índice de mês da fatura que recebe a primeira parcela de uma compra.
+
+    Sem ``purchase_day`` a compra é tratada como feita antes do fechamento.
+    """
+    index = month_index(month, year)
+    if purchase_day is not None and purchase_day > _clamped_date(index, card.closing_day).day:
+        index += 1
+    return index
+
+
+def invoice_dates(card: Card, month: int, year: int) -> Tuple[date, date]:
+    """Datas de fechamento e de vencimento da fatura de ``month/year``."""
+    index = month_index(month, year)
+    due_index = index if card.due_day > card.closing_day else index + 1
+    return _clamped_date(index, card.closing_day), _clamped_date(due_index, card.due_day)
+
+
+def open_invoice_index(card: Card, today: Optional[date] = None) -> int:
+    """Índice da fatura aberta (a próxima a fechar) na data ``today``."""
+    today = today or date.today()
+    return first_invoice_index(card, today.month, today.year, today.day)
@@ -0,0 +1,101 @@
+"""Cache LRU limitado, seguro entre threads, com contadores de acerto e falha."""
+from __future__ import annotations
+
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Callable, Dict, Hashable, Mapping, Optional
+
+# Custo aproximado, em bytes, de um valor escalar e de cada item de um contêiner.
+_SCALAR_BYTES = 32
+_ITEM_BYTES = 8
+
+
+def freeze(value: Any) -> Hashable:
+    """Forma hashable e normalizada de um payload JSON para usar como chave.
+
+    Dicionários viram tuplas ordenadas por chave, listas viram tuplas e floats
+    inteiros viram ``int`` (``12`` e ``12.0`` dão a mesma chave); inteiros
+    grandes continuam exatos.
+    """
+    if isinstance(value, Mapping):
+        return tuple(sorted((str(key), freeze(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def approximate_size(value: Any) -> int:
+    """Tamanho aproximado em bytes de um resultado JSON (dicionários, listas, escalares)."""
+    if isinstance(value, Mapping):
+        return _SCALAR_BYTES + sum(_ITEM_BYTES + approximate_size(key) + approximate_size(item) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return _SCALAR_BYTES + sum(_ITEM_BYTES + approximate_size(item) for item in value)
+    if isinstance(value, (str, bytes)):
+        return _SCALAR_BYTES + len(value)
+    return _SCALAR_BYTES
+
+
+class LRUCache:
+    """Guarda até ``maxsize`` resultados; o menos usado recentemente sai primeiro.
+
+    Com ``maxbytes``, a soma dos tamanhos aproximados também é limitada: saem
+    os menos usados até caber, e um resultado maior que ``maxbytes / 8`` não é
+    guardado. Os valores são devolvidos sem cópia e não devem ser alterados
+    por quem lê.
+    """
+
+    def __init__(self, maxsize: int = 1024, maxbytes: Optional[int] = None) -> None:
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self._items: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._sizes: Dict[Hashable, int] = {}
+        self._bytes = 0
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key]
+            self.misses += 1
+        value = compute()
+        if self.maxsize <= 0:
+            return value
+        size = approximate_size(value) if self.maxbytes is not None else 0
+        if self.maxbytes is not None and size > self.maxbytes // 8:
+            return value
+        with self._lock:
+            if key in self._items:
+                self._bytes -= self._sizes[key]
+            self._items[key] = value
+            self._items.move_to_end(key)
+            self._sizes[key] = size
+            self._bytes += size
+            while len(self._items) > self.maxsize or (self.maxbytes is not None and self._bytes > self.maxbytes):
+                evicted, _ = self._items.popitem(last=False)
+                self._bytes -= self._sizes.pop(evicted)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self._sizes.clear()
+            self._bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "size": len(self._items),
+                "maxsize": self.maxsize,
+                "bytes": self._bytes,
+                "maxbytes": self.maxbytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
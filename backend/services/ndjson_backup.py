@@ -0,0 +1,247 @@
+"""Backup em ZIP com um arquivo NDJSON por tabela e um manifesto.
+
+A exportação lê todas as tabelas de um mesmo instante do banco. Na importação
+cada tabela é gravada em sua própria transação: um registro inválido invalida
+apenas a sua tabela (e as que ficariam referenciando registros dela que não
+existem), e uma importação interrompida pode ser retomada com o mesmo arquivo,
+pulando as tabelas já concluídas.
+"""
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+import hashlib
+from io import BytesIO
+import json
+import sqlite3
+from typing import Any
+import zipfile
+
+from ..repositories.sqlite.change_log import current_change_seq
+from .backup_service import (
+    BACKUP_TABLES,
+    BACKUP_VERSION,
+    FOREIGN_KEYS,
+    SUPPORTED_BACKUP_MAJOR,
+    BackupValidationError,
+    _VALIDATORS,
+    _insert_entities,
+    _relationship_errors,
+    _reset_sequences,
+    _row_record,
+    _validate_collections,
+)
+
+MANIFEST_NAME = "manifest.json"
+NDJSON_FORMAT = "ndjson"
+
+
+def _encode_table(table: str, rows: list[tuple]) -> tuple[str, bytes, int]:
+    lines = [json.dumps(_row_record(table, row), ensure_ascii=False) for row in rows]
+    data = "".join(f"{line}\n" for line in lines).encode("utf-8")
+    return table, data, len(lines)
+
+
+def export_ndjson_archive(db_path: str) -> bytes:
+    """Exporta todas as tabelas para um ZIP com manifesto.
+
+    As tabelas e o ``changeSeq`` são lidos em uma única transação de leitura,
+    então o arquivo reflete um mesmo instante do banco; só a codificação das
+    linhas é feita em paralelo.
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute("BEGIN")
+        change_seq = current_change_seq(conn)
+        snapshot = {
+            table: conn.execute(f"SELECT {', '.join(columns)} FROM {table} ORDER BY id").fetchall()
+            for table, columns in BACKUP_TABLES.items()
+        }
+        conn.rollback()
+    finally:
+        conn.close()
+    with ThreadPoolExecutor(max_workers=len(BACKUP_TABLES)) as pool:
+        exported = list(pool.map(_encode_table, snapshot, snapshot.values()))
+
+    manifest: dict[str, Any] = {
+        "version": BACKUP_VERSION,
+        "format": NDJSON_FORMAT,
+        "exportedAt": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "changeSeq": change_seq,
+        "tables": {},
+    }
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for table, data, count in exported:
+            file_name = f"{table}.ndjson"
+            archive.writestr(file_name, data)
+            manifest["tables"][table] = {
+                "file": file_name,
+                "count": count,
+                "sha256": hashlib.sha256(data).hexdigest(),
+            }
+        archive.writestr(MANIFEST_NAME, json.dumps(manifest, ensure_ascii=False, indent=2))
+    return buffer.getvalue()
+
+
+def _read_manifest(archive: zipfile.ZipFile) -> tuple[dict[str, Any], str]:
+    try:
+        raw = archive.read(MANIFEST_NAME)
+        manifest = json.loads(raw)
+    except (KeyError, ValueError) as exc:
+        raise BackupValidationError("Arquivo inválido: manifesto ausente ou corrompido.") from exc
+    if not isinstance(manifest, dict) or manifest.get("format") != NDJSON_FORMAT:
+        raise BackupValidationError("Arquivo inválido: formato de backup desconhecido.")
+    version = manifest.get("version")
+    if not isinstance(version, str) or version.split(".", 1)[0] != SUPPORTED_BACKUP_MAJOR:
+        raise BackupValidationError("Versão de backup incompatível com esta aplicação.")
+    if not isinstance(manifest.get("tables"), dict):
+        raise BackupValidationError("Arquivo inválido: manifesto sem tabelas.")
+    return manifest, hashlib.sha256(raw).hexdigest()
+
+
+def _read_table(archive: zipfile.ZipFile, table: str, entry: Any) -> tuple[list[Any], list[dict[str, Any]]]:
+    collection = _VALIDATORS[table].collection
+    if not isinstance(entry, dict) or not isinstance(entry.get("file"), str):
+        return [], [{"collection": collection, "index": None, "error": "Manifesto inválido para a tabela."}]
+    try:
+        data = archive.read(entry["file"])
+    except KeyError:
+        return [], [{"collection": collection, "index": None, "error": "Arquivo da tabela ausente."}]
+    if hashlib.sha256(data).hexdigest() != entry.get("sha256"):
+        return [], [{"collection": collection, "index": None, "error": "Checksum da tabela não confere."}]
+    items: list[Any] = []
+    errors: list[dict[str, Any]] = []
+    for index, line in enumerate(data.decode("utf-8").splitlines()):
+        try:
+            items.append(json.loads(line))
+        except ValueError:
+            items.append(None)
+            errors.append({"collection": collection, "index": index, "error": "Linha NDJSON inválida."})
+    if len(items) != entry.get("count"):
+        errors.append({"collection": collection, "index": None, "error": "Quantidade de registros não confere."})
+    return items, errors
+
+
+def _foreign_key_errors(conn: sqlite3.Connection, table: str) -> list[dict[str, Any]]:
+    """Linhas de ``table`` que referenciam registros inexistentes, como um ``PRAGMA foreign_key_check``."""
+    collection = _VALIDATORS[table].collection
+    errors = []
+    for column, parent in FOREIGN_KEYS.get(table, ()):
+        ids = [
+            row[0]
+            for row in conn.execute(
+                f"SELECT id FROM {table} WHERE {column} IS NOT NULL AND {column} NOT IN (SELECT id FROM {parent}) ORDER BY id"
+            )
+        ]
+        if ids:
+            errors.append(
+                {
+                    "collection": collection,
+                    "index": None,
+                    "error": f"Integridade inválida: '{column}' referencia '{parent}' inexistente (ids {', '.join(map(str, ids[:10]))}).",
+                }
+            )
+    return errors
+
+
+def _ensure_progress_table(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS backup_import_progress (
+            archive_sha256 TEXT NOT NULL,
+            table_name TEXT NOT NULL,
+            imported_at TEXT NOT NULL,
+            PRIMARY KEY (archive_sha256, table_name)
+        )
+        """
+    )
+
+
+def restore_ndjson_archive(db_path: str, archive_bytes: bytes) -> dict[str, dict[str, Any]]:
+    """Importa cada tabela do ZIP em sua própria transação.
+
+    Retorna o resultado por tabela: ``imported``, ``skipped`` (já importada
+    em uma tentativa anterior com o mesmo arquivo) ou ``error`` com a lista de
+    erros. Uma tabela só é gravada, junto com o seu progresso, se as linhas
+    dela referenciarem registros existentes: se a tabela referenciada falhou,
+    a dependente mantém os dados atuais. O progresso só é descartado quando
+    todas as tabelas foram concluídas e nenhuma referência ficou pendente.
+    """
+    try:
+        archive = zipfile.ZipFile(BytesIO(archive_bytes))
+    except zipfile.BadZipFile as exc:
+        raise BackupValidationError("Arquivo inválido: ZIP corrompido.") from exc
+    with archive:
+        manifest, archive_id = _read_manifest(archive)
+        entries = manifest["tables"]
+        with ThreadPoolExecutor(max_workers=len(BACKUP_TABLES)) as pool:
+            read = dict(
+                zip(
+                    BACKUP_TABLES,
+                    pool.map(lambda table: _read_table(archive, table, entries.get(table)), BACKUP_TABLES),
+                )
+            )
+
+    errors = [error for _, table_errors in read.values() for error in table_errors]
+    reported = {(error["collection"], error["index"]) for error in errors}
+    parsed, record_errors = _validate_collections({table: items for table, (items, _) in read.items()})
+    errors.extend(error for error in record_errors if (error["collection"], error["index"]) not in reported)
+    errors.extend(_relationship_errors(**parsed))
+    table_by_collection = {validator.collection: table for table, validator in _VALIDATORS.items()}
+    errors_by_table: dict[str, list[dict[str, Any]]] = {table: [] for table in BACKUP_TABLES}
+    for error in sorted(errors, key=lambda item: (item["index"] is None, item["index"] or 0)):
+        errors_by_table[table_by_collection[error["collection"]]].append(error)
+
+    results: dict[str, dict[str, Any]] = {}
+    conn = sqlite3.connect(db_path)
+    try:
+        _ensure_progress_table(conn)
+        conn.commit()
+        done = {
+            row[0]
+            for row in conn.execute(
+                "SELECT table_name FROM backup_import_progress WHERE archive_sha256=?", (archive_id,)
+            )
+        }
+        for table in BACKUP_TABLES:
+            if table in done:
+                results[table] = {"status": "skipped", "count": len(parsed[table])}
+                continue
+            if errors_by_table[table]:
+                results[table] = {"status": "error", "count": 0, "errors": errors_by_table[table]}
+                continue
+            try:
+                conn.execute("BEGIN")
+                conn.execute(f"DELETE FROM {table}")
+                _insert_entities(conn, table, parsed[table])
+                _reset_sequences(conn, table, parsed[table])
+                foreign_key_errors = _foreign_key_errors(conn, table)
+                if foreign_key_errors:
+                    conn.rollback()
+                    results[table] = {"status": "error", "count": 0, "errors": foreign_key_errors}
+                    continue
+                conn.execute(
+                    "INSERT INTO backup_import_progress (archive_sha256, table_name, imported_at) VALUES (?, ?, ?)",
+                    (archive_id, table, datetime.now().isoformat(timespec="seconds")),
+                )
+                conn.commit()
+            except sqlite3.Error as exc:
+                conn.rollback()
+                results[table] = {"status": "error", "count": 0, "errors": [{"index": None, "error": str(exc)}]}
+                continue
+            results[table] = {"status": "imported", "count": len(parsed[table])}
+        if all(result["status"] != "error" for result in results.values()):
+            # Tabelas puladas vêm de uma tentativa anterior; confere o banco inteiro antes de concluir.
+            dangling = {table: errors for table in BACKUP_TABLES if (errors := _foreign_key_errors(conn, table))}
+            for table, table_errors in dangling.items():
+                results[table] = {"status": "error", "count": 0, "errors": table_errors}
+                conn.execute(
+                    "DELETE FROM backup_import_progress WHERE archive_sha256=? AND table_name=?", (archive_id, table)
+                )
+            if not dangling:
+                conn.execute("DELETE FROM backup_import_progress WHERE archive_sha256=?", (archive_id,))
+            conn.commit()
+    finally:
+        conn.close()
+    return results
@@ -0,0 +1,76 @@
+"""Base para tarefas periódicas executadas em thread de segundo plano."""
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+import os
+import threading
+from typing import Any
+
+
+class PeriodicWorker(ABC):
+    """Executa ``run_once`` a cada ``interval_seconds`` em uma thread daemon.
+
+    Subclasses implementam ``run_once`` e registram o resultado com ``_update``;
+    ``status`` devolve uma cópia segura para ser exposta em ``/health``.
+    """
+
+    thread_name = "periodic-worker"
+    run_on_start = False
+
+    def __init__(self, interval_seconds: float) -> None:
+        self.interval_seconds = interval_seconds
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._status: dict[str, Any] = {
+            "enabled": interval_seconds > 0,
+            "interval_seconds": interval_seconds,
+            "runs": 0,
+            "last_run": None,
+            "last_status": None,
+            "last_error": None,
+        }
+
+    def start(self) -> None:
+        if self.interval_seconds <= 0 or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=self.thread_name, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=30)
+        self._thread = None
+
+    def status(self) -> dict[str, Any]:
+        with self._lock:
+            return dict(self._status)
+
+    @abstractmethod
+    def run_once(self) -> dict[str, Any]:
+        """Executa uma rodada da tarefa e retorna o resultado."""
+
+    def _run(self) -> None:
+        _lower_thread_priority()
+        if self.run_on_start:
+            self.run_once()
+        while not self._stop.wait(self.interval_seconds):
+            self.run_once()
+
+    def _update(self, **values: Any) -> None:
+        with self._lock:
+            self._status.update(values)
+            self._status["runs"] += 1
+
+
+def _lower_thread_priority() -> None:
+    """Reduz a prioridade da thread atual quando o sistema permite (Linux)."""
+    setpriority = getattr(os, "setpriority", None)
+    if setpriority is None:
+        return
+    try:
+        setpriority(os.PRIO_PROCESS, threading.get_native_id(), 10)
+    except OSError:
+        pass
@@ -0,0 +1,93 @@
+"""Índices de preços: importação de CSV e deflação de valores para um mês-base.
+
+O fator de um período ``t`` é ``índice(base) / índice(t)``; valores nominais
+multiplicados por ele ficam em moeda do mês-base. Os fatores de todos os
+períodos são calculados juntos e aplicados como uma multiplicação de arrays
+sobre os totais por período.
+"""
+from __future__ import annotations
+
+import csv
+from io import StringIO
+import math
+from typing import Dict, List, Mapping, Sequence
+
+import numpy as np
+
+from ..domain.entities import PriceIndex
+from ..domain.period import from_month_index, month_index
+
+DEFAULT_SERIES = "IPCA"
+
+
+def parse_series(raw_value: object) -> str:
+    return str(raw_value or DEFAULT_SERIES).strip().upper()
+
+
+def parse_period(raw_value: str) -> int:
+    """Aceita ``AAAA-MM`` ou ``MM/AAAA`` e devolve o índice de mês."""
+    text = str(raw_value or "").strip()
+    try:
+        if "/" in text:
+            month, year = (int(part) for part in text.split("/"))
+        else:
+            year, month = (int(part) for part in text.split("-"))
+    except ValueError as exc:
+        raise ValueError(f"Período inválido: '{text}'. Use AAAA-MM ou MM/AAAA.") from exc
+    if not 1 <= month <= 12 or year <= 0:
+        raise ValueError(f"Período inválido: '{text}'. Use AAAA-MM ou MM/AAAA.")
+    return month_index(month, year)
+
+
+def _parse_number(raw_value: str) -> float:
+    text = str(raw_value).strip()
+    if "," in text:
+        text = text.replace(".", "").replace(",", ".")
+    value = float(text)
+    if not math.isfinite(value) or value <= 0:
+        raise ValueError(f"Valor do índice deve ser um número positivo: '{text}'.")
+    return value
+
+
+def parse_index_csv(text: str, series: str = DEFAULT_SERIES) -> List[PriceIndex]:
+    """Lê um CSV com ``periodo,valor`` ou ``ano,mes,valor`` (``,`` ou ``;``).
+
+    Valores com vírgula decimal (``6.512,34``) são aceitos; valores nulos,
+    negativos ou não finitos, não. Erros indicam a linha do arquivo.
+    """
+    sample = text[:1024]
+    delimiter = ";" if sample.count(";") > sample.count(",") else ","
+    reader = csv.DictReader(StringIO(text), delimiter=delimiter)
+    fields = {name.strip().lower() for name in reader.fieldnames or []}
+    if "valor" not in fields or not ({"periodo"} <= fields or {"ano", "mes"} <= fields):
+        raise ValueError("CSV deve ter as colunas periodo,valor ou ano,mes,valor.")
+    indices = []
+    for line, row in enumerate(reader, start=2):
+        row = {key.strip().lower(): value for key, value in row.items() if key}
+        try:
+            if row.get("periodo"):
+                index = parse_period(row["periodo"])
+            else:
+                index = parse_period(f"{int(row['ano'])}-{int(row['mes'])}")
+            month, year = from_month_index(index)
+            indices.append(PriceIndex(series=series, month=month, year=year, value=_parse_number(row["valor"])))
+        except (KeyError, TypeError, ValueError) as exc:
+            raise ValueError(f"Linha {line} inválida: {exc}") from exc
+    if not indices:
+        raise ValueError("CSV sem linhas de índice.")
+    return indices
+
+
+def deflation_factors(values: Mapping[int, float], base: int, periods: Sequence[int]) -> np.ndarray:
+    """Fatores ``índice(base) / índice(t)`` para cada índice de mês em ``periods``."""
+    missing = sorted({base, *periods} - values.keys())
+    if missing:
+        labels = ", ".join(f"{year}-{month:02d}" for month, year in map(from_month_index, missing[:12]))
+        raise ValueError(f"Índice de preços ausente para: {labels}.")
+    series = np.array([values[period] for period in periods], dtype=float)
+    return values[base] / series
+
+
+def deflate(totals: Dict[str, np.ndarray], factors: np.ndarray) -> Dict[str, np.ndarray]:
+    """Multiplica cada coluna de totais por período pelos fatores."""
+    return {name: np.round(column * factors, 2) for name, column in totals.items()}
@@ -0,0 +1,56 @@
+"""Pool de processos compartilhado pelos cálculos pesados.
+
+Criar um pool a cada requisição custaria, no servidor multithread, um ``fork``
+do processo com threads ativas ou, no executável congelado, uma nova
+inicialização do app por processo filho. O pool é criado uma única vez, com
+contexto ``spawn`` explícito, na primeira tarefa grande, e encerrado ao sair.
+"""
+from __future__ import annotations
+
+import atexit
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from threading import Lock
+from typing import Any, Callable, Iterable, List, Optional
+
+_pool: Optional[ProcessPoolExecutor] = None
+_lock = Lock()
+
+
+def _shared_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=os.cpu_count() or 1,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def shutdown_pool() -> None:
+    """Encerra o pool compartilhado; a próxima tarefa cria outro."""
+    global _pool
+    with _lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def map_in_pool(func: Callable[..., Any], jobs: Iterable[tuple]) -> Optional[List[Any]]:
+    """Executa ``func(*job)`` para cada job no pool, preservando a ordem.
+
+    Retorna ``None`` se o pool não puder ser usado (sem suporte a processos ou
+    pool quebrado), para que quem chamou execute os jobs em série.
+    """
+    jobs = list(jobs)
+    try:
+        return list(_shared_pool().map(func, *zip(*jobs)))
+    except (OSError, RuntimeError, BrokenProcessPool):
+        shutdown_pool()
+        return None
+
+
+atexit.register(shutdown_pool)
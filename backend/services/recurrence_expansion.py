@@ -0,0 +1,85 @@
+"""Expansão de recorrências em ocorrências mensais.
+
+As ocorrências de uma regra em uma janela são calculadas pelo motor de regras
+(``domain.recurrence_rules``) a partir dos limites da janela, sem percorrer a
+série desde o início.
+"""
+from __future__ import annotations
+
+from typing import AbstractSet, Iterable, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from ..domain.entities import Recurrence
+from ..domain.period import filter_bounds, from_month_index
+from ..domain.value_objects import from_cents, to_cents
+from ..domain.recurrence_rules import RecurrenceRule
+
+
+def occurrence_counts(
+    recurrence: Recurrence,
+    first: Optional[int] = None,
+    last: Optional[int] = None,
+) -> List[Tuple[int, int]]:
+    """``(índice de mês, ocorrências no mês)`` dentro de ``[first, last]``."""
+    return RecurrenceRule.of(recurrence).month_counts(first, last)
+
+
+def occurrence_indices(recurrence: Recurrence, first: Optional[int] = None, last: Optional[int] = None) -> List[int]:
+    """Índices de mês com ocorrências dentro de ``[first, last]``."""
+    return [index for index, _ in occurrence_counts(recurrence, first, last)]
+
+
+def expand_occurrence_counts(
+    recurrence: Recurrence,
+    *,
+    month: Optional[int] = None,
+    year: Optional[int] = None,
+) -> List[Tuple[int, int, int]]:
+    """Retorna ``(mês, ano, ocorrências)`` no mesmo filtro usado nas listagens."""
+    bounds = filter_bounds(month, year)
+    counts = occurrence_counts(recurrence, *bounds) if bounds else occurrence_counts(recurrence)
+    occurrences = [(*from_month_index(index), count) for index, count in counts]
+    if month is not None and year is None:
+        occurrences = [item for item in occurrences if item[0] == month]
+    return occurrences
+
+
+def expand_occurrences(
+    recurrence: Recurrence,
+    *,
+    month: Optional[int] = None,
+    year: Optional[int] = None,
+) -> List[Tuple[int, int]]:
+    """Retorna ``(mês, ano)`` das ocorrências no mesmo filtro usado nas listagens."""
+    return [(item_month, item_year) for item_month, item_year, _ in expand_occurrence_counts(recurrence, month=month, year=year)]
+
+
+def occurrence_value(recurrence: Recurrence, count: int) -> float:
+    """Valor lançado no mês: o valor da regra vezes as ocorrências no mês."""
+    return from_cents(to_cents(recurrence.value) * count)
+
+
+def add_occurrence_totals(
+    recurrences: Iterable[Recurrence],
+    taken: AbstractSet[Tuple[int, int, int]],
+    first: int,
+    totals: Mapping[str, np.ndarray],
+) -> None:
+    """Soma as ocorrências em ``totals[kind]``, vetores inteiros de centavos indexados por ``índice de mês - first``.
+
+    Cada mês recebe ``to_cents(valor) * ocorrências``, o mesmo valor de
+    ``occurrence_value`` gravado ao materializar. A janela vai até o fim dos
+    vetores; ocorrências com chave ``(recurrence_id, ano, mês)`` em ``taken``
+    (gravadas ou removidas) ficam de fora.
+    """
+    for recurrence in recurrences:
+        target = totals[recurrence.kind]
+        counts = [
+            (index, count)
+            for index, count in occurrence_counts(recurrence, first, first + len(target) - 1)
+            if (recurrence.id, *reversed(from_month_index(index))) not in taken
+        ]
+        if counts:
+            indices, occurrences = np.array(counts, dtype=np.int64).T
+            np.add.at(target, indices - first, occurrences * to_cents(recurrence.value))
@@ -0,0 +1,76 @@
+"""Materialização contínua das recorrências até um horizonte móvel."""
+from __future__ import annotations
+
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Optional
+
+from ..domain.period import from_month_index, month_index
+from .periodic_worker import PeriodicWorker
+
+# Horizonte dos ``POST /recorrencias/aplicar*`` quando o materializador está desligado.
+DEFAULT_APPLY_HORIZON_MONTHS = 24
+
+
+class RecurrenceMaterializer(PeriodicWorker):
+    """Mantém as recorrências gravadas até o mês atual + ``horizon_months``.
+
+    Roda ao iniciar e depois a cada ``interval_seconds``; quando o mês vira, o
+    horizonte avança e só as competências que faltam são inseridas. Sem
+    ``horizon_months`` o materializador fica desligado e ``POST
+    /recorrencias/aplicar`` gera até ``DEFAULT_APPLY_HORIZON_MONTHS`` meses à
+    frente.
+    """
+
+    thread_name = "recurrence-materializer"
+    run_on_start = True
+
+    def __init__(
+        self,
+        materialize: Callable[[int], Dict[str, int]],
+        horizon_months: Optional[int],
+        interval_seconds: float = 3600,
+    ) -> None:
+        super().__init__(interval_seconds if horizon_months is not None else 0)
+        self._materialize = materialize
+        self.horizon_months = horizon_months
+        self._status.update(horizon_months=horizon_months, horizon=None, last_created=None)
+
+    def horizon(self, today: Optional[date] = None) -> Optional[int]:
+        """Índice de mês (``ano * 12 + mês - 1``) até onde as ocorrências são geradas."""
+        if self.horizon_months is None:
+            return None
+        today = today or date.today()
+        return month_index(today.month, today.year) + self.horizon_months
+
+    def run_once(self) -> dict[str, Any]:
+        started_at = datetime.now().isoformat(timespec="seconds")
+        horizon = self.horizon()
+        if horizon is None:
+            return self.status()
+        try:
+            created = self._materialize(horizon)
+            month, year = from_month_index(horizon)
+            self._update(
+                last_run=started_at,
+                last_status="ok",
+                horizon=f"{year}-{month:02d}",
+                last_created=created,
+                last_error=None,
+            )
+        except Exception as exc:
+            self._update(last_run=started_at, last_status="error", last_error=str(exc))
+        return self.status()
+
+
+def apply_horizon(materializer: Optional[RecurrenceMaterializer], today: Optional[date] = None) -> int:
+    """Índice de mês até onde ``POST /recorrencias/aplicar*`` gera ocorrências.
+
+    Usa o horizonte do materializador, quando configurado; senão, o mês atual
+    + ``DEFAULT_APPLY_HORIZON_MONTHS``, para que uma regra longa não vire
+    milhares de linhas de uma vez.
+    """
+    horizon = materializer.horizon(today) if materializer else None
+    if horizon is not None:
+        return horizon
+    today = today or date.today()
+    return month_index(today.month, today.year) + DEFAULT_APPLY_HORIZON_MONTHS
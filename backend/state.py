@@ -10,6 +10,10 @@ from .repositories.sqlite.cartao_repo import SQLiteCardRepository
 from .repositories.sqlite.parcela_repo import SQLiteInstallmentRepository
 from .repositories.sqlite.recorrencia_repo import SQLiteRecurrenceRepository
 from .repositories.sqlite.meta_repo import SQLiteGoalRepository
+from .repositories.sqlite.indice_repo import SQLitePriceIndexRepository
+from .services.backup_scheduler import BackupScheduler
+from .services.recurrence_materializer import RecurrenceMaterializer
+from .server import ServerStatus
 
 BASE_DATA_DIR: str | None = None
 DB_PATH: str | None = None
@@ -22,3 +26,10 @@ card_repo: Optional[SQLiteCardRepository] = None
 installment_repo: Optional[SQLiteInstallmentRepository] = None
 recurrence_repo: Optional[SQLiteRecurrenceRepository] = None
 goal_repo: Optional[SQLiteGoalRepository] = None
+price_index_repo: Optional[SQLitePriceIndexRepository] = None
+
+backup_scheduler: Optional[BackupScheduler] = None
+recurrence_materializer: Optional[RecurrenceMaterializer] = None
+
+# Definido quando o servidor inicia; None nos testes e ao importar o app.
+server_status: Optional[ServerStatus] = None
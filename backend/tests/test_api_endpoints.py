@@ -1,16 +1,27 @@
+from datetime import date
+import json
 import os
+import sqlite3
 import tempfile
+import threading
+from urllib.request import urlopen
 
 import pytest
 
 import backend.app as app_module
+from backend import state
+from backend.domain.entities import Card, Category, Expense, Goal, Income, InstallmentPlan
+from backend.domain.period import from_month_index, month_index
 from backend.repositories.sqlite.cartao_repo import SQLiteCardRepository
 from backend.repositories.sqlite.categoria_repo import SQLiteCategoryRepository
 from backend.repositories.sqlite.entrada_repo import SQLiteIncomeRepository
 from backend.repositories.sqlite.gasto_repo import SQLiteExpenseRepository
+from backend.repositories.sqlite.indice_repo import SQLitePriceIndexRepository
 from backend.repositories.sqlite.meta_repo import SQLiteGoalRepository
 from backend.repositories.sqlite.parcela_repo import SQLiteInstallmentRepository
 from backend.repositories.sqlite.recorrencia_repo import SQLiteRecurrenceRepository
+from backend.server import configured_threads, create_production_server
+from backend.services.recurrence_materializer import DEFAULT_APPLY_HORIZON_MONTHS
 
 
 @pytest.fixture()
@@ -25,6 +36,7 @@ def client_and_repos(monkeypatch):
             "installment": SQLiteInstallmentRepository(db_path),
             "recurrence": SQLiteRecurrenceRepository(db_path),
             "goal": SQLiteGoalRepository(db_path),
+            "price_index": SQLitePriceIndexRepository(db_path),
         }
         monkeypatch.setattr(app_module, "category_repo", repos["category"])
         monkeypatch.setattr(app_module, "expense_repo", repos["expense"])
@@ -33,6 +45,7 @@ def client_and_repos(monkeypatch):
         monkeypatch.setattr(app_module, "installment_repo", repos["installment"])
         monkeypatch.setattr(app_module, "recurrence_repo", repos["recurrence"])
         monkeypatch.setattr(app_module, "goal_repo", repos["goal"])
+        monkeypatch.setattr(app_module, "price_index_repo", repos["price_index"])
         app_module.sync_state()
         try:
             yield app_module.app.test_client(), repos
@@ -139,6 +152,40 @@ def test_create_recurrence_rejects_unknown_category(client_and_repos):
     assert "Categoria não encontrada" in response.get_json()["error"]
 
 
+def test_update_recurrence_frequency_uses_the_new_default_interval(client_and_repos):
+    client, _ = client_and_repos
+    created = client.post(
+        "/recorrencias",
+        json={"kind": "expense", "name": "Seguro", "value": 900, "start_month": 2, "start_year": 2026, "occurrences": 3},
+    ).get_json()
+
+    yearly = client.put(f"/recorrencias/{created['id']}", json={"frequency": "anual"}).get_json()
+    renamed = client.put(f"/recorrencias/{created['id']}", json={"name": "Seguro do carro"}).get_json()
+    biennial = client.put(f"/recorrencias/{created['id']}", json={"frequency": "mensal", "interval_months": 24}).get_json()
+
+    assert created["interval_months"] == 1
+    assert (yearly["frequency"], yearly["interval_months"]) == ("anual", 12)
+    assert renamed["interval_months"] == 12
+    assert (biennial["frequency"], biennial["interval_months"]) == ("mensal", 24)
+
+
+def test_recurrence_rejects_zero_interval_and_out_of_range_start_day(client_and_repos):
+    client, _ = client_and_repos
+    base = {"kind": "expense", "name": "Academia", "value": 90, "start_month": 2, "start_year": 2026}
+    created = client.post("/recorrencias", json=base).get_json()
+
+    for invalid in ({"interval_months": 0}, {"interval_months": -1}, {"frequency": "semanal", "start_day": 0}, {"start_day": 32}):
+        created_response = client.post("/recorrencias", json={**base, **invalid})
+        assert created_response.status_code == 400
+        assert client.put(f"/recorrencias/{created['id']}", json=invalid).status_code == 400
+    expense = client.post(
+        "/gastos",
+        json={"name": "Academia", "value": 90, "month": 2, "year": 2026, "recurring": {"enabled": True, "interval_months": 0}},
+    )
+    assert expense.status_code == 400
+    assert [item["interval_months"] for item in client.get("/recorrencias").get_json()] == [1]
+
+
 def test_report_month_pdf_returns_file(client_and_repos):
     client, repos = client_and_repos
     category = repos["category"].add(app_module.Category(name="Mercado"))
@@ -155,3 +202,508 @@ def test_report_month_pdf_returns_file(client_and_repos):
     assert "relatorio_02_2026.pdf" in response.headers.get("Content-Disposition", "")
     assert response.data.startswith(b"%PDF")
     assert len(response.data) > 1500
+
+
+def test_health_reports_backup_scheduler_status(client_and_repos):
+    client, _ = client_and_repos
+    response = client.get("/health")
+    payload = response.get_json()
+    assert response.status_code == 200
+    assert payload["status"] == "ok"
+    assert payload["backup_scheduler"]["runs"] == 0
+    assert payload["backup_scheduler"]["last_status"] is None
+
+
+def test_restore_snapshot_validates_snapshot_name(client_and_repos):
+    client, _ = client_and_repos
+    response = client.post("/backup/restaurar/saveyourmoney.json")
+    assert response.status_code == 400
+    response = client.post("/backup/restaurar/inexistente.db")
+    assert response.status_code == 404
+
+
+def test_virtual_recurrence_occurrences_can_be_edited_and_removed(client_and_repos):
+    client, repos = client_and_repos
+    created = client.post(
+        "/recorrencias",
+        json={
+            "kind": "income",
+            "name": "Salário",
+            "value": 3000,
+            "start_month": 1,
+            "start_year": 2026,
+            "occurrences": 120,
+            "virtual": True,
+        },
+    ).get_json()
+
+    listed = client.get("/entradas?mes=2&ano=2026").get_json()
+    edited = client.put(f"/recorrencias/{created['id']}/ocorrencias/2026/3", json={"value": 3200})
+    report = client.get("/relatorios/mes?mes=3&ano=2026").get_json()
+    removed = client.delete(f"/recorrencias/{created['id']}/ocorrencias/2026/3")
+
+    assert [(item["id"], item["value"], item["recurrence_id"]) for item in listed] == [(None, 3000, created["id"])]
+    assert edited.status_code == 201
+    assert report["total_incomes"] == 3200
+    assert removed.status_code == 200
+    assert client.get("/entradas?mes=3&ano=2026").get_json() == []
+    assert repos["income"].list() == []
+    assert client.post("/recorrencias/aplicar", json={"id": created["id"]}).status_code == 400
+
+
+def test_expense_future_scope_updates_and_truncates_series(client_and_repos):
+    client, repos = client_and_repos
+    created = client.post(
+        "/recorrencias",
+        json={"kind": "expense", "name": "Academia", "value": 100, "start_month": 1, "start_year": 2026, "occurrences": 6},
+    ).get_json()
+    client.post("/recorrencias/aplicar", json={"id": created["id"]})
+    march = next(item for item in repos["expense"].list() if item.month == 3)
+
+    edited = client.put(f"/gastos/{march.id}", json={"value": 120, "scope": "future"})
+    values = {item.month: item.value for item in repos["expense"].list()}
+    may = next(item for item in repos["expense"].list() if item.month == 5)
+    removed = client.delete(f"/gastos/{may.id}", json={"scope": "future"})
+
+    assert edited.status_code == 200
+    assert values == {1: 100, 2: 100, 3: 120, 4: 120, 5: 120, 6: 120}
+    assert removed.status_code == 200
+    assert sorted(item.month for item in repos["expense"].list()) == [1, 2, 3, 4]
+    assert repos["recurrence"].get(created["id"]).occurrences == 4
+    assert client.delete(f"/gastos/{march.id}", json={"scope": "all"}).status_code == 200
+    assert repos["expense"].list() == []
+    assert repos["recurrence"].get(created["id"]) is None
+
+
+def test_expense_future_edit_rolls_back_row_when_propagation_fails(client_and_repos, monkeypatch):
+    client, repos = client_and_repos
+    created = client.post(
+        "/recorrencias",
+        json={"kind": "expense", "name": "Academia", "value": 100, "start_month": 1, "start_year": 2026, "occurrences": 3},
+    ).get_json()
+    client.post("/recorrencias/aplicar", json={"id": created["id"]})
+    february = next(item for item in repos["expense"].list() if item.month == 2)
+
+    def fail(*_):
+        raise sqlite3.IntegrityError("UNIQUE constraint failed")
+
+    monkeypatch.setattr(repos["recurrence"], "_update", fail)
+    response = client.put(f"/gastos/{february.id}", json={"name": "Pilates", "value": 120, "scope": "future"})
+
+    assert response.status_code == 409
+    assert [(item.name, item.value) for item in repos["expense"].list()] == [("Academia", 100)] * 3
+
+
+def test_virtual_recurrence_future_edit_splits_rule(client_and_repos):
+    client, repos = client_and_repos
+    created = client.post(
+        "/recorrencias",
+        json={"kind": "expense", "name": "Streaming", "value": 40, "start_month": 1, "start_year": 2026, "occurrences": 12, "virtual": True},
+    ).get_json()
+    override = client.put(f"/recorrencias/{created['id']}/ocorrencias/2026/4", json={"value": 45}).get_json()
+
+    client.put(f"/gastos/{override['id']}", json={"value": 50, "scope": "future"})
+    rules = sorted(repos["recurrence"].list(), key=lambda item: item.id)
+
+    assert [(rule.start_month, rule.occurrences, rule.value) for rule in rules] == [(1, 3, 40), (4, 9, 50)]
+    assert client.get("/gastos?mes=3&ano=2026").get_json()[0]["value"] == 40
+    assert [item["value"] for item in client.get("/gastos?mes=9&ano=2026").get_json()] == [50]
+    assert repos["expense"].get(override["id"]).recurrence_id == rules[1].id
+
+
+def test_installments_follow_card_closing_day_and_invoice_timeline(client_and_repos):
+    client, repos = client_and_repos
+    card = client.post("/cartoes", json={"name": "Nubank", "limit": 5000, "closing_day": 10, "due_day": 5}).get_json()
+    client.post(
+        "/gastos",
+        json={"name": "TV", "value": 300, "month": 1, "year": 2099, "installments": {"card_id": card["id"], "total": 3, "purchase_day": 15}},
+    )
+    client.post(
+        "/gastos",
+        json={"name": "Livro", "value": 50, "month": 2, "year": 2099, "installments": {"card_id": card["id"], "total": 1, "purchase_day": 10}},
+    )
+
+    invoice = client.get(f"/faturas?cartao_id={card['id']}&mes=2&ano=2099").get_json()
+    timeline = client.get(f"/faturas/timeline?cartao_id={card['id']}").get_json()["faturas"]
+
+    tv = [item for item in client.get(f"/parcelas?cartao_id={card['id']}").get_json() if item["expense_name"] == "TV"]
+
+    assert [(item["month"], item["year"]) for item in tv] == [
+        (2, 2099),
+        (3, 2099),
+        (4, 2099),
+    ]
+    assert invoice["total"] == 150
+    assert (invoice["fechamento"], invoice["vencimento"]) == ("2099-02-10", "2099-03-05")
+    assert [(item["month"], item["total"], item["parcelas"], item["status"]) for item in timeline] == [
+        (2, 150, 2, "futura"),
+        (3, 100, 1, "futura"),
+        (4, 100, 1, "futura"),
+    ]
+    assert [(plan.expense_name, plan.total_value, plan.installments) for plan in repos["installment"].list_plans(card_id=card["id"])] == [
+        ("TV", 300, 3),
+        ("Livro", 50, 1),
+    ]
+    assert client.delete(f"/parcelamentos/{tv[0]['plan_id']}").status_code == 200
+    assert [plan.expense_name for plan in repos["installment"].list_plans(card_id=card["id"])] == ["Livro"]
+    assert [item["month"] for item in client.get(f"/faturas/timeline?cartao_id={card['id']}").get_json()["faturas"]] == [2]
+
+
+def test_pay_invoice_and_bulk_installment_status(client_and_repos):
+    client, repos = client_and_repos
+    card = client.post("/cartoes", json={"name": "Nubank", "limit": 5000, "closing_day": 10, "due_day": 20}).get_json()
+    client.post("/gastos", json={"name": "TV", "value": 300, "month": 1, "year": 2026, "installments": {"card_id": card["id"], "total": 3}})
+    client.post("/gastos", json={"name": "Livro", "value": 50, "month": 1, "year": 2026, "installments": {"card_id": card["id"], "total": 1}})
+
+    paid = client.post("/faturas/pagar", json={"cartao_id": card["id"], "mes": 1, "ano": 2026}).get_json()
+    repeated = client.post("/faturas/pagar", json={"cartao_id": card["id"], "mes": 1, "ano": 2026}).get_json()
+    stored = [item.id for item in repos["installment"].list()]
+    bulk = client.post("/parcelas/status", json={"ids": stored + stored + [9999], "status": "pendente"}).get_json()
+    february = client.get(f"/faturas?cartao_id={card['id']}&mes=2&ano=2026").get_json()
+
+    assert paid["updated"] == 2
+    assert repeated["updated"] == 0
+    assert bulk == {"status": "pendente", "updated": 2, "not_found": 1}
+    assert {item.status for item in repos["installment"].list()} == {"pendente"}
+    assert [(item["installment_number"], item["value"], item["id"]) for item in february["parcelas"]] == [(2, 100, None)]
+    assert client.post("/parcelas/status", json={"ids": stored, "status": "cancelado"}).status_code == 400
+    assert client.post("/faturas/pagar", json={"cartao_id": 999, "mes": 1, "ano": 2026}).status_code == 404
+
+
+def test_plan_installments_are_paid_individually_and_kept_consistent_on_plan_edits(client_and_repos):
+    client, repos = client_and_repos
+    card = client.post("/cartoes", json={"name": "Nubank", "limit": 5000, "closing_day": 10, "due_day": 20}).get_json()
+    expense = client.post(
+        "/gastos", json={"name": "TV", "value": 1200, "month": 1, "year": 2026, "installments": {"card_id": card["id"], "total": 12}}
+    ).get_json()
+    (plan,) = repos["installment"].list_plans()
+
+    paid = client.put(f"/parcelamentos/{plan.id}/parcelas/3", json={"status": "pago"})
+    edited = client.put(f"/parcelamentos/{plan.id}/parcelas/3", json={"value": 90}).get_json()
+    shrunk = client.put(f"/parcelamentos/{plan.id}", json={"installments": 2})
+    resized = client.put(f"/parcelamentos/{plan.id}", json={"installments": 6, "total_value": 600})
+    installments = client.get(f"/parcelas?cartao_id={card['id']}").get_json()
+
+    assert paid.status_code == 200
+    assert paid.get_json()["id"] is not None
+    assert (edited["id"], edited["status"], edited["value"]) == (paid.get_json()["id"], "pago", 90)
+    assert shrunk.status_code == 400
+    assert resized.status_code == 200
+    assert [(item["installment_number"], item["total_installments"], item["status"]) for item in installments if item["status"] == "pago"] == [(3, 6, "pago")]
+    assert len(installments) == 6
+    assert repos["expense"].get(expense["id"]).value == 600
+    assert client.put(f"/parcelamentos/{plan.id}/parcelas/7", json={"status": "pago"}).status_code == 404
+    assert client.put(f"/parcelamentos/{plan.id}/parcelas/1", json={"status": "cancelado"}).status_code == 400
+
+    assert client.delete(f"/gastos/{expense['id']}").status_code == 409
+    assert [item.id for item in repos["installment"].list_plans()] == [plan.id]
+    assert client.delete(f"/gastos/{expense['id']}", json={"force": True}).status_code == 200
+    assert repos["installment"].list_plans() == []
+    assert repos["installment"].list() == []
+
+
+def test_weekly_recurring_expense_books_each_month_by_occurrence_count(client_and_repos):
+    client, repos = client_and_repos
+    created = client.post(
+        "/gastos",
+        json={
+            "name": "Feira",
+            "value": 50,
+            "month": 1,
+            "year": 2026,
+            "recurring": {"enabled": True, "frequency": "semanal", "start_day": 5, "end_month": 3, "end_year": 2026},
+        },
+    ).get_json()
+    recurrence = repos["recurrence"].get(created["recurrence_id"])
+    client.post("/recorrencias/aplicar", json={"id": recurrence.id})
+    february = next(item for item in repos["expense"].list() if item.month == 2)
+
+    client.put(f"/gastos/{february.id}", json={"value": 240, "scope": "future"})
+
+    assert (recurrence.frequency, recurrence.occurrences) == ("semanal", 13)
+    assert created["value"] == 200
+    assert {item.month: item.value for item in repos["expense"].list()} == {1: 200, 2: 240, 3: 300}
+    assert repos["recurrence"].get(recurrence.id).value == 60
+    assert client.post("/gastos", json={"name": "X", "value": 1, "month": 1, "year": 2026, "recurring": {"enabled": True, "frequency": "diaria"}}).status_code == 400
+
+
+def test_apply_all_recurrences_is_idempotent(client_and_repos):
+    client, repos = client_and_repos
+    for kind, name, occurrences in [("expense", "Aluguel", 3), ("income", "Salário", 2), ("expense", "Streaming", 4)]:
+        client.post(
+            "/recorrencias",
+            json={"kind": kind, "name": name, "value": 10, "start_month": 1, "start_year": 2026, "occurrences": occurrences, "virtual": name == "Streaming"},
+        )
+    rent = next(item for item in repos["recurrence"].list() if item.name == "Aluguel")
+    client.post("/recorrencias/aplicar", json={"id": rent.id})
+    client.delete(f"/recorrencias/{rent.id}/ocorrencias/2026/2")
+
+    first = client.post("/recorrencias/aplicar-todas")
+    again = client.post("/recorrencias/aplicar-todas")
+
+    assert first.get_json() == {"expenses": 0, "incomes": 2}
+    assert again.get_json() == {"expenses": 0, "incomes": 0}
+    assert sorted(item.month for item in repos["expense"].list()) == [1, 3]
+
+
+def test_apply_recurrence_without_materializer_stops_at_default_horizon(client_and_repos, monkeypatch):
+    client, repos = client_and_repos
+    monkeypatch.setattr(state, "recurrence_materializer", None)
+    today = date.today()
+    weekly = client.post(
+        "/recorrencias",
+        json={"kind": "expense", "name": "Feira", "value": 50, "start_month": today.month, "start_year": today.year, "frequency": "semanal", "occurrences": 2000},
+    ).get_json()
+
+    applied = client.post("/recorrencias/aplicar", json={"id": weekly["id"]}).get_json()
+    months = {month_index(item.month, item.year) for item in repos["expense"].list()}
+
+    assert len(applied["expenses"]) == DEFAULT_APPLY_HORIZON_MONTHS + 1
+    assert max(months) == month_index(today.month, today.year) + DEFAULT_APPLY_HORIZON_MONTHS
+    assert client.post("/recorrencias/aplicar-todas").get_json() == {"expenses": 0, "incomes": 0}
+
+
+def test_calculator_batch_returns_per_item_results_and_errors(client_and_repos):
+    client, _ = client_and_repos
+    single = client.post("/calculadora", json={"operation": "juros_simples", "principal": 1000, "rate": 1.5, "months": 12})
+    batch = client.post(
+        "/calculadora/lote",
+        json={
+            "operations": [
+                {"operation": "soma", "a": 10, "b": 5},
+                {"operation": "divisao", "a": 1, "b": 0},
+                {"operation": "raiz"},
+                {"operation": "parcelamento", "principal": 1200, "rate": 0, "months": 12},
+            ]
+        },
+    ).get_json()["results"]
+
+    assert single.get_json() == {"operation": "juros_simples", "result": {"juros": 180.0, "total": 1180.0}}
+    assert batch[0] == {"operation": "soma", "result": 15}
+    assert "dividir por zero" in batch[1]["error"]
+    assert batch[2] == {"operation": "raiz", "error": "Operação de calculadora inválida."}
+    assert batch[3]["result"]["parcela"] == 100
+    assert client.post("/calculadora", json={"operation": "raiz"}).status_code == 400
+    assert client.post("/calculadora/lote", json=[{"operation": "soma", "a": 1, "b": 1}] * 1001).status_code == 400
+
+
+def test_calculator_rejects_monte_carlo_beyond_cost_budget(client_and_repos):
+    client, _ = client_and_repos
+    projection = {"operation": "projecao_monte_carlo", "principal": 1000, "rate": 1, "months": 500, "paths": 100_000, "seed": 1}
+
+    single = client.post("/calculadora", json={**projection, "paths": 1_000_000})
+    batch = client.post("/calculadora/lote", json=[projection] * 3)
+
+    assert single.status_code == 400
+    assert "Simulações x meses" in single.get_json()["error"]
+    assert batch.status_code == 400
+    assert "limite de custo" in batch.get_json()["error"]
+
+
+def test_calculator_amortization_json_and_csv_stream(client_and_repos):
+    client, _ = client_and_repos
+    payload = {"operation": "amortizacao", "principal": 1200, "rate": 0, "months": 3, "sistema": "sac"}
+
+    result = client.post("/calculadora", json=payload).get_json()["result"]
+    csv_response = client.post("/calculadora", json={**payload, "formato": "csv"})
+
+    assert result["sistema"] == "sac"
+    assert [row["saldo"] for row in result["parcelas"]] == [800, 400, 0]
+    assert csv_response.mimetype == "text/csv"
+    assert csv_response.get_data(as_text=True).splitlines() == [
+        "mes,parcela,juros,amortizacao,saldo",
+        "1,400.0,0.0,400.0,800.0",
+        "2,400.0,0.0,400.0,400.0",
+        "3,400.0,0.0,400.0,0.0",
+    ]
+    assert client.post("/calculadora", json={**payload, "months": 421}).status_code == 400
+    assert client.post("/calculadora", json={"operation": "soma", "a": 1, "b": 2, "formato": "csv"}).status_code == 400
+
+
+def test_calculator_debt_payoff_sweep_grid(client_and_repos):
+    client, _ = client_and_repos
+    response = client.post(
+        "/calculadora",
+        json={
+            "operation": "quitacao_divida_grade",
+            "principal": 1000,
+            "payments": {"start": 100, "stop": 300, "step": 100},
+            "rates": [0, 2],
+        },
+    )
+    result = response.get_json()["result"]
+
+    assert result["pagamentos"] == [100, 200, 300]
+    assert result["meses"] == [[10, 5, 4], [12, 6, 4]]
+    assert result["total_pago"][1][2] == 1045.95
+    too_large = {"operation": "quitacao_divida_grade", "principal": 1000, "payments": list(range(1, 202)), "rates": list(range(50))}
+    assert client.post("/calculadora", json=too_large).status_code == 400
+
+
+def test_cash_flow_projection_combines_sources_and_caches_per_data_version(client_and_repos):
+    client, repos = client_and_repos
+    today = date.today()
+    first = month_index(today.month, today.year)
+    month, year = today.month, today.year
+    category = repos["category"].add(Category(name="Lazer"))
+    card = repos["card"].add(Card(name="Visa", limit=5000, closing_day=31, due_day=10))
+    for offset in (1, 2):
+        past_month, past_year = from_month_index(first - offset)
+        repos["expense"].add(Expense(name="Cinema", value=600, month=past_month, year=past_year, category_id=category.id))
+    goal_month, goal_year = from_month_index(first + 1)
+    repos["goal"].add(Goal(name="Lazer", limit_value=150, month=goal_month, year=goal_year, category_id=category.id))
+    repos["installment"].add_plan(
+        InstallmentPlan(card_id=card.id, expense_name="TV", total_value=300, installments=3, first_month=month, first_year=year)
+    )
+    client.post("/recorrencias", json={"kind": "income", "name": "Salário", "value": 5000, "start_month": month, "start_year": year, "occurrences": 24, "virtual": True})
+    rent = client.post("/recorrencias", json={"kind": "expense", "name": "Aluguel", "value": 1000, "start_month": month, "start_year": year, "occurrences": 3}).get_json()
+    client.post("/recorrencias/aplicar", json={"id": rent["id"]})
+
+    projection = client.get("/projecao?meses=4").get_json()
+    cached = client.get("/projecao?meses=4").get_json()
+    repos["expense"].add(Expense(name="Extra", value=50, month=month, year=year))
+    updated = client.get("/projecao?meses=4").get_json()
+
+    assert [item["saldo_mes"] for item in projection["projecao"]] == [3700, 3750, 3700, 4800]
+    assert projection["projecao"][1]["gastos_estimados"] == 150
+    assert projection["projecao"][0]["parcelas"] == 100
+    assert projection["saldo_final"] == 15950
+    assert cached == projection
+    assert updated["projecao"][0]["saldo_mes"] == 3650
+    assert client.get("/projecao?meses=0").status_code == 400
+
+
+def test_cash_flow_projection_counts_card_purchase_only_by_installments(client_and_repos):
+    client, _ = client_and_repos
+    today = date.today()
+    first = month_index(today.month, today.year)
+    card = client.post("/cartoes", json={"name": "Visa", "limit": 5000, "closing_day": 31, "due_day": 10}).get_json()
+    past_month, past_year = from_month_index(first - 1)
+    for month, year, value in ((past_month, past_year, 600), (today.month, today.year, 1200)):
+        response = client.post(
+            "/gastos",
+            json={"name": "Compra", "value": value, "month": month, "year": year, "installments": {"card_id": card["id"], "total": 12, "purchase_day": 1}},
+        )
+        assert response.status_code == 201
+
+    projection = client.get("/projecao?meses=3").get_json()["projecao"]
+
+    assert [item["gastos_estimados"] for item in projection] == [0, 0, 0]
+    assert [item["parcelas"] for item in projection] == [150, 150, 150]
+    assert [item["saldo_mes"] for item in projection] == [-150, -150, -150]
+
+
+def test_price_index_import_and_deflated_reports(client_and_repos):
+    client, repos = client_and_repos
+    csv_text = "periodo;valor\n2024-01;100,0\n02/2024;110,0\n2024-03;125,5\n"
+    response = client.post("/indices/importar?serie=ipca", data=csv_text.encode("utf-8"))
+    assert response.status_code == 200
+    assert response.get_json()["imported"] == 3
+    # Reimportar substitui o valor da competência em vez de duplicar.
+    client.post("/indices/importar", data=b"ano,mes,valor\n2024,3,120\n")
+    assert [(item["month"], item["value"]) for item in client.get("/indices?serie=IPCA").get_json()] == [
+        (1, 100.0),
+        (2, 110.0),
+        (3, 120.0),
+    ]
+
+    repos["expense"].add(Expense(name="Mercado", value=220.0, month=2, year=2024))
+    repos["expense"].add(Expense(name="Mercado", value=240.0, month=3, year=2024))
+    repos["income"].add(Income(name="Salário", value=1200.0, month=3, year=2024))
+
+    report = client.get("/relatorios/mes?mes=2&ano=2024&deflacionar=2024-01").get_json()
+    assert report["total_expenses"] == 200.0
+    assert report["by_category"] == {"Sem categoria": 200.0}
+    assert report["deflacao"] == {"serie": "IPCA", "base": "2024-01", "fator": round(100 / 110, 6)}
+
+    period = client.get("/relatorios/periodo?inicio=2024-01&fim=2024-03&deflacionar=2024-01").get_json()
+    assert [month["total_expenses"] for month in period["meses"]] == [0.0, 200.0, 200.0]
+    assert period["total_incomes"] == 1000.0
+    assert period["balance"] == 600.0
+    nominal = client.get("/relatorios/periodo?inicio=2024-01&fim=2024-03").get_json()
+    assert nominal["total_expenses"] == 460.0
+    assert "deflacao" not in nominal
+
+    missing = client.get("/relatorios/periodo?inicio=2023-12&fim=2024-01&deflacionar=2024-01")
+    assert missing.status_code == 400
+    assert "2023-12" in missing.get_json()["error"]
+    assert client.post("/indices/importar", data=b"mes;valor\n1;2\n").status_code == 400
+    for value in ("0", "-1,5", "nan", "inf"):
+        invalid = client.post("/indices/importar", data=f"periodo,valor\n2024-03,120\n2024-04,{value}\n".encode())
+        assert invalid.status_code == 400
+        assert "Linha 3" in invalid.get_json()["error"]
+    assert len(client.get("/indices?serie=IPCA").get_json()) == 3
+
+
+def test_production_server_serves_concurrently_and_reports_queue(client_and_repos, monkeypatch):
+    pytest.importorskip("waitress")
+    repos = client_and_repos[1]
+    monkeypatch.setattr(state, "server_status", None)
+    monkeypatch.setenv("SAVEYOURMONEY_THREADS", "4")
+    assert configured_threads() == 4
+    server = create_production_server(app_module.app, port=0)
+    runner = threading.Thread(target=server.run, daemon=True)
+    runner.start()
+    base_url = f"http://127.0.0.1:{server.effective_port}"
+    try:
+        repos["expense"].add(Expense(name="Luz", value=120.0, month=2, year=2026))
+        results = []
+
+        def fetch() -> None:
+            with urlopen(f"{base_url}/gastos?mes=2&ano=2026", timeout=10) as response:
+                results.append(json.loads(response.read()))
+
+        workers = [threading.Thread(target=fetch) for _ in range(12)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        assert [len(result) for result in results] == [1] * 12
+
+        with urlopen(f"{base_url}/health", timeout=10) as response:
+            health = json.loads(response.read())
+        assert health["server"]["mode"] == "waitress"
+        assert health["server"]["threads"] == 4
+        assert health["server"]["queue_depth"] == 0
+    finally:
+        # Fecha o servidor na thread do loop, que termina quando não sobra socket.
+        server.trigger.pull_trigger(server.close)
+        runner.join(timeout=5)
+        server.task_dispatcher.shutdown()
+
+
+def test_list_responses_match_with_and_without_orjson(client_and_repos, monkeypatch):
+    client, repos = client_and_repos
+    category = repos["category"].add(Category(name="Alimentação", description="Padaria e mercado"))
+    repos["expense"].add(Expense(name="Padaria São João", value=12.3, month=3, year=2026, category_id=category.id))
+    repos["expense"].add(Expense(name="Mercado", value=0.1, month=3, year=2026, notes="ção"))
+
+    bodies = {}
+    for use_orjson in (True, False):
+        monkeypatch.setattr(app_module.app.json, "use_orjson", use_orjson)
+        response = client.get("/gastos?mes=3&ano=2026")
+        assert response.status_code == 200
+        bodies[use_orjson] = response.get_data()
+
+    assert json.loads(bodies[True]) == json.loads(bodies[False])
+    assert "Padaria São João".encode("utf-8") in bodies[False]
+    assert json.loads(bodies[False])[0]["value"] == 12.3
+
+
+def test_entity_json_provider_matches_default_provider_for_lists():
+    from dataclasses import asdict
+
+    from flask.json.provider import DefaultJSONProvider
+
+    from backend.json_provider import EntityJSONProvider
+
+    expenses = [
+        Expense(name=f"Gasto {index}", value=index / 100, month=index % 12 + 1, year=2026, category_id=index % 7 or None, notes="ção", id=index)
+        for index in range(500)
+    ]
+    expected = DefaultJSONProvider(app_module.app).dumps([asdict(expense) for expense in expenses])
+    provider = EntityJSONProvider(app_module.app)
+
+    for use_orjson in (False, True):
+        provider.use_orjson = use_orjson
+        assert json.loads(provider.encode(expenses)) == json.loads(expected)
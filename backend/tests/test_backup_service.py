@@ -1,17 +1,45 @@
-﻿import os
+﻿import hashlib
+import io
+import json
+import os
+import sqlite3
 import tempfile
+import zipfile
 
 import pytest
 
-from backend.domain.entities import Card, Category, Expense, Goal, Income, Installment, Recurrence
+import backend.services.backup_service as backup_service
+from backend.domain.entities import (
+    Card,
+    Category,
+    Expense,
+    Goal,
+    Income,
+    Installment,
+    InstallmentPlan,
+    PriceIndex,
+    Recurrence,
+)
 from backend.repositories.sqlite.cartao_repo import SQLiteCardRepository
 from backend.repositories.sqlite.categoria_repo import SQLiteCategoryRepository
 from backend.repositories.sqlite.entrada_repo import SQLiteIncomeRepository
 from backend.repositories.sqlite.gasto_repo import SQLiteExpenseRepository
+from backend.repositories.sqlite.indice_repo import SQLitePriceIndexRepository
 from backend.repositories.sqlite.meta_repo import SQLiteGoalRepository
 from backend.repositories.sqlite.parcela_repo import SQLiteInstallmentRepository
 from backend.repositories.sqlite.recorrencia_repo import SQLiteRecurrenceRepository
-from backend.services.backup_service import BackupValidationError, export_backup_payload, restore_backup_payload
+from backend.services.backup_scheduler import BackupScheduler
+from backend.services.backup_service import (
+    BackupValidationError,
+    create_database_snapshot,
+    create_incremental_backup,
+    export_backup_payload,
+    export_incremental_payload,
+    read_change_seq,
+    restore_backup_payload,
+    restore_database_snapshot,
+)
+from backend.services.ndjson_backup import export_ndjson_archive, restore_ndjson_archive
 
 
 def _init_repositories(db_path: str):
@@ -23,6 +51,7 @@ def _init_repositories(db_path: str):
         "installment": SQLiteInstallmentRepository(db_path),
         "recurrence": SQLiteRecurrenceRepository(db_path),
         "goal": SQLiteGoalRepository(db_path),
+        "price_index": SQLitePriceIndexRepository(db_path),
     }
 
 
@@ -258,3 +287,500 @@ def test_restore_backup_payload_keeps_current_data_on_failure():
             assert expenses[0].name == "Conta existente"
         finally:
             _close_repositories(repos)
+
+
+def test_incremental_backup_contains_only_rows_changed_since_last_backup():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "test.db")
+        backup_dir = os.path.join(tmp, "backups")
+        repos = _init_repositories(db_path)
+        try:
+            kept = repos["expense"].add(Expense(name="Aluguel", value=1500, month=2, year=2026))
+            removed = repos["expense"].add(Expense(name="Padaria", value=12, month=2, year=2026))
+            snapshot = create_database_snapshot(db_path, backup_dir)
+
+            kept.value = 1550
+            repos["expense"].update(kept)
+            repos["expense"].delete(removed.id)
+            added = repos["income"].add(Income(name="Bônus", value=300, month=2, year=2026))
+
+            result = create_incremental_backup(db_path, backup_dir)
+            payload = export_incremental_payload(db_path, snapshot["change_seq"])
+
+            assert result["base_seq"] == snapshot["change_seq"]
+            assert result["changes"] == 3
+            assert set(payload["changes"]) == {"expenses", "incomes"}
+            assert payload["changes"]["expenses"]["upserts"] == [
+                {
+                    "id": kept.id,
+                    "name": "Aluguel",
+                    "value": 1550,
+                    "month": 2,
+                    "year": 2026,
+                    "category_id": None,
+                    "recurrence_id": None,
+                    "payment_method": "debit",
+                    "notes": None,
+                }
+            ]
+            assert payload["changes"]["expenses"]["deletes"] == [removed.id]
+            assert payload["changes"]["incomes"]["upserts"][0]["id"] == added.id
+        finally:
+            _close_repositories(repos)
+
+
+def test_restore_backup_payload_replays_incrementals_after_snapshot():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "test.db")
+        repos = _init_repositories(db_path)
+        try:
+            category = repos["category"].add(Category(name="Casa"))
+            expense = repos["expense"].add(Expense(name="Luz", value=100, month=2, year=2026, category_id=category.id))
+            full = export_backup_payload(
+                cards=[],
+                categories=repos["category"].list(),
+                expenses=repos["expense"].list(),
+                goals=[],
+                incomes=[],
+                installments=[],
+                recurrences=[],
+                change_seq=read_change_seq(db_path),
+            )
+            repos["expense"].add(Expense(name="Água", value=80, month=2, year=2026, category_id=category.id))
+            repos["expense"].delete(expense.id)
+            incremental = export_incremental_payload(db_path, full["changeSeq"])
+
+            repos["expense"].add(Expense(name="Perdido", value=1, month=3, year=2026))
+            counts = restore_backup_payload(db_path, full, [incremental])
+
+            assert counts["incrementals"] == 1
+            assert [item.name for item in repos["expense"].list()] == ["Água"]
+
+            stale = dict(incremental, baseSeq=incremental["baseSeq"] + 1)
+            with pytest.raises(BackupValidationError):
+                restore_backup_payload(db_path, full, [stale])
+        finally:
+            _close_repositories(repos)
+
+
+def test_backup_scheduler_skips_run_when_nothing_changed():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "test.db")
+        backup_dir = os.path.join(tmp, "backups")
+        repos = _init_repositories(db_path)
+        try:
+            repos["expense"].add(Expense(name="Internet", value=99.9, month=2, year=2026))
+            scheduler = BackupScheduler(db_path, backup_dir, interval_seconds=3600, keep=1)
+
+            first = scheduler.run_once()
+            second = scheduler.run_once()
+            repos["expense"].add(Expense(name="Gás", value=110, month=2, year=2026))
+            third = scheduler.run_once()
+
+            assert first["last_status"] == "ok"
+            assert second["last_status"] == "skipped"
+            assert third["last_status"] == "ok"
+            assert os.listdir(backup_dir) == [third["last_backup"]]
+        finally:
+            _close_repositories(repos)
+
+
+def test_restore_database_snapshot_copies_tables_and_replays_incrementals():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "test.db")
+        backup_dir = os.path.join(tmp, "backups")
+        repos = _init_repositories(db_path)
+        try:
+            card = repos["card"].add(Card(name="Cartão A", limit=1000, closing_day=5, due_day=15))
+            repos["expense"].add(Expense(name="Luz", value=120, month=2, year=2026))
+            snapshot = create_database_snapshot(db_path, backup_dir)
+            repos["income"].add(Income(name="Salário", value=3000, month=2, year=2026))
+            incremental = export_incremental_payload(db_path, snapshot["change_seq"])
+
+            repos["card"].delete(card.id)
+            repos["expense"].add(Expense(name="Depois do snapshot", value=5, month=3, year=2026))
+
+            counts = restore_database_snapshot(db_path, snapshot["path"], [incremental])
+            created = repos["expense"].add(Expense(name="Novo", value=1, month=3, year=2026))
+
+            assert counts["cards"] == 1
+            assert counts["expenses"] == 1
+            assert counts["incrementals"] == 1
+            assert [item.name for item in repos["card"].list()] == ["Cartão A"]
+            assert [item.name for item in repos["income"].list()] == ["Salário"]
+            assert created.id == 2
+        finally:
+            _close_repositories(repos)
+
+
+def test_restore_database_snapshot_converts_legacy_real_values_to_cents():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "test.db")
+        snapshot_path = os.path.join(tmp, "legacy.db")
+        legacy = sqlite3.connect(snapshot_path)
+        legacy.execute(
+            "CREATE TABLE expenses (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, value REAL NOT NULL, "
+            "month INTEGER NOT NULL, year INTEGER NOT NULL, category_id INTEGER, recurrence_id INTEGER, "
+            "payment_method TEXT, notes TEXT)"
+        )
+        legacy.execute("INSERT INTO expenses (name, value, month, year) VALUES ('Luz', 10.55, 2, 2026)")
+        legacy.execute("PRAGMA user_version = 1")
+        legacy.commit()
+        legacy.close()
+        repos = _init_repositories(db_path)
+        try:
+            base_seq = read_change_seq(db_path)
+            restore_database_snapshot(db_path, snapshot_path)
+            assert [item.value for item in repos["expense"].list()] == [10.55]
+            # O incremental continua em reais, mesmo com o banco em centavos.
+            incremental = export_incremental_payload(db_path, base_seq)
+            assert incremental["changes"]["expenses"]["upserts"][0]["value"] == 10.55
+            snapshot = create_database_snapshot(db_path, os.path.join(tmp, "backups"))
+            check = sqlite3.connect(snapshot["path"])
+            assert check.execute("PRAGMA user_version").fetchone()[0] == backup_service.SCHEMA_VERSION
+            assert check.execute("SELECT value FROM expenses").fetchone() == (1055,)
+            check.close()
+        finally:
+            _close_repositories(repos)
+
+
+def _expense_record(index: int, **overrides) -> dict:
+    record = {"id": index + 1, "name": f"Gasto {index}", "value": 10, "month": 2, "year": 2026}
+    record.update(overrides)
+    return record
+
+
+def test_restore_backup_payload_reports_every_invalid_item_with_index():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "test.db")
+        repos = _init_repositories(db_path)
+        try:
+            payload = {
+                "version": "1.0",
+                "cards": [{"id": 1, "name": "Cartão", "limit": "abc", "closing_day": 1, "due_day": 5}],
+                "expenses": [
+                    _expense_record(0),
+                    _expense_record(1, month=13),
+                    "não é objeto",
+                    _expense_record(3, value=None),
+                ],
+                "categories": [],
+            }
+
+            with pytest.raises(BackupValidationError) as exc_info:
+                restore_backup_payload(db_path, payload)
+
+            assert [(item["collection"], item["index"]) for item in exc_info.value.errors] == [
+                ("cards", 0),
+                ("expenses", 1),
+                ("expenses", 2),
+                ("expenses", 3),
+            ]
+        finally:
+            _close_repositories(repos)
+
+
+def test_restore_backup_payload_validates_large_payload_in_chunks(monkeypatch):
+    monkeypatch.setattr(backup_service, "VALIDATION_CHUNK_SIZE", 50)
+    monkeypatch.setattr(backup_service, "PARALLEL_VALIDATION_THRESHOLD", 100)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "test.db")
+        repos = _init_repositories(db_path)
+        try:
+            expenses = [_expense_record(index) for index in range(240)]
+            payload = {"version": "1.0", "cards": [], "expenses": expenses, "categories": []}
+
+            counts = restore_backup_payload(db_path, payload)
+            assert counts["expenses"] == 240
+            assert [item.id for item in repos["expense"].list()][-1] == 240
+
+            expenses[175]["year"] = "x"
+            with pytest.raises(BackupValidationError) as exc_info:
+                restore_backup_payload(db_path, payload)
+            assert [item["index"] for item in exc_info.value.errors] == [175]
+        finally:
+            _close_repositories(repos)
+
+
+def _rewrite_archive_table(archive_bytes: bytes, table: str, lines: list[str]) -> bytes:
+    source = zipfile.ZipFile(io.BytesIO(archive_bytes))
+    manifest = json.loads(source.read("manifest.json"))
+    data = "".join(f"{line}\n" for line in lines).encode("utf-8")
+    manifest["tables"][table].update(count=len(lines), sha256=hashlib.sha256(data).hexdigest())
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as target:
+        for name in source.namelist():
+            if name == "manifest.json":
+                target.writestr(name, json.dumps(manifest))
+            elif name == f"{table}.ndjson":
+                target.writestr(name, data)
+            else:
+                target.writestr(name, source.read(name))
+    return buffer.getvalue()
+
+
+def test_ndjson_archive_roundtrip_restores_every_table():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "test.db")
+        repos = _init_repositories(db_path)
+        try:
+            category = repos["category"].add(Category(name="Casa"))
+            card = repos["card"].add(Card(name="Cartão A", limit=1000, closing_day=5, due_day=15))
+            repos["expense"].add(Expense(name="Luz", value=120, month=2, year=2026, category_id=category.id))
+            repos["installment"].add(
+                Installment(
+                    card_id=card.id,
+                    expense_name="TV",
+                    installment_number=1,
+                    total_installments=3,
+                    value=100,
+                    month=2,
+                    year=2026,
+                )
+            )
+            archive = export_ndjson_archive(db_path)
+            manifest = json.loads(zipfile.ZipFile(io.BytesIO(archive)).read("manifest.json"))
+
+            repos["expense"].add(Expense(name="Depois", value=1, month=3, year=2026))
+            results = restore_ndjson_archive(db_path, archive)
+
+            assert manifest["version"] == backup_service.BACKUP_VERSION
+            assert manifest["tables"]["expenses"]["count"] == 1
+            assert {table: item["status"] for table, item in results.items()} == {
+                table: "imported" for table in backup_service.BACKUP_TABLES
+            }
+            assert [item.name for item in repos["expense"].list()] == ["Luz"]
+            assert repos["installment"].list()[0].card_id == card.id
+        finally:
+            _close_repositories(repos)
+
+
+def test_ndjson_restore_isolates_invalid_table_and_resumes():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "test.db")
+        repos = _init_repositories(db_path)
+        try:
+            repos["category"].add(Category(name="Casa"))
+            repos["expense"].add(Expense(name="Luz", value=120, month=2, year=2026))
+            archive = _rewrite_archive_table(
+                export_ndjson_archive(db_path),
+                "expenses",
+                [json.dumps(_expense_record(0)), json.dumps(_expense_record(1, month=13)), "{quebrado"],
+            )
+            repos["category"].add(Category(name="Mercado"))
+
+            first = restore_ndjson_archive(db_path, archive)
+            second = restore_ndjson_archive(db_path, archive)
+
+            assert first["categories"]["status"] == "imported"
+            assert first["expenses"]["status"] == "error"
+            assert [error["index"] for error in first["expenses"]["errors"]] == [1, 2]
+            assert second["categories"]["status"] == "skipped"
+            assert second["expenses"]["status"] == "error"
+            assert [item.name for item in repos["category"].list()] == ["Casa"]
+            assert [item.name for item in repos["expense"].list()] == ["Luz"]
+        finally:
+            _close_repositories(repos)
+
+
+def test_backup_roundtrip_keeps_installment_plans_and_overrides():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "test.db")
+        repos = _init_repositories(db_path)
+        try:
+            card = repos["card"].add(Card(name="Cartão A", limit=1000, closing_day=5, due_day=15))
+            expense = repos["expense"].add(Expense(name="TV", value=1000, month=1, year=2026))
+            plan = repos["installment"].add_plan(
+                InstallmentPlan(
+                    card_id=card.id,
+                    expense_name="TV",
+                    total_value=1000,
+                    installments=3,
+                    first_month=1,
+                    first_year=2026,
+                    expense_id=expense.id,
+                )
+            )
+            repos["installment"].add(
+                Installment(
+                    card_id=card.id,
+                    expense_name="TV",
+                    installment_number=1,
+                    total_installments=3,
+                    value=333.33,
+                    month=1,
+                    year=2026,
+                    status="pago",
+                    plan_id=plan.id,
+                )
+            )
+            payload = export_backup_payload(
+                cards=repos["card"].list(),
+                categories=[],
+                expenses=repos["expense"].list(),
+                goals=[],
+                incomes=[],
+                installments=repos["installment"].list(),
+                recurrences=[],
+                installment_plans=repos["installment"].list_plans(),
+            )
+            repos["installment"].delete_plan(plan.id)
+
+            counts = restore_backup_payload(db_path, json.loads(json.dumps(payload)))
+            broken = dict(payload, installments=[dict(payload["installments"][0], plan_id=99)])
+
+            assert counts["installment_plans"] == 1
+            assert repos["installment"].list_plans() == [plan]
+            assert repos["installment"].plan_overrides() == {(plan.id, 1)}
+            assert [(item.month, item.total) for item in repos["installment"].invoices(card.id)] == [(1, 333.33)]
+            with pytest.raises(BackupValidationError):
+                restore_backup_payload(db_path, broken)
+        finally:
+            _close_repositories(repos)
+
+
+def test_ndjson_archive_reads_every_table_from_one_snapshot(monkeypatch):
+    import backend.services.ndjson_backup as ndjson_backup
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "test.db")
+        repos = _init_repositories(db_path)
+        try:
+            card = repos["card"].add(Card(name="Cartão A", limit=1000, closing_day=5, due_day=15))
+            seen = []
+            original = ndjson_backup.current_change_seq
+
+            def write_during_export(conn):
+                seen.append(original(conn))
+                # Outra conexão tenta gravar um cartão no meio da exportação.
+                writer = sqlite3.connect(db_path, timeout=0.2)
+                try:
+                    writer.execute("INSERT INTO cards (name, limit_value, closing_day, due_day) VALUES ('B', 0, 1, 1)")
+                    writer.commit()
+                except sqlite3.OperationalError:
+                    pass  # Bloqueado pela transação de leitura da exportação.
+                finally:
+                    writer.close()
+                return seen[0]
+
+            monkeypatch.setattr(ndjson_backup, "current_change_seq", write_during_export)
+            archive = zipfile.ZipFile(io.BytesIO(export_ndjson_archive(db_path)))
+            manifest = json.loads(archive.read("manifest.json"))
+            exported = [json.loads(line) for line in archive.read("cards.ndjson").decode("utf-8").splitlines()]
+
+            assert [item["id"] for item in exported] == [card.id]
+            assert manifest["changeSeq"] == seen[0]
+        finally:
+            _close_repositories(repos)
+
+
+def test_backup_roundtrips_keep_price_indices():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "test.db")
+        repos = _init_repositories(db_path)
+        try:
+            repos["price_index"].upsert_many(
+                [PriceIndex(series="IPCA", month=1, year=2026, value=7000.5), PriceIndex(series="IPCA", month=2, year=2026, value=7030.25)]
+            )
+            expected = [(item.series, item.month, item.year, item.value) for item in repos["price_index"].list()]
+            payload = export_backup_payload(
+                cards=[],
+                categories=[],
+                expenses=[],
+                goals=[],
+                incomes=[],
+                installments=[],
+                recurrences=[],
+                price_indices=repos["price_index"].list(),
+            )
+            archive = export_ndjson_archive(db_path)
+            snapshot = create_database_snapshot(db_path, os.path.join(tmp, "backups"))
+
+            def restored():
+                return [(item.series, item.month, item.year, item.value) for item in repos["price_index"].list()]
+
+            repos["price_index"].delete(repos["price_index"].list()[0].id)
+            assert restore_backup_payload(db_path, payload)["price_indices"] == 2
+            assert restored() == expected
+
+            repos["price_index"].delete(repos["price_index"].list()[0].id)
+            assert restore_ndjson_archive(db_path, archive)["price_indices"] == {"status": "imported", "count": 2}
+            assert restored() == expected
+
+            repos["price_index"].delete(repos["price_index"].list()[0].id)
+            assert restore_database_snapshot(db_path, snapshot["path"])["price_indices"] == 2
+            assert restored() == expected
+        finally:
+            _close_repositories(repos)
+
+
+def test_restore_database_snapshot_rolls_back_on_invalid_rows_and_keeps_first_duplicate_occurrence():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "test.db")
+        snapshot_path = os.path.join(tmp, "legacy.db")
+        legacy = sqlite3.connect(snapshot_path)
+        legacy.execute(
+            "CREATE TABLE expenses (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, value INTEGER NOT NULL, "
+            "month INTEGER NOT NULL, year INTEGER NOT NULL, category_id INTEGER, recurrence_id INTEGER, "
+            "payment_method TEXT, notes TEXT)"
+        )
+        legacy.execute(
+            "CREATE TABLE price_indices (id INTEGER PRIMARY KEY AUTOINCREMENT, series TEXT NOT NULL, "
+            "month INTEGER NOT NULL, year INTEGER NOT NULL, value REAL NOT NULL)"
+        )
+        legacy.executemany(
+            "INSERT INTO expenses (name, value, month, year, recurrence_id) VALUES (?, ?, 2, 2026, ?)",
+            [("Aluguel", 100000, 1), ("Aluguel repetido", 100000, 1), ("Luz", 12000, None)],
+        )
+        legacy.execute("INSERT INTO price_indices (series, month, year, value) VALUES ('IPCA', 1, 2026, 0)")
+        legacy.commit()
+        repos = _init_repositories(db_path)
+        try:
+            repos["expense"].add(Expense(name="Atual", value=5, month=2, year=2026))
+
+            with pytest.raises(BackupValidationError, match="price_indices"):
+                restore_database_snapshot(db_path, snapshot_path)
+            assert [item.name for item in repos["expense"].list()] == ["Atual"]
+
+            legacy.execute("DELETE FROM price_indices")
+            legacy.commit()
+            counts = restore_database_snapshot(db_path, snapshot_path)
+            assert counts["expenses"] == 2
+            assert [item.name for item in repos["expense"].list()] == ["Aluguel", "Luz"]
+        finally:
+            legacy.close()
+            _close_repositories(repos)
+
+
+def test_ndjson_restore_keeps_tables_that_would_reference_a_failed_parent():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "test.db")
+        repos = _init_repositories(db_path)
+        try:
+            category = repos["category"].add(Category(name="Casa"))
+            repos["expense"].add(Expense(name="Luz", value=120, month=2, year=2026, category_id=category.id))
+            archive = export_ndjson_archive(db_path)
+            repos["category"].delete(category.id)
+            repos["expense"].add(Expense(name="Depois", value=1, month=3, year=2026))
+            conn = sqlite3.connect(db_path)
+            conn.execute("CREATE TRIGGER block_categories BEFORE INSERT ON categories BEGIN SELECT RAISE(ABORT, 'bloqueado'); END")
+            conn.commit()
+
+            first = restore_ndjson_archive(db_path, archive)
+
+            assert first["categories"]["status"] == "error"
+            assert first["expenses"]["status"] == "error"
+            assert "categories" in first["expenses"]["errors"][0]["error"]
+            assert first["incomes"]["status"] == "imported"
+            assert [item.name for item in repos["expense"].list()] == ["Luz", "Depois"]
+
+            conn.execute("DROP TRIGGER block_categories")
+            conn.commit()
+            conn.close()
+            second = restore_ndjson_archive(db_path, archive)
+
+            assert {second["categories"]["status"], second["expenses"]["status"]} == {"imported"}
+            assert second["incomes"]["status"] == "skipped"
+            assert [(item.name, item.category_id) for item in repos["expense"].list()] == [("Luz", category.id)]
+        finally:
+            _close_repositories(repos)
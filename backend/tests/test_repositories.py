@@ -1,12 +1,19 @@
 import os
+import sqlite3
 import tempfile
+import threading
 
-from backend.domain.entities import Category, Expense, Income, Card, Goal
+import pytest
+
+from backend.domain.entities import Category, Expense, Income, Card, Goal, Installment
+from backend.domain.period import month_index
 from backend.repositories.sqlite.categoria_repo import SQLiteCategoryRepository
 from backend.repositories.sqlite.cartao_repo import SQLiteCardRepository
 from backend.repositories.sqlite.entrada_repo import SQLiteIncomeRepository
 from backend.repositories.sqlite.gasto_repo import SQLiteExpenseRepository
+from backend.repositories.sqlite.indice_repo import SQLitePriceIndexRepository
 from backend.repositories.sqlite.meta_repo import SQLiteGoalRepository
+from backend.repositories.sqlite.parcela_repo import SQLiteInstallmentRepository
 
 
 def test_category_repository_crud():
@@ -77,3 +84,160 @@ def test_goal_repository_crud():
             assert fetched.limit_value == 1000.0
         finally:
             repo.close()
+
+
+def test_expense_repository_removes_duplicate_recurrence_occurrences():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "test.db")
+        conn = sqlite3.connect(db_path)
+        conn.execute(
+            "CREATE TABLE expenses (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, value REAL NOT NULL, "
+            "month INTEGER NOT NULL, year INTEGER NOT NULL, category_id INTEGER, recurrence_id INTEGER, "
+            "payment_method TEXT, notes TEXT)"
+        )
+        conn.executemany(
+            "INSERT INTO expenses (name, value, month, year, recurrence_id) VALUES (?, ?, ?, ?, ?)",
+            [("Luz", 100, 1, 2026, 1), ("Luz", 100, 1, 2026, 1), ("Avulso", 5, 1, 2026, None), ("Avulso", 5, 1, 2026, None)],
+        )
+        conn.commit()
+        conn.close()
+        repo = SQLiteExpenseRepository(db_path)
+        try:
+            assert [item.id for item in repo.list()] == [1, 3, 4]
+            created = repo.add_many([Expense(name="Luz", value=100, month=m, year=2026, recurrence_id=1) for m in (1, 2)])
+            assert [item.month for item in created] == [2]
+            assert len(repo.list()) == 4
+            backup = repo.conn.execute("SELECT id, name FROM expenses_duplicadas").fetchall()
+            assert backup == [(2, "Luz")]
+        finally:
+            repo.close()
+        reopened = SQLiteExpenseRepository(db_path)
+        try:
+            assert len(reopened.list()) == 4
+            assert reopened.conn.execute("SELECT COUNT(*) FROM expenses_duplicadas").fetchone() == (1,)
+        finally:
+            reopened.close()
+
+
+def test_add_many_only_ignores_duplicate_occurrences():
+    with tempfile.TemporaryDirectory() as tmp:
+        repo = SQLiteExpenseRepository(os.path.join(tmp, "test.db"))
+        try:
+            repo.add(Expense(name="Luz", value=100, month=1, year=2026, recurrence_id=1))
+            invalid = Expense(name="Água", value=80, month=3, year=2026, recurrence_id=1)
+            invalid.name = None
+            with pytest.raises(sqlite3.IntegrityError):
+                repo.add_many([Expense(name="Luz", value=100, month=2, year=2026, recurrence_id=1), invalid])
+            assert [item.month for item in repo.list()] == [1]
+
+            created = repo.add_many([Expense(name="Luz", value=100, month=m, year=2026, recurrence_id=1) for m in (1, 2, 3)])
+            assert [(item.month, item.value) for item in created] == [(2, 100), (3, 100)]
+        finally:
+            repo.close()
+
+
+def test_repositories_migrate_legacy_real_values_to_integer_cents():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "test.db")
+        conn = sqlite3.connect(db_path)
+        conn.execute(
+            "CREATE TABLE expenses (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, value REAL NOT NULL, "
+            "month INTEGER NOT NULL, year INTEGER NOT NULL, category_id INTEGER, recurrence_id INTEGER, "
+            "payment_method TEXT, notes TEXT)"
+        )
+        conn.execute(
+            "CREATE TABLE installments (id INTEGER PRIMARY KEY AUTOINCREMENT, card_id INTEGER NOT NULL, "
+            "expense_name TEXT NOT NULL, installment_number INTEGER NOT NULL, total_installments INTEGER NOT NULL, "
+            "value REAL NOT NULL, month INTEGER NOT NULL, year INTEGER NOT NULL, status TEXT NOT NULL)"
+        )
+        conn.execute(
+            "CREATE TABLE card_invoices (card_id INTEGER NOT NULL, year INTEGER NOT NULL, month INTEGER NOT NULL, "
+            "total REAL NOT NULL DEFAULT 0, installments INTEGER NOT NULL DEFAULT 0, PRIMARY KEY (card_id, year, month))"
+        )
+        conn.executemany(
+            "INSERT INTO expenses (name, value, month, year) VALUES (?, ?, ?, ?)",
+            [("Café", 0.1, 1, 2026)] * 10 + [("Mercado", 0.29, 1, 2026)],
+        )
+        conn.executemany(
+            "INSERT INTO installments (card_id, expense_name, installment_number, total_installments, value, month, year, status) "
+            "VALUES (1, 'TV', ?, 3, ?, 1, 2026, 'pendente')",
+            [(1, 33.33), (2, 33.33), (3, 33.34)],
+        )
+        conn.execute("INSERT INTO card_invoices VALUES (1, 2026, 1, 99.99999, 3)")
+        conn.commit()
+        conn.close()
+
+        expenses = SQLiteExpenseRepository(db_path)
+        installments = SQLiteInstallmentRepository(db_path)
+        try:
+            check = sqlite3.connect(db_path)
+            assert check.execute("SELECT DISTINCT typeof(value) FROM expenses").fetchall() == [("integer",)]
+            assert check.execute("SELECT value FROM expenses WHERE name='Mercado'").fetchone() == (29,)
+            check.close()
+            assert expenses.period_totals(month_index(1, 2026), month_index(1, 2026)) == [(1, 2026, None, False, 1.29)]
+            assert [item.value for item in installments.list()] == [33.33, 33.33, 33.34]
+            assert [(item.total, item.installments) for item in installments.invoices(1)] == [(100.0, 3)]
+            installments.add(
+                Installment(card_id=1, expense_name="Fone", installment_number=1, total_installments=1, value=0.1, month=1, year=2026)
+            )
+            assert installments.invoices(1)[0].total == 100.1
+        finally:
+            expenses.close()
+            installments.close()
+
+
+def test_repository_uses_one_connection_per_thread():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "test.db")
+        repo = SQLiteExpenseRepository(db_path)
+        errors = []
+        start = threading.Barrier(8)
+
+        def worker(month: int) -> None:
+            try:
+                start.wait()
+                for _ in range(20):
+                    repo.add_many([Expense(name="Lote", value=1.5, month=month, year=2026) for _ in range(5)])
+                    assert all(item.month == month for item in repo.list_filtered(month=month))
+            except Exception as exc:  # pragma: no cover - relatado abaixo
+                errors.append(exc)
+
+        threads = [threading.Thread(target=worker, args=(month,)) for month in range(1, 9)]
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            assert errors == []
+            assert len(repo.list()) == 8 * 20 * 5
+            assert repo.period_totals(month_index(1, 2026), month_index(8, 2026))[0][-1] == 150.0
+            # Conexões de threads encerradas são fechadas na próxima abertura.
+            late = threading.Thread(target=lambda: repo.conn)
+            late.start()
+            late.join()
+            assert repo.connections.open_count() == 2
+        finally:
+            repo.close()
+
+
+def test_price_index_table_rejects_non_positive_values_and_migrates_legacy_rows():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "test.db")
+        legacy = sqlite3.connect(db_path)
+        legacy.execute(
+            "CREATE TABLE price_indices (id INTEGER PRIMARY KEY AUTOINCREMENT, series TEXT NOT NULL, "
+            "month INTEGER NOT NULL, year INTEGER NOT NULL, value REAL NOT NULL, UNIQUE (series, year, month))"
+        )
+        legacy.executemany(
+            "INSERT INTO price_indices (series, month, year, value) VALUES ('IPCA', ?, 2024, ?)", [(1, 100.0), (2, 0.0)]
+        )
+        legacy.commit()
+        legacy.close()
+
+        repo = SQLitePriceIndexRepository(db_path)
+        try:
+            assert [(item.month, item.value) for item in repo.list()] == [(1, 100.0)]
+            with pytest.raises(sqlite3.IntegrityError):
+                repo.conn.execute("INSERT INTO price_indices (series, month, year, value) VALUES ('IPCA', 3, 2024, -1)")
+        finally:
+            repo.close()
@@ -1,13 +1,39 @@
+from datetime import date
 import os
+import sqlite3
 import tempfile
 
-from backend.domain.entities import Expense, Income, Recurrence
+import numpy as np
+import pytest
+
+from backend.domain.entities import Card, Expense, Income, Installment, Recurrence
+from backend.domain.period import add_months, count_until, month_index, months_between
+from backend.domain.recurrence_rules import RecurrenceRule, check_start_day, interval_for, occurrences_until
+from backend.domain.value_objects import Money, to_cents
+from backend.repositories.sqlite.cartao_repo import SQLiteCardRepository
 from backend.repositories.sqlite.entrada_repo import SQLiteIncomeRepository
 from backend.repositories.sqlite.gasto_repo import SQLiteExpenseRepository
+from backend.repositories.sqlite.parcela_repo import SQLiteInstallmentRepository
 from backend.repositories.sqlite.recorrencia_repo import SQLiteRecurrenceRepository
+from backend.services.amortization import amortization_schedule
+from backend.services.debt_payoff import debt_payoff_grid
+from backend.services.finance_service import (
+    calculate_invoice,
+    generate_competences,
+    generate_installments,
+    simulate_debt_payoff,
+    simulate_installment,
+)
+from backend.services import calculator_registry, monte_carlo, process_pool
+from backend.services.lru_cache import LRUCache, freeze
+from backend.services.monte_carlo import project_balance
+from backend.services.recurrence_expansion import add_occurrence_totals, occurrence_counts, occurrence_value
+from backend.services.recurrence_materializer import RecurrenceMaterializer
 from backend.use_cases.apply_recurrence import apply_recurrence
+from backend.use_cases.card_usage import card_usage
 from backend.use_cases.list_expenses import list_expenses
 from backend.use_cases.list_incomes import list_incomes
+from backend.use_cases.materialize_recurrences import materialize_recurrences
 
 
 def test_list_expenses_filters_by_month_and_year():
@@ -62,3 +88,326 @@ def test_apply_recurrence_creates_expenses():
             recurrence_repo.close()
             income_repo.close()
             expense_repo.close()
+
+
+def test_list_expenses_expands_virtual_recurrence_with_overrides_and_skips():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "test.db")
+        expense_repo = SQLiteExpenseRepository(db_path)
+        recurrence_repo = SQLiteRecurrenceRepository(db_path)
+        try:
+            recurrence = recurrence_repo.add(
+                Recurrence(
+                    kind="expense",
+                    name="Aluguel",
+                    value=1500,
+                    start_month=11,
+                    start_year=2025,
+                    interval_months=2,
+                    occurrences=60,
+                    virtual=True,
+                )
+            )
+            expense_repo.add(
+                Expense(name="Aluguel reajustado", value=1600, month=3, year=2026, recurrence_id=recurrence.id)
+            )
+            recurrence_repo.skip_occurrence(recurrence.id, 5, 2026)
+
+            year_items = list_expenses(expense_repo, year=2026, recurrence_repo=recurrence_repo)
+            month_items = list_expenses(expense_repo, month=1, year=2026, recurrence_repo=recurrence_repo)
+            all_items = list_expenses(expense_repo, recurrence_repo=recurrence_repo)
+
+            assert sorted((item.month, item.value) for item in year_items) == [
+                (1, 1500),
+                (3, 1600),
+                (7, 1500),
+                (9, 1500),
+                (11, 1500),
+            ]
+            assert [(item.id, item.recurrence_id) for item in month_items] == [(None, recurrence.id)]
+            assert len(all_items) == 59
+            assert len(expense_repo.list()) == 1
+        finally:
+            expense_repo.close()
+            recurrence_repo.close()
+
+
+def test_materialize_recurrences_extends_horizon_without_duplicates():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "test.db")
+        expense_repo = SQLiteExpenseRepository(db_path)
+        income_repo = SQLiteIncomeRepository(db_path)
+        recurrence_repo = SQLiteRecurrenceRepository(db_path)
+        try:
+            recurrence = recurrence_repo.add(
+                Recurrence(kind="income", name="Salário", value=3000, start_month=1, start_year=2026, occurrences=24)
+            )
+            materializer = RecurrenceMaterializer(
+                lambda until: materialize_recurrences(recurrence_repo, expense_repo, income_repo, until),
+                horizon_months=3,
+            )
+            horizon = materializer.horizon(date(2026, 2, 15))
+
+            first = materialize_recurrences(recurrence_repo, expense_repo, income_repo, horizon)
+            again = materialize_recurrences(recurrence_repo, expense_repo, income_repo, horizon)
+            recurrence_repo.skip_occurrence(recurrence.id, 6, 2026)
+            _, extended = apply_recurrence(
+                recurrence, expense_repo, income_repo, horizon + 2, recurrence_repo
+            )
+
+            assert first == {"expenses": 0, "incomes": 5}
+            assert again == {"expenses": 0, "incomes": 0}
+            assert [(item.month, item.year) for item in extended] == [(7, 2026)]
+            assert len(income_repo.list()) == 6
+        finally:
+            recurrence_repo.close()
+            income_repo.close()
+            expense_repo.close()
+
+
+def test_materialize_recurrences_inserts_expenses_and_incomes_in_one_transaction():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "test.db")
+        expense_repo = SQLiteExpenseRepository(db_path)
+        income_repo = SQLiteIncomeRepository(db_path)
+        recurrence_repo = SQLiteRecurrenceRepository(db_path)
+        try:
+            recurrence_repo.add(Recurrence(kind="expense", name="Aluguel", value=1000, start_month=1, start_year=2026, occurrences=3))
+            recurrence_repo.add(Recurrence(kind="income", name="Salário", value=3000, start_month=1, start_year=2026, occurrences=3))
+            # Faz a gravação das entradas falhar depois que os gastos já foram inseridos.
+            income_repo.conn.execute("CREATE TRIGGER fail_incomes BEFORE INSERT ON incomes BEGIN SELECT RAISE(ABORT, 'falha'); END")
+            income_repo.conn.commit()
+
+            with pytest.raises(sqlite3.IntegrityError):
+                materialize_recurrences(recurrence_repo, expense_repo, income_repo, month_index(12, 2026))
+
+            assert expense_repo.list() == []
+            assert income_repo.list() == []
+        finally:
+            recurrence_repo.close()
+            income_repo.close()
+            expense_repo.close()
+
+
+def test_period_arithmetic_and_generate_competences():
+    competences = generate_competences(11, 2025, 2, 4)
+
+    assert [(item.month, item.year) for item in competences] == [(11, 2025), (1, 2026), (3, 2026), (5, 2026)]
+    assert add_months(12, 2025, 1) == (1, 2026)
+    assert add_months(1, 2026, -1) == (12, 2025)
+    assert months_between(11, 2025, 2, 2026) == 3
+    assert count_until(month_index(1, 2026), month_index(12, 2026), 3) == 4
+    assert count_until(month_index(2, 2026), month_index(1, 2026)) == 0
+
+
+def test_card_usage_sums_pending_installments_per_card_and_month():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "test.db")
+        card_repo = SQLiteCardRepository(db_path)
+        installment_repo = SQLiteInstallmentRepository(db_path)
+        card = card_repo.add(Card(name="Nubank", limit=1000, closing_day=10, due_day=20))
+        for number, (month, status) in enumerate([(3, "pendente"), (4, "pendente"), (4, "pendente"), (5, "pago")], 1):
+            installment_repo.add(
+                Installment(
+                    card_id=card.id,
+                    expense_name="Compra",
+                    installment_number=number,
+                    total_installments=4,
+                    value=100,
+                    month=month,
+                    year=2026,
+                    status=status,
+                )
+            )
+
+        usage = card_usage(card_repo, installment_repo, months=3, today=date(2026, 3, 15))
+
+        assert usage[0]["committed"] == 300
+        assert usage[0]["available"] == 700
+        assert usage[0]["utilization"] == 30
+        assert usage[0]["exposure"] == [
+            {"month": 4, "year": 2026, "total": 200},
+            {"month": 5, "year": 2026, "total": 0},
+            {"month": 6, "year": 2026, "total": 0},
+        ]
+        installment_repo.close()
+        card_repo.close()
+
+
+def test_recurrence_rules_count_occurrences_per_month():
+    weekly = RecurrenceRule("semanal", 1, 2026, start_day=5, occurrences=10)
+    biweekly = RecurrenceRule("quinzenal", 1, 2026, start_day=31, occurrences=4)
+    yearly = RecurrenceRule("anual", 2, 2024, start_day=29, interval_months=12, occurrences=3)
+    custom = RecurrenceRule("personalizado", 11, 2025, interval_months=2, occurrences=5)
+
+    assert weekly.month_counts() == [(month_index(1, 2026), 4), (month_index(2, 2026), 4), (month_index(3, 2026), 2)]
+    assert weekly.month_counts(month_index(2, 2026), month_index(2, 2026)) == [(month_index(2, 2026), 4)]
+    assert weekly.count_before(month_index(3, 2026)) == 8
+    assert biweekly.dates() == [date(2026, 1, 31), date(2026, 2, 14), date(2026, 2, 28), date(2026, 3, 14)]
+    assert yearly.dates() == [date(2024, 2, 29), date(2025, 2, 28), date(2026, 2, 28)]
+    assert [index for index, _ in custom.month_counts(month_index(1, 2026))] == [
+        month_index(month, 2026) for month in (1, 3, 5, 7)
+    ]
+    assert occurrences_until(weekly, 2, 2026) == 8
+    assert occurrences_until(custom, 10, 2025) == 1
+
+
+def test_recurrence_rule_rejects_invalid_interval_and_start_day():
+    assert interval_for("anual") == 12
+    assert interval_for("mensal", 3) == 3
+    assert interval_for("semanal", 3) == 1
+    assert check_start_day(31) == 31
+    for invalid in (lambda: interval_for("mensal", 0), lambda: interval_for("semanal", -1), lambda: check_start_day(0)):
+        with pytest.raises(ValueError):
+            invalid()
+    with pytest.raises(ValueError):
+        RecurrenceRule("mensal", 1, 2026, start_day=32)
+    with pytest.raises(ValueError):
+        RecurrenceRule("personalizado", 1, 2026, interval_months=0)
+
+
+def test_recurrence_rule_window_matches_full_expansion_and_skips_decades():
+    rule = RecurrenceRule("semanal", 3, 1990, start_day=12, occurrences=52 * 30)
+    full = rule.month_counts()
+    first, last = month_index(6, 2005), month_index(8, 2007)
+
+    assert rule.month_counts(first, last) == [item for item in full if first <= item[0] <= last]
+    assert sum(count for _, count in full) == rule.occurrences
+
+    endless = RecurrenceRule("semanal", 1, 1900, occurrences=10**15)
+    window = endless.month_counts(month_index(1, 2900), month_index(12, 2900))
+    assert len(window) == 12
+    assert sum(count for _, count in window) in (52, 53)
+
+
+def test_amortization_schedules_close_balance_and_match_price_installment():
+    price = amortization_schedule(100000, 1, 360)
+    sac = amortization_schedule(120000, 1, 120, "sac")
+    rows = price.rows()
+
+    assert rows[0] == {"mes": 1, "parcela": 1028.61, "juros": 1000.0, "amortizacao": 28.61, "saldo": 99971.39}
+    assert rows[-1]["saldo"] == 0
+    assert {row["parcela"] for row in rows} == {simulate_installment(100000, 1, 360)["parcela"]}
+    assert round(float(price.principal.sum()), 2) == 100000
+    assert sac.rows()[0]["parcela"] == 2200 and sac.rows()[-1]["parcela"] == 1010
+    assert sac.summary() == {"total_pago": 192600.0, "total_juros": 72600.0}
+    assert len(amortization_schedule(5000, 0, 420).rows()) == 420
+
+
+def test_debt_payoff_closed_form_and_grid_agree():
+    assert simulate_debt_payoff(1000, 100, 0) == {"meses": 10, "total_pago": 1000.0, "juros_pago": 0.0}
+    assert simulate_debt_payoff(1000, 300, 2) == {"meses": 4, "total_pago": 1045.95, "juros_pago": 45.95}
+
+    payments, rates = [20, 150, 300, 1000], [0, 1, 2, 15]
+    grid = debt_payoff_grid(1000, payments, rates)
+
+    for row, rate in enumerate(rates):
+        for column, payment in enumerate(payments):
+            try:
+                expected = simulate_debt_payoff(1000, payment, rate)
+            except ValueError:
+                expected = {"meses": None, "total_pago": None}
+            assert grid["meses"][row][column] == expected["meses"]
+            assert grid["total_pago"][row][column] == expected["total_pago"]
+    assert grid["meses"][3][0] is None
+
+
+def test_monte_carlo_projection_is_seeded_and_matches_pool(monkeypatch):
+    deterministic = project_balance(1000, 100, 12, 1, 0, paths=50, target=3000, seed=1)
+    expected = 1000 * 1.01**12 + 100 * (1.01**12 - 1) / 0.01
+    first = project_balance(1000, 100, 24, 1, 4, paths=5000, target=3500, seed=7)
+    again = project_balance(1000, 100, 24, 1, 4, paths=5000, target=3500, seed=7)
+
+    monkeypatch.setattr(monte_carlo, "PROJECTION_BATCH_SIZE", 1000)
+    monkeypatch.setattr(monte_carlo, "PARALLEL_PROJECTION_THRESHOLD", 2000)
+    pooled = project_balance(1000, 100, 24, 1, 4, paths=5000, target=3500, seed=7)
+    pool = process_pool._shared_pool()
+    pooled_again = project_balance(1000, 100, 24, 1, 4, paths=5000, target=3500, seed=7)
+    monkeypatch.setattr(monte_carlo, "PARALLEL_PROJECTION_THRESHOLD", 10**9)
+    serial = project_balance(1000, 100, 24, 1, 4, paths=5000, target=3500, seed=7)
+
+    assert set(deterministic["percentis"].values()) == {round(expected, 2)}
+    assert deterministic["probabilidade_meta"] == 0
+    assert first == again
+    assert pooled == serial == pooled_again
+    assert process_pool._shared_pool() is pool
+    p = first["percentis"]
+    assert p["p5"] < p["p25"] < p["p50"] < p["p75"] < p["p95"]
+    assert 0 < first["probabilidade_meta"] < 1
+
+
+def test_lru_cache_evicts_least_recently_used_and_counts_hits():
+    cache = LRUCache(maxsize=2)
+    calls = []
+
+    def compute(value):
+        calls.append(value)
+        return value * 2
+
+    for key in ["a", "b", "a", "c", "b", "a"]:
+        cache.get_or_compute(key, lambda key=key: compute(key))
+
+    assert calls == ["a", "b", "c", "b", "a"]
+    assert cache.stats() == {"size": 2, "maxsize": 2, "bytes": 0, "maxbytes": None, "hits": 1, "misses": 5}
+
+
+def test_lru_cache_limits_approximate_memory_and_keeps_large_integers_exact():
+    cache = LRUCache(maxsize=100, maxbytes=8000)
+    for key in range(10):
+        cache.get_or_compute(key, lambda: "x" * 800)
+    huge = cache.get_or_compute("huge", lambda: ["x"] * 1000)
+
+    assert len(huge) == 1000
+    assert cache.stats()["size"] == 9
+    assert cache.stats()["bytes"] <= 8000
+    assert cache.get_or_compute(0, lambda: "recalculado") == "recalculado"
+    assert freeze({"months": 12.0, "seed": 2**53 + 1}) == freeze({"months": 12, "seed": 2**53 + 1})
+    assert freeze({"seed": 2**53 + 1}) != freeze({"seed": 2**53})
+
+
+def test_calculator_cache_serves_repeated_widget_queries(monkeypatch):
+    monkeypatch.setattr(calculator_registry, "CALCULATOR_CACHE", LRUCache(256))
+    scenarios = [
+        {"operation": operation, "principal": 150000 + 10000 * index, "rate": 0.9, "months": 60, "volatility": 2, "paths": 50, "seed": 1}
+        for index in range(3)
+        for operation in ("amortizacao", "parcelamento", "projecao_monte_carlo")
+    ]
+    workload = [dict(item, months=float(item["months"])) if round_ % 2 else item for round_ in range(4) for item in scenarios]
+
+    uncached = [calculator_registry.calculate(item) for item in scenarios]
+    results = [calculator_registry.calculate(item) for item in workload]
+
+    assert results[: len(scenarios)] == uncached
+    assert results[len(scenarios) : 2 * len(scenarios)] == uncached
+    assert calculator_registry.CALCULATOR_CACHE.stats()["hits"] == len(workload)
+    assert calculator_registry.CALCULATOR_CACHE.stats()["misses"] == len(scenarios)
+    unseeded = {"operation": "projecao_monte_carlo", "principal": 1, "rate": 1, "months": 2, "paths": 10}
+    calculator_registry.calculate(unseeded)
+    calculator_registry.calculate(unseeded)
+    assert calculator_registry.CALCULATOR_CACHE.stats()["misses"] == len(scenarios)
+
+
+def test_money_keeps_exact_cents_through_arithmetic_and_splits():
+    assert to_cents(0.285) == 29
+    assert to_cents("-10.005") == -1001
+    assert (Money.of(0.1) + Money.of(0.2)).amount == 0.3
+    assert sum((Money.of(0.1) for _ in range(1000)), Money()).cents == 10000
+    assert (Money.of(19.99) * 3).amount == 59.97
+    assert [part.amount for part in Money.of(100).split(3)] == [33.33, 33.33, 33.34]
+    assert str(Money.of(1234567.8)) == "R$ 1.234.567,80"
+    assert generate_installments(0.05, 2) == [0.03, 0.02]
+    assert calculate_invoice([0.1] * 10 + [0.2]) == 1.2
+
+
+def test_recurrence_month_totals_match_materialized_occurrence_values():
+    recurrence = Recurrence(
+        kind="expense", name="Café", value=1.005, start_month=1, start_year=2026, frequency="semanal", occurrences=52, id=1
+    )
+    first = month_index(1, 2026)
+    totals = {"expense": np.zeros(12, dtype=np.int64), "income": np.zeros(12, dtype=np.int64)}
+
+    add_occurrence_totals([recurrence], set(), first, totals)
+
+    counts = dict(occurrence_counts(recurrence, first, first + 11))
+    assert list(totals["expense"] / 100) == [occurrence_value(recurrence, counts.get(index, 0)) for index in range(first, first + 12)]
+    assert not totals["income"].any()
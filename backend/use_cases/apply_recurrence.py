@@ -1,48 +1,74 @@
 """Caso de uso para aplicar uma recorrência e gerar lançamentos."""
 from __future__ import annotations
 
-from typing import List, Tuple
+from typing import AbstractSet, List, Optional, Tuple
 
 from ..domain.entities import Expense, Income, Recurrence
-from ..repositories.base import Repository
-from ..services.finance_service import generate_competences
+from ..repositories.base import ExpenseRepository, IncomeRepository, OccurrenceRepository, RecurrenceRepository
+from ..domain.period import from_month_index
+from ..services.recurrence_expansion import occurrence_counts, occurrence_value
+
+# (recurrence_id, year, month) das ocorrências gravadas ou removidas.
+OccurrenceKeys = AbstractSet[Tuple[int, int, int]]
+
+
+def missing_occurrences(
+    recurrence: Recurrence,
+    taken: OccurrenceKeys,
+    until: Optional[int] = None,
+) -> List[Expense | Income]:
+    """Lançamentos das ocorrências até ``until`` cuja chave não está em ``taken``."""
+    occurrences = []
+    for index, count in occurrence_counts(recurrence, last=until):
+        month, year = from_month_index(index)
+        if (recurrence.id, year, month) in taken:
+            continue
+        if recurrence.kind == "expense":
+            occurrences.append(
+                Expense(
+                    name=recurrence.name,
+                    value=occurrence_value(recurrence, count),
+                    month=month,
+                    year=year,
+                    category_id=recurrence.category_id,
+                    recurrence_id=recurrence.id,
+                    payment_method=recurrence.payment_method or "debit",
+                    notes=recurrence.notes,
+                )
+            )
+        else:
+            occurrences.append(
+                Income(
+                    name=recurrence.name,
+                    value=occurrence_value(recurrence, count),
+                    month=month,
+                    year=year,
+                    confirmed=recurrence.confirmed if recurrence.confirmed is not None else True,
+                    recurrence_id=recurrence.id,
+                    notes=recurrence.notes,
+                )
+            )
+    return occurrences
 
 
 def apply_recurrence(
     recurrence: Recurrence,
-    expense_repo: Repository[Expense],
-    income_repo: Repository[Income],
+    expense_repo: ExpenseRepository,
+    income_repo: IncomeRepository,
+    until: Optional[int] = None,
+    recurrence_repo: Optional[RecurrenceRepository] = None,
 ) -> Tuple[List[Expense], List[Income]]:
-    competences = generate_competences(
-        start_month=recurrence.start_month,
-        start_year=recurrence.start_year,
-        interval_months=recurrence.interval_months,
-        occurrences=recurrence.occurrences,
-    )
-    created_expenses: List[Expense] = []
-    created_incomes: List[Income] = []
+    """Gera as ocorrências que ainda não existem, até o índice de mês ``until``.
+
+    Reaplicar é seguro: competências já gravadas ou removidas pelo usuário são
+    ignoradas (as removidas só quando ``recurrence_repo`` é informado) e as
+    restantes são inseridas em lote.
+    """
+    repo: OccurrenceRepository = expense_repo if recurrence.kind == "expense" else income_repo
+    taken = repo.recurrence_keys(recurrence.id)
+    if recurrence_repo is not None:
+        taken |= recurrence_repo.skipped_keys([recurrence.id])
+    created = repo.add_many(missing_occurrences(recurrence, taken, until))
     if recurrence.kind == "expense":
-        for competence in competences:
-            expense = Expense(
-                name=recurrence.name,
-                value=recurrence.value,
-                month=competence.month,
-                year=competence.year,
-                category_id=recurrence.category_id,
-                recurrence_id=recurrence.id,
-                payment_method=recurrence.payment_method or "debit",
-                notes=recurrence.notes,
-            )
-            created_expenses.append(expense_repo.add(expense))
-    else:
-        for competence in competences:
-            income = Income(
-                name=recurrence.name,
-                value=recurrence.value,
-                month=competence.month,
-                year=competence.year,
-                confirmed=recurrence.confirmed if recurrence.confirmed is not None else True,
-                notes=recurrence.notes,
-            )
-            created_incomes.append(income_repo.add(income))
-    return created_expenses, created_incomes
+        return created, []
+    return [], created
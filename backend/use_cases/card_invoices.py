@@ -0,0 +1,50 @@
+"""Casos de uso de faturas que combinam parcelas gravadas e parcelamentos."""
+from __future__ import annotations
+
+from typing import List, Optional
+
+from ..domain.entities import CardInvoice, Installment, InstallmentPlan
+from ..domain.period import from_month_index, month_index
+from ..domain.value_objects import from_cents, to_cents
+from ..repositories.base import InstallmentRepository
+from ..services.installment_plans import expand_plan, plan_totals
+
+
+def list_invoices(repo: InstallmentRepository, card_id: int, since: Optional[int] = None) -> List[CardInvoice]:
+    """Faturas do cartão a partir do índice de mês ``since``, somando as parcelas calculadas dos parcelamentos."""
+    stored = repo.invoices(card_id, since=None if since is None else from_month_index(since))
+    invoices = {month_index(item.month, item.year): item for item in stored}
+    plans = repo.list_plans(card_id=card_id, since=since)
+    if plans:
+        overrides = repo.plan_overrides(card_id)
+        for (_, index), (total, count) in plan_totals(plans, overrides, since).items():
+            month, year = from_month_index(index)
+            invoice = invoices.setdefault(index, CardInvoice(card_id=card_id, month=month, year=year))
+            invoice.total = from_cents(to_cents(invoice.total) + total)
+            invoice.installments += count
+    return [invoices[index] for index in sorted(invoices)]
+
+
+def pay_invoice(repo: InstallmentRepository, card_id: int, month: int, year: int, status: str) -> int:
+    """Altera o status de todas as parcelas da fatura, gravando as dos parcelamentos."""
+    index = month_index(month, year)
+    plans = repo.list_plans(card_id=card_id, since=index, until=index)
+    overrides = repo.plan_overrides(card_id) if plans else set()
+    computed = [
+        installment
+        for plan in plans
+        for installment in expand_plan(plan, month=month, year=year, exclude=overrides)
+    ]
+    return repo.set_invoice_status(card_id, month, year, status, computed)
+
+
+def plan_installment(repo: InstallmentRepository, plan: InstallmentPlan, number: int) -> Optional[Installment]:
+    """Parcela ``number`` do parcelamento: a gravada, se houver, ou a calculada."""
+    stored = repo.get_plan_installment(plan.id, number)
+    if stored is not None:
+        return stored
+    if not 1 <= number <= plan.installments:
+        return None
+    month, year = from_month_index(month_index(plan.first_month, plan.first_year) + number - 1)
+    (computed,) = expand_plan(plan, month=month, year=year)
+    return computed
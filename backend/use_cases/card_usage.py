@@ -0,0 +1,57 @@
+"""Caso de uso que calcula o uso do limite de todos os cartões."""
+from __future__ import annotations
+
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+from ..domain.entities import INSTALLMENT_PENDING, Card
+from ..domain.period import from_month_index, month_index, month_range
+from ..domain.value_objects import from_cents, to_cents
+from ..repositories.base import InstallmentRepository, Repository
+from ..services.installment_plans import plan_totals
+from ..services.invoice_engine import open_invoice_index
+
+
+def card_usage(
+    card_repo: Repository[Card],
+    installment_repo: InstallmentRepository,
+    months: int = 6,
+    today: Optional[date] = None,
+) -> List[Dict[str, Any]]:
+    """Valor comprometido (parcelas pendentes), limite disponível e exposição nos próximos ``months`` meses.
+
+    A exposição de cada cartão começa na sua fatura aberta. As somas por mês
+    são feitas em centavos.
+    """
+    totals: Dict[int, Dict[int, int]] = {}
+    for card_id, month, year, total in installment_repo.totals_by_period(INSTALLMENT_PENDING):
+        by_month = totals.setdefault(card_id, {})
+        index = month_index(month, year)
+        by_month[index] = by_month.get(index, 0) + to_cents(total)
+    # Parcelas de parcelamentos sem linha gravada ainda estão pendentes.
+    plans = installment_repo.list_plans()
+    overrides = installment_repo.plan_overrides() if plans else set()
+    for (card_id, index), (total, _) in plan_totals(plans, overrides).items():
+        by_month = totals.setdefault(card_id, {})
+        by_month[index] = by_month.get(index, 0) + total
+
+    usage = []
+    for card in card_repo.list():
+        by_month = totals.get(card.id, {})
+        committed = from_cents(sum(by_month.values()))
+        exposure = []
+        for index in month_range(open_invoice_index(card, today), months):
+            month, year = from_month_index(index)
+            exposure.append({"month": month, "year": year, "total": from_cents(by_month.get(index, 0))})
+        usage.append(
+            {
+                "card_id": card.id,
+                "name": card.name,
+                "limit": card.limit,
+                "committed": committed,
+                "available": round(card.limit - committed, 2),
+                "utilization": round(committed / card.limit * 100, 2) if card.limit else 0.0,
+                "exposure": exposure,
+            }
+        )
+    return usage
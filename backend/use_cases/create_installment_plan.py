@@ -0,0 +1,7 @@
+"""Caso de uso para criação de parcelamentos no cartão."""
+from ..domain.entities import InstallmentPlan
+from ..repositories.base import InstallmentRepository
+
+
+def create_installment_plan(repo: InstallmentRepository, plan: InstallmentPlan) -> InstallmentPlan:
+    return repo.add_plan(plan)
@@ -0,0 +1,91 @@
+"""Caso de uso que completa listagens e totais com as ocorrências de recorrências não gravadas."""
+from __future__ import annotations
+
+from typing import Iterable, Iterator, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from ..domain.entities import Expense, Income, Recurrence
+from ..repositories.base import ExpenseRepository, IncomeRepository, RecurrenceRepository
+from ..services.recurrence_expansion import add_occurrence_totals, expand_occurrence_counts, occurrence_value
+
+
+def _missing_occurrences(
+    recurrence_repo: RecurrenceRepository,
+    kind: str,
+    stored: Iterable[Expense | Income],
+    month: Optional[int],
+    year: Optional[int],
+) -> Iterator[Tuple[Recurrence, int, int, float]]:
+    recurrences = [item for item in recurrence_repo.list() if item.virtual and item.kind == kind]
+    if not recurrences:
+        return
+    # Linhas gravadas da mesma ocorrência (edições) e ocorrências removidas substituem a virtual.
+    taken = {(item.recurrence_id, item.year, item.month) for item in stored if item.recurrence_id is not None}
+    taken |= recurrence_repo.skipped_keys(item.id for item in recurrences)
+    for recurrence in recurrences:
+        for occurrence_month, occurrence_year, count in expand_occurrence_counts(recurrence, month=month, year=year):
+            if (recurrence.id, occurrence_year, occurrence_month) not in taken:
+                yield recurrence, occurrence_month, occurrence_year, occurrence_value(recurrence, count)
+
+
+def virtual_expenses(
+    recurrence_repo: RecurrenceRepository,
+    stored: List[Expense],
+    month: Optional[int] = None,
+    year: Optional[int] = None,
+) -> List[Expense]:
+    return [
+        Expense(
+            name=recurrence.name,
+            value=value,
+            month=occurrence_month,
+            year=occurrence_year,
+            category_id=recurrence.category_id,
+            recurrence_id=recurrence.id,
+            payment_method=recurrence.payment_method or "debit",
+            notes=recurrence.notes,
+        )
+        for recurrence, occurrence_month, occurrence_year, value in _missing_occurrences(
+            recurrence_repo, "expense", stored, month, year
+        )
+    ]
+
+
+def virtual_incomes(
+    recurrence_repo: RecurrenceRepository,
+    stored: List[Income],
+    month: Optional[int] = None,
+    year: Optional[int] = None,
+) -> List[Income]:
+    return [
+        Income(
+            name=recurrence.name,
+            value=value,
+            month=occurrence_month,
+            year=occurrence_year,
+            confirmed=recurrence.confirmed if recurrence.confirmed is not None else True,
+            recurrence_id=recurrence.id,
+            notes=recurrence.notes,
+        )
+        for recurrence, occurrence_month, occurrence_year, value in _missing_occurrences(
+            recurrence_repo, "income", stored, month, year
+        )
+    ]
+
+
+def add_recurrence_totals(
+    recurrences: List[Recurrence],
+    expense_repo: ExpenseRepository,
+    income_repo: IncomeRepository,
+    recurrence_repo: RecurrenceRepository,
+    first: int,
+    totals: Mapping[str, np.ndarray],
+) -> None:
+    """Soma em ``totals["expense"]``/``totals["income"]``, em centavos, as ocorrências de
+    ``recurrences`` ainda não gravadas nem removidas, a partir do índice de mês ``first``."""
+    if not recurrences:
+        return
+    taken = expense_repo.recurrence_keys() | income_repo.recurrence_keys()
+    taken |= recurrence_repo.skipped_keys(item.id for item in recurrences)
+    add_occurrence_totals(recurrences, taken, first, totals)
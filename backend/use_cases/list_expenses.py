@@ -1,17 +1,25 @@
 """Caso de uso para listagem de gastos."""
 from typing import List, Optional
-from ..domain.entities import Expense
+from ..domain.entities import Expense, Recurrence
 from ..repositories.base import Repository
+from .expand_recurrences import virtual_expenses
 
 
-def list_expenses(repo: Repository[Expense], month: Optional[int] = None, year: Optional[int] = None) -> List[Expense]:
+def list_expenses(
+    repo: Repository[Expense],
+    month: Optional[int] = None,
+    year: Optional[int] = None,
+    recurrence_repo: Optional[Repository[Recurrence]] = None,
+) -> List[Expense]:
+    """Lista gastos gravados; com ``recurrence_repo`` inclui as ocorrências virtuais do período."""
     if hasattr(repo, "list_filtered"):
-        return repo.list_filtered(month=month, year=year)  # type: ignore[attr-defined]
-    expenses = repo.list()
-    if month is None and year is None:
-        return expenses
-    return [
-        expense
-        for expense in expenses
-        if (month is None or expense.month == month) and (year is None or expense.year == year)
-    ]
+        expenses = repo.list_filtered(month=month, year=year)  # type: ignore[attr-defined]
+    else:
+        expenses = [
+            expense
+            for expense in repo.list()
+            if (month is None or expense.month == month) and (year is None or expense.year == year)
+        ]
+    if recurrence_repo is not None:
+        expenses.extend(virtual_expenses(recurrence_repo, expenses, month=month, year=year))
+    return expenses
@@ -1,18 +1,26 @@
 """Caso de uso para listagem de entradas."""
 from typing import List, Optional
 
-from ..domain.entities import Income
+from ..domain.entities import Income, Recurrence
 from ..repositories.base import Repository
+from .expand_recurrences import virtual_incomes
 
 
-def list_incomes(repo: Repository[Income], month: Optional[int] = None, year: Optional[int] = None) -> List[Income]:
+def list_incomes(
+    repo: Repository[Income],
+    month: Optional[int] = None,
+    year: Optional[int] = None,
+    recurrence_repo: Optional[Repository[Recurrence]] = None,
+) -> List[Income]:
+    """Lista entradas gravadas; com ``recurrence_repo`` inclui as ocorrências virtuais do período."""
     if hasattr(repo, "list_filtered"):
-        return repo.list_filtered(month=month, year=year)  # type: ignore[attr-defined]
-    incomes = repo.list()
-    if month is None and year is None:
-        return incomes
-    return [
-        income
-        for income in incomes
-        if (month is None or income.month == month) and (year is None or income.year == year)
-    ]
+        incomes = repo.list_filtered(month=month, year=year)  # type: ignore[attr-defined]
+    else:
+        incomes = [
+            income
+            for income in repo.list()
+            if (month is None or income.month == month) and (year is None or income.year == year)
+        ]
+    if recurrence_repo is not None:
+        incomes.extend(virtual_incomes(recurrence_repo, incomes, month=month, year=year))
+    return incomes
@@ -2,22 +2,30 @@
 from typing import List, Optional
 
 from ..domain.entities import Installment
-from ..repositories.base import Repository
+from ..repositories.base import InstallmentRepository
+from ..services.installment_plans import expand_plan
 
 
 def list_installments(
-    repo: Repository[Installment],
+    repo: InstallmentRepository,
     card_id: Optional[int] = None,
     month: Optional[int] = None,
     year: Optional[int] = None,
+    expand_plans: bool = False,
 ) -> List[Installment]:
+    """Lista parcelas gravadas; com ``expand_plans`` inclui as parcelas calculadas dos parcelamentos."""
     if hasattr(repo, "list_filtered"):
-        return repo.list_filtered(card_id=card_id, month=month, year=year)  # type: ignore[attr-defined]
-    installments = repo.list()
-    return [
-        installment
-        for installment in installments
-        if (card_id is None or installment.card_id == card_id)
-        and (month is None or installment.month == month)
-        and (year is None or installment.year == year)
-    ]
+        installments = repo.list_filtered(card_id=card_id, month=month, year=year)  # type: ignore[attr-defined]
+    else:
+        installments = [
+            installment
+            for installment in repo.list()
+            if (card_id is None or installment.card_id == card_id)
+            and (month is None or installment.month == month)
+            and (year is None or installment.year == year)
+        ]
+    if expand_plans:
+        overrides = repo.plan_overrides(card_id)
+        for plan in repo.list_plans(card_id=card_id):
+            installments.extend(expand_plan(plan, month=month, year=year, exclude=overrides))
+    return installments
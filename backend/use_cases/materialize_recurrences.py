@@ -0,0 +1,34 @@
+"""Caso de uso que gera as ocorrências pendentes de todas as recorrências gravadas."""
+from __future__ import annotations
+
+from typing import Dict, List, Optional
+
+from ..domain.entities import Expense, Income
+from ..repositories.base import ExpenseRepository, IncomeRepository, RecurrenceRepository
+from .apply_recurrence import missing_occurrences
+
+
+def materialize_recurrences(
+    recurrence_repo: RecurrenceRepository,
+    expense_repo: ExpenseRepository,
+    income_repo: IncomeRepository,
+    until: Optional[int] = None,
+) -> Dict[str, int]:
+    """Completa as recorrências não virtuais até o índice de mês ``until``.
+
+    Faz uma única passada: lê de uma vez as chaves ``(recurrence_id, ano, mês)``
+    gravadas e removidas, calcula por diferença de conjuntos as ocorrências que
+    faltam em todas as recorrências e insere gastos e entradas em uma única
+    transação. Repetir a chamada não gera duplicatas.
+    """
+    recurrences = [item for item in recurrence_repo.list() if not item.virtual]
+    taken = expense_repo.recurrence_keys() | income_repo.recurrence_keys()
+    taken |= recurrence_repo.skipped_keys(item.id for item in recurrences)
+    expenses: List[Expense] = []
+    incomes: List[Income] = []
+    for recurrence in recurrences:
+        target = expenses if recurrence.kind == "expense" else incomes
+        target.extend(missing_occurrences(recurrence, taken, until))  # type: ignore[arg-type]
+    if not expenses and not incomes:
+        return {"expenses": 0, "incomes": 0}
+    return recurrence_repo.add_occurrences(expenses, incomes)
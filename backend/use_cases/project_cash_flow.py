@@ -0,0 +1,126 @@
+"""Caso de uso que projeta o saldo mês a mês a partir do mês atual."""
+from __future__ import annotations
+
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from ..domain.entities import INSTALLMENT_PENDING, Goal
+from ..domain.period import from_month_index, month_index
+from ..domain.value_objects import to_cents
+from ..repositories.base import ExpenseRepository, IncomeRepository, InstallmentRepository, RecurrenceRepository, Repository
+from ..services.installment_plans import plan_totals
+from .expand_recurrences import add_recurrence_totals
+
+# Meses de histórico usados na média de gastos avulsos por categoria.
+HISTORY_MONTHS = 6
+
+
+def project_cash_flow(
+    recurrence_repo: RecurrenceRepository,
+    expense_repo: ExpenseRepository,
+    income_repo: IncomeRepository,
+    installment_repo: InstallmentRepository,
+    goal_repo: Repository[Goal],
+    months: int = 12,
+    today: Optional[date] = None,
+) -> Dict[str, Any]:
+    """Entradas, saídas e saldo acumulado dos próximos ``months`` meses.
+
+    Cada componente é um vetor indexado por ``índice de mês - primeiro``:
+
+    - recorrências: ocorrências calculadas pelo motor de regras, exceto as
+      gravadas (que entram pelo valor gravado) e as removidas;
+    - lançamentos gravados no período (inclusive os avulsos já planejados);
+    - gastos avulsos estimados: média por categoria dos últimos
+      ``HISTORY_MONTHS`` meses, limitada pela meta da categoria no mês; um
+      valor avulso já gravado maior que a estimativa prevalece;
+    - parcelas de cartão pendentes, gravadas ou de parcelamentos; o gasto de
+      uma compra parcelada não entra nos lançamentos nem no histórico.
+    """
+    today = today or date.today()
+    first = month_index(today.month, today.year)
+    last = first + months - 1
+
+    # Lançamentos, recorrências e parcelas somados em centavos; em reais só ao combinar com as estimativas.
+    incomes = np.zeros(months, dtype=np.int64)
+    expenses = np.zeros(months, dtype=np.int64)
+    installments = np.zeros(months, dtype=np.int64)
+
+    add_recurrence_totals(
+        recurrence_repo.list(), expense_repo, income_repo, recurrence_repo, first, {"expense": expenses, "income": incomes}
+    )
+
+    for month, year, _, total in income_repo.period_totals(first, last):
+        incomes[month_index(month, year) - first] += to_cents(total)
+
+    # Compras parceladas entram pelas parcelas, não pelo gasto do mês da compra.
+    plans = installment_repo.list_plans()
+    financed = {plan.expense_id for plan in plans if plan.expense_id is not None}
+
+    categories: Dict[Optional[int], int] = {}
+    planned: List[tuple] = []
+    for month, year, category_id, recurring, total in expense_repo.period_totals(first, last, financed):
+        if recurring:
+            expenses[month_index(month, year) - first] += to_cents(total)
+        else:
+            planned.append((categories.setdefault(category_id, len(categories)), month_index(month, year) - first, total))
+    history: List[tuple] = [
+        (categories.setdefault(category_id, len(categories)), total)
+        for _, _, category_id, recurring, total in expense_repo.period_totals(first - HISTORY_MONTHS, first - 1, financed)
+        if not recurring
+    ]
+    goals = [
+        (categories[goal.category_id], month_index(goal.month, goal.year) - first, goal.limit_value)
+        for goal in goal_repo.list()
+        if goal.category_id in categories and first <= month_index(goal.month, goal.year) <= last
+    ]
+    # Matriz categorias x meses dos gastos avulsos.
+    estimate = np.zeros((len(categories), months))
+    if history:
+        rows, totals = np.array(history).T
+        average = np.zeros(len(categories))
+        np.add.at(average, rows.astype(int), totals / HISTORY_MONTHS)
+        estimate += average[:, None]
+    if goals:
+        rows, columns, limits = np.array(goals).T
+        estimate[rows.astype(int), columns.astype(int)] = np.minimum(
+            estimate[rows.astype(int), columns.astype(int)], limits
+        )
+    if planned:
+        rows, columns, totals = np.array(planned).T
+        planned_matrix = np.zeros_like(estimate)
+        np.add.at(planned_matrix, (rows.astype(int), columns.astype(int)), totals)
+        estimate = np.maximum(estimate, planned_matrix)
+    discretionary = estimate.sum(axis=0)
+
+    for _, month, year, total in installment_repo.totals_by_period(INSTALLMENT_PENDING):
+        if first <= month_index(month, year) <= last:
+            installments[month_index(month, year) - first] += to_cents(total)
+    if plans:
+        overrides = installment_repo.plan_overrides()
+        for (_, index), (total, _) in plan_totals(plans, overrides, first).items():
+            if index <= last:
+                installments[index - first] += total
+
+    incomes, expenses, installments = incomes / 100, expenses / 100, installments / 100
+    outflows = expenses + discretionary + installments
+    balance = np.cumsum(incomes - outflows)
+    return {
+        "meses": months,
+        "saldo_final": round(float(balance[-1]), 2),
+        "projecao": [
+            {
+                "month": month,
+                "year": year,
+                "entradas": round(float(incomes[offset]), 2),
+                "gastos_recorrentes": round(float(expenses[offset]), 2),
+                "gastos_estimados": round(float(discretionary[offset]), 2),
+                "parcelas": round(float(installments[offset]), 2),
+                "saldo_mes": round(float(incomes[offset] - outflows[offset]), 2),
+                "saldo_acumulado": round(float(balance[offset]), 2),
+            }
+            for offset, (month, year) in enumerate(from_month_index(index) for index in range(first, last + 1))
+        ],
+    }
@@ -0,0 +1,43 @@
+"""Caso de uso que totaliza entradas e gastos mês a mês em um intervalo."""
+from __future__ import annotations
+
+from typing import Dict
+
+import numpy as np
+
+from ..domain.period import month_index
+from ..domain.value_objects import to_cents
+from ..repositories.base import ExpenseRepository, IncomeRepository, RecurrenceRepository
+from .expand_recurrences import add_recurrence_totals
+
+
+def period_totals(
+    expense_repo: ExpenseRepository,
+    income_repo: IncomeRepository,
+    recurrence_repo: RecurrenceRepository,
+    first: int,
+    last: int,
+) -> Dict[str, np.ndarray]:
+    """Vetores ``entradas`` e ``gastos`` indexados por ``índice de mês - first``.
+
+    Soma os lançamentos gravados (um GROUP BY por tabela) e as ocorrências das
+    recorrências virtuais que não foram gravadas nem removidas, como em
+    ``/relatorios/mes``. A soma é feita em centavos e convertida para reais
+    só no retorno.
+    """
+    months = last - first + 1
+    totals = {"entradas": np.zeros(months, dtype=np.int64), "gastos": np.zeros(months, dtype=np.int64)}
+    for month, year, _, total in income_repo.period_totals(first, last):
+        totals["entradas"][month_index(month, year) - first] += to_cents(total)
+    for month, year, _, _, total in expense_repo.period_totals(first, last):
+        totals["gastos"][month_index(month, year) - first] += to_cents(total)
+
+    add_recurrence_totals(
+        [item for item in recurrence_repo.list() if item.virtual],
+        expense_repo,
+        income_repo,
+        recurrence_repo,
+        first,
+        {"expense": totals["gastos"], "income": totals["entradas"]},
+    )
+    return {name: column / 100 for name, column in totals.items()}
@@ -0,0 +1,41 @@
+"""Benchmark do cache das calculadoras para consultas repetidas dos widgets.
+
+Mede a primeira rodada (cálculo) contra rodadas repetidas servidas pelo
+``CALCULATOR_CACHE``. Executar na raiz do repositório:
+
+    python scripts/bench_calculator_cache.py [rodadas]
+"""
+from __future__ import annotations
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from backend.services import calculator_registry  # noqa: E402
+
+
+def main(rounds: int = 20) -> None:
+    scenarios = [
+        {"operation": operation, "principal": 150000 + 10000 * index, "rate": 0.9, "months": 420, "volatility": 2, "paths": 2000, "seed": 1}
+        for index in range(10)
+        for operation in ("amortizacao", "parcelamento", "projecao_monte_carlo")
+    ]
+    workload = [dict(item, months=float(item["months"])) if round_ % 2 else item for round_ in range(rounds) for item in scenarios]
+
+    started = time.perf_counter()
+    uncached = [calculator_registry.calculate(item) for item in scenarios]
+    cold = time.perf_counter() - started
+    started = time.perf_counter()
+    results = [calculator_registry.calculate(item) for item in workload]
+    warm = time.perf_counter() - started
+
+    assert results[: len(scenarios)] == uncached
+    print(f"{len(scenarios)} cálculos sem cache: {cold:.3f} s")
+    print(f"{len(workload)} consultas com cache: {warm:.3f} s")
+    print(calculator_registry.CALCULATOR_CACHE.stats())
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
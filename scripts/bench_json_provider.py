@@ -0,0 +1,50 @@
+"""Benchmark da serialização de listagens grandes pelo provedor JSON do app.
+
+Compara o provedor padrão do Flask (``asdict`` + ``json``) com o
+``EntityJSONProvider`` com e sem orjson. Executar na raiz do repositório:
+
+    python scripts/bench_json_provider.py [quantidade]
+"""
+from __future__ import annotations
+
+import json
+import sys
+import time
+from dataclasses import asdict
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from flask.json.provider import DefaultJSONProvider  # noqa: E402
+
+import backend.app as app_module  # noqa: E402
+from backend.domain.entities import Expense  # noqa: E402
+from backend.json_provider import EntityJSONProvider, orjson  # noqa: E402
+
+
+def main(count: int = 50000) -> None:
+    expenses = [
+        Expense(name=f"Gasto {index}", value=index / 100, month=index % 12 + 1, year=2026, category_id=index % 7 or None, notes="ção", id=index)
+        for index in range(count)
+    ]
+    baseline = DefaultJSONProvider(app_module.app)
+    provider = EntityJSONProvider(app_module.app)
+
+    started = time.perf_counter()
+    expected = baseline.dumps([asdict(expense) for expense in expenses], separators=(",", ":"))
+    print(f"padrão do Flask:        {time.perf_counter() - started:.3f} s")
+
+    for use_orjson in (False, True):
+        if use_orjson and orjson is None:
+            print("orjson não instalado")
+            continue
+        provider.use_orjson = use_orjson
+        started = time.perf_counter()
+        encoded = provider.encode(expenses)
+        elapsed = time.perf_counter() - started
+        assert json.loads(encoded) == json.loads(expected)
+        print(f"EntityJSONProvider{' (orjson)' if use_orjson else ''}: {elapsed:.3f} s")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
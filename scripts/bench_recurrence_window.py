@@ -0,0 +1,30 @@
+"""Benchmark da expansão de uma recorrência numa janela distante do início.
+
+A janela de meses deve custar o mesmo para uma regra que começou ontem ou há
+mil anos. Executar na raiz do repositório:
+
+    python scripts/bench_recurrence_window.py
+"""
+from __future__ import annotations
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from backend.domain.period import month_index  # noqa: E402
+from backend.domain.recurrence_rules import RecurrenceRule  # noqa: E402
+
+
+def main() -> None:
+    for start_year in (2025, 1900, 1000):
+        rule = RecurrenceRule("semanal", 1, start_year, occurrences=10**15)
+        started = time.perf_counter()
+        window = rule.month_counts(month_index(1, 2900), month_index(12, 2900))
+        elapsed = time.perf_counter() - started
+        print(f"início em {start_year}: {len(window)} meses, {sum(count for _, count in window)} ocorrências em {elapsed * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()